@@ -1,14 +1,25 @@
 import argparse
+import json
 import os
 import re
-from sys import stderr
+import threading
+import time
+from functools import lru_cache
+from importlib import import_module
+from io import StringIO
+from sys import stderr, stdin
 
-from ruamel.yaml import YAML, YAMLError
+try:
+    import fcntl
+except ModuleNotFoundError:  # fcntl is not available on Windows, files are written without locks
+    fcntl = None
 
 try:
-    from .pybump_version import PybumpVersion
+    from .pybump_locator import PybumpLocatedText, LOCATORS_CONFIG, load_locators
+    from .pybump_version import PybumpVersion, sort_versions, max_version, min_version
 except ImportError:
-    from pybump_version import PybumpVersion
+    from pybump_locator import PybumpLocatedText, LOCATORS_CONFIG, load_locators
+    from pybump_version import PybumpVersion, sort_versions, max_version, min_version
 
 # Regex to match version strings like: version = "1.0.0" or __version__ = '1.0.0'
 # (?<![a-zA-Z0-9_-])  - Negative lookbehind: 'version' must NOT be preceded by alphanumeric, underscore, or hyphen
@@ -22,6 +33,153 @@ except ImportError:
 # [\"']               - Closing quote (single or double)
 regex_version_pattern = re.compile(r"((?<![a-zA-Z0-9_-])(?:__)?version(?:__)? ?= ?[\"'])(.+?)([\"'])")
 
+# Well known names of version files, used when searching directories for version files
+VERSION_FILE_NAMES = ('Chart.yaml', 'pyproject.toml', 'setup.py', 'VERSION')
+
+# Version files are small, larger inputs (like a mis-pointed --file) are rejected before they are loaded
+MAX_FILE_SIZE = 1024 * 1024
+# A VERSION file holds a single version string on its first line, longer lines are cut
+MAX_VERSION_LINE_LENGTH = 1024
+# File content quoted in error messages is cut to this length
+MAX_ERROR_CONTENT_LENGTH = 200
+# Seconds to wait for the lock of a version file held by another pybump writer
+LOCK_TIMEOUT = 10.0
+# Seconds between attempts to take a busy lock, the wait starts at LOCK_MIN_POLL_INTERVAL and doubles
+LOCK_MIN_POLL_INTERVAL = 0.001
+LOCK_MAX_POLL_INTERVAL = 0.05
+
+
+def import_optional_module(module_name, extra):
+    """
+    Import a module that is part of an optional dependency (extra),
+    so the core app (VERSION, .py and .toml files) works without installing the YAML and git stacks
+    :param module_name: string, for example 'ruamel.yaml'
+    :param extra: string, name of the pybump extra that installs the module, for example 'helm'
+    :return: the imported module
+    """
+    try:
+        return import_module(module_name)
+    except ModuleNotFoundError:
+        raise ModuleNotFoundError("'{0}' is required for this operation but is not installed, "
+                                  "install it with: pip install 'pybump[{1}]'".format(module_name, extra),
+                                  name=module_name)
+
+
+# ruamel YAML engines are not thread safe, every thread keeps its own engines, see get_yaml_engine
+yaml_engines = threading.local()
+
+
+def get_yaml_engine(typ='rt'):
+    """
+    Return a ruamel YAML engine of the current thread, engines are configured once and reused for every file,
+    'rt' (round-trip) keeps comments and formatting of files that are written, 'safe' is used for reading only
+    :param typ: string, rt|safe
+    :return: ruamel.yaml.YAML object
+    """
+    engine = getattr(yaml_engines, typ, None)
+    if engine is None:
+        engine = import_optional_module('ruamel.yaml', 'helm').YAML(typ=typ)
+        setattr(yaml_engines, typ, engine)
+    return engine
+
+
+@lru_cache(maxsize=None)
+def get_libyaml_loader():
+    """
+    Build a PyYAML loader on the libyaml C parser, that loads every plain scalar (except null) as a string,
+    PyYAML resolves scalars by YAML 1.1 rules (like 010 = 8, or yes = True) while set/bump use ruamel YAML 1.2,
+    so no scalar type is resolved at all, and a version always reads as written in the file
+    :return: PyYAML loader class if PyYAML is installed with libyaml bindings, else None
+    """
+    try:
+        from yaml import CParser
+        from yaml.constructor import SafeConstructor
+        from yaml.resolver import BaseResolver
+    except ImportError:
+        return None
+
+    class PybumpStringLoader(CParser, SafeConstructor, BaseResolver):
+        def __init__(self, stream):
+            CParser.__init__(self, stream)
+            SafeConstructor.__init__(self)
+            BaseResolver.__init__(self)
+
+    # null and merge keys ('<<') resolve the same in YAML 1.1 and 1.2
+    PybumpStringLoader.add_implicit_resolver('tag:yaml.org,2002:null', re.compile(r"^(?:~|null|Null|NULL|)$"),
+                                             ['~', 'n', 'N', ''])
+    PybumpStringLoader.add_implicit_resolver('tag:yaml.org,2002:merge', re.compile(r"^(?:<<)$"), ['<'])
+    return PybumpStringLoader
+
+
+def load_yaml(text, read_only=False):
+    """
+    Load YAML text, with the round-trip engine if the content may be written back,
+    when 'read_only' comments and formatting are not needed, so the C accelerated PyYAML (libyaml) parser is used
+    if installed (scalars are loaded as strings, see get_libyaml_loader),
+    otherwise the ruamel safe loader (which uses the C loader of ruamel when it is compiled)
+    :param text: YAML as string
+    :param read_only: boolean
+    :return: loaded content
+    """
+    libyaml_loader = get_libyaml_loader() if read_only else None
+    if libyaml_loader is not None:
+        pyyaml = import_module('yaml')
+        try:
+            return pyyaml.load(text, Loader=libyaml_loader)
+        except pyyaml.YAMLError as exc:
+            raise ValueError("Invalid YAML: {}".format(shorten_content(exc)))
+
+    engine = get_yaml_engine('safe' if read_only else 'rt')
+    try:
+        return engine.load(text)
+    except import_module('ruamel.yaml').YAMLError as exc:
+        raise ValueError("Invalid YAML: {}".format(shorten_content(exc)))
+
+
+def is_supported_file(file_path):
+    """
+    Check if file name or extension is known to this app (.py/.toml/.yaml/.yml/VERSION)
+    :param file_path: path to file as string
+    :return: boolean
+    """
+    filename, file_extension = os.path.splitext(file_path)
+    return file_extension in ('.py', '.toml', '.yaml', '.yml') or os.path.basename(filename) == 'VERSION'
+
+
+def shorten_content(content, limit=MAX_ERROR_CONTENT_LENGTH):
+    """
+    Cut content that is quoted in error messages, so a large file is never dumped to the terminal
+    :param content: any object, its string representation is used
+    :param limit: maximum number of characters to keep
+    :return: string
+    """
+    content = str(content)
+    if len(content) <= limit:
+        return content
+    return '{}... ({} more characters)'.format(content[:limit], len(content) - limit)
+
+
+def read_bounded(file_path, stream, limit=MAX_FILE_SIZE):
+    """
+    Read a stream, but never more than 'limit' characters,
+    for files on disk the size in bytes is checked against the same limit before anything is read
+    :param file_path: path to file as string, used in the error message
+    :param stream: text stream
+    :param limit: maximum number of characters (and bytes, for files on disk)
+    :return: content as string
+    """
+    try:
+        size = os.fstat(stream.fileno()).st_size
+    except (AttributeError, OSError, ValueError):  # not a file on disk, like StringIO
+        size = 0
+    if size > limit:
+        raise ValueError("File {} is larger than {} bytes, it is probably not a version file".format(file_path, limit))
+    content = stream.read(limit + 1)
+    if len(content) > limit:
+        raise ValueError("File {} is longer than {} characters, it is probably not a version file"
+                         .format(file_path, limit))
+    return content
+
 
 def is_valid_helm_chart(content):
     """
@@ -43,9 +201,9 @@ def get_version_from_file(content):
     """
     version_match = regex_version_pattern.findall(content)
     if len(version_match) > 1:
-        raise RuntimeError("More than one 'version' found: {0}".format(version_match))
+        raise RuntimeError("More than one 'version' found: {0}".format(shorten_content(version_match)))
     if not version_match:
-        raise RuntimeError("Unable to find version string in: {0}".format(content))
+        raise RuntimeError("Unable to find version string in: {0}".format(shorten_content(content)))
     return version_match[0][1]
 
 
@@ -76,6 +234,159 @@ def get_self_version(dist_name):
         return 'version not found'
 
 
+def set_version_in_content(file_path, file_content, version, app_version):
+    """
+    Set the 'version' or 'appVersion' in content previously returned by read_version_from_file,
+    the content is not written to disk, use dump_content_to_file for that
+    :param file_path: full path to file as string, used to identify the file type
+    :param file_content: content of the file (string for .py/.toml files, dict for Helm charts,
+        PybumpLocatedText for files read with user defined locators)
+    :param version: version to set as string
+    :param app_version: boolean, if True then set the appVersion key
+    :return: updated content of the file
+    """
+    filename, file_extension = os.path.splitext(file_path)
+    if isinstance(file_content, PybumpLocatedText):
+        return file_content.with_version(version)
+    elif file_extension in ('.py', '.toml'):
+        return set_version_in_file(version, file_content)
+    elif file_extension == '.yaml' or file_extension == '.yml':
+        if app_version:
+            file_content['appVersion'] = version
+        else:
+            file_content['version'] = version
+        return file_content
+    elif os.path.basename(filename) == 'VERSION':
+        return version
+    return file_content
+
+
+def format_content(file_path, file_content):
+    """
+    Render content (as returned by set_version_in_content) into the text that would be written to a given file
+    :param file_path: full path to file as string, used to identify the file type
+    :param file_content: content of the file (string for .py/.toml/VERSION files, dict for Helm charts,
+        PybumpLocatedText for files read with user defined locators)
+    :return: file text as string
+    """
+    filename, file_extension = os.path.splitext(file_path)
+    if isinstance(file_content, PybumpLocatedText):
+        return file_content.text
+    elif file_extension in ('.py', '.toml'):
+        return file_content
+    elif file_extension == '.yaml' or file_extension == '.yml':
+        stream = StringIO()
+        get_yaml_engine().dump(file_content, stream)
+        return stream.getvalue()
+    elif os.path.basename(filename) == 'VERSION':
+        return file_content
+    return ''
+
+
+def dump_content_to_file(file_path, file_content):
+    """
+    Write content (as returned by set_version_in_content) to a given file
+    :param file_path: full path to file as string
+    :param file_content: content of the file (string for .py/.toml/VERSION files, dict for Helm charts)
+    """
+    with open(file_path, 'w') as outfile:
+        outfile.write(format_content(file_path, file_content))
+        outfile.close()
+
+
+class PybumpFileLock(object):
+    """
+    Exclusive advisory lock (flock) of a version file, held around a read-modify-write,
+    so concurrent pybump writers of the same file run one after the other instead of losing updates:
+
+        with PybumpFileLock(file_path):
+            file_data = read_version_from_file(file_path, False)
+            write_version_to_file(file_path, file_data.get('file_content'), new_version, False)
+
+    the lock is advisory, only writers that take it are serialised, on platforms without fcntl no lock is taken,
+    a shared lock (of dry runs) only waits for writers, and is taken on files that are not writable
+    """
+
+    def __init__(self, file_path, timeout=LOCK_TIMEOUT, shared=False, create=False):
+        """
+        :param file_path: full path to file as string
+        :param timeout: seconds to wait for the lock, RuntimeError is raised when it expires
+        :param shared: boolean, if True take a shared (read) lock instead of an exclusive one
+        :param create: boolean, if True create the file if missing, for lock files next to files that are replaced
+        """
+        self.__file_path = file_path
+        self.__timeout = timeout
+        self.__shared = shared
+        self.__create = create
+        self.__fd = None
+
+    @property
+    def file_path(self):
+        return self.__file_path
+
+    @property
+    def locked(self):
+        return self.__fd is not None
+
+    def acquire(self):
+        if fcntl is None or self.__fd is not None:
+            return
+        # flock is emulated with fcntl locks on NFS, where an exclusive lock needs a writable descriptor
+        flags = os.O_RDONLY if self.__shared else os.O_RDWR
+        fd = os.open(self.__file_path, flags | os.O_CREAT if self.__create else flags, 0o644)
+        operation = fcntl.LOCK_SH if self.__shared else fcntl.LOCK_EX
+        deadline = time.monotonic() + self.__timeout
+        poll_interval = LOCK_MIN_POLL_INTERVAL
+        while True:
+            try:
+                fcntl.flock(fd, operation | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    os.close(fd)
+                    raise RuntimeError("Timed out after {}s waiting for the lock of {}"
+                                       .format(self.__timeout, self.__file_path))
+                time.sleep(poll_interval)
+                poll_interval = min(poll_interval * 2, LOCK_MAX_POLL_INTERVAL)
+        self.__fd = fd
+
+    def check_version(self, expected_version, app_version=False, locators=None):
+        """
+        Compare-and-swap guard of writers that read the file before the lock was taken,
+        fail if the version of the file changed since it was read
+        :param expected_version: version string read from the file before
+        :param app_version: boolean, if True compare appVersion of Helm chart
+        :param locators: optional PybumpLocators of user defined version locations
+        """
+        file_data = read_version_from_file(self.__file_path, app_version, locators=locators)
+        check_expected_version(self.__file_path, file_data.get('version'), str(expected_version))
+
+    def release(self):
+        if self.__fd is not None:
+            # closing the descriptor releases the lock
+            os.close(self.__fd)
+            self.__fd = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+
+def check_expected_version(file_path, current_version, expected_version):
+    """
+    Compare-and-swap guard, fail if the current version of a file is not the one the caller based its change on
+    :param file_path: full path to file as string, used in the error message
+    :param current_version: version read from the file as string
+    :param expected_version: version string, or None to skip the check
+    """
+    if expected_version is not None and str(current_version).strip() != expected_version.strip():
+        raise ValueError("Version of {} is {}, expected {}".format(file_path, str(current_version).strip(),
+                                                                   expected_version.strip()))
+
+
 def write_version_to_file(file_path, file_content, version, app_version):
     """
     Write the 'version' or 'appVersion' to a given file
@@ -85,73 +396,705 @@ def write_version_to_file(file_path, file_content, version, app_version):
     :param app_version: boolean, if True then set the appVersion key
     """
     # Append the 'new_version' to relevant file
-    with open(file_path, 'w') as outfile:
-        filename, file_extension = os.path.splitext(file_path)
-        if file_extension in ('.py', '.toml'):
-            outfile.write(set_version_in_file(version, file_content))
-        elif file_extension == '.yaml' or file_extension == '.yml':
-            if app_version:
-                file_content['appVersion'] = version
-            else:
-                file_content['version'] = version
-            yaml = YAML()
-            yaml.dump(file_content, outfile)
-        elif os.path.basename(filename) == 'VERSION':
-            outfile.write(version)
-        outfile.close()
+    dump_content_to_file(file_path, set_version_in_content(file_path, file_content, version, app_version))
 
 
-def read_version_from_file(file_path, app_version):
+def read_version_from_stream(file_path, stream, app_version, read_only=False, locators=None):
     """
-    Read the 'version' or 'appVersion' from a given file,
+    Read the 'version' or 'appVersion' from a stream of file content,
+    the file type is detected from 'file_path', so content that is not on disk (like a git blob) can be read,
     note for return values for file_type are:
         python for .py/.toml file
         helm_chart for .yaml/.yml files
         plain_version for VERSION files
+        locator for files matched by user defined locators
     :param file_path: full path to file as string
+    :param stream: text stream of the file content
     :param app_version: boolean, if True return appVersion from Helm chart
+    :param read_only: boolean, if True the content is not written back, so Helm charts are loaded as plain dicts
+        with a fast loader, see load_yaml
+    :param locators: optional PybumpLocators, a matching locator takes precedence over the file type
     :return: dict containing file content, version and type as:
      {'file_content': file_content, 'version': current_version, 'file_type': file_type}
     """
+    filename, file_extension = os.path.splitext(file_path)
+    scanner = locators.get_scanner(file_path) if locators else None
+
+    if scanner is not None:  # Case user defined locators, like a Dockerfile LABEL or setup.cfg
+        file_content = PybumpLocatedText(read_bounded(file_path, stream), scanner)
+        current_version = scanner.get_version(file_path, file_content.text)
+        file_type = 'locator'
+    elif file_extension in ('.py', '.toml'):  # Case setup.py / pyproject.toml files
+        file_content = read_bounded(file_path, stream)
+        current_version = get_version_from_file(file_content)
+        file_type = 'python'
+    elif file_extension == '.yaml' or file_extension == '.yml':  # Case Helm chart files
+        file_content = load_yaml(read_bounded(file_path, stream), read_only)
+        # Make sure Helm chart is valid and contains minimal mandatory keys
+        if is_valid_helm_chart(file_content):
+            file_type = 'helm_chart'
+            if app_version:
+                current_version = file_content.get('appVersion', None)
+
+                # user passed the 'app-version' flag, but helm chart file does not contain the 'appVersion' field
+                if not current_version:
+                    raise ValueError(
+                        "Could not find 'appVersion' field in helm chart.yaml file: {}".format(
+                            shorten_content(file_content))
+                    )
+            else:
+                current_version = file_content['version']
+        else:
+            raise ValueError("Input file is not a valid Helm chart.yaml: {0}".format(shorten_content(file_content)))
+    else:  # Case file name is just 'VERSION'
+        if os.path.basename(filename) == 'VERSION':
+            # A version file should ONLY contain a valid semantic version string, only its first line is read
+            file_content = None
+            current_version = stream.readline(MAX_VERSION_LINE_LENGTH).rstrip('\r\n')
+            file_type = 'plain_version'
+        else:
+            raise ValueError("File name or extension not known to this app: {}{}"
+                             .format(os.path.basename(filename), file_extension))
+
+    return {'file_content': file_content, 'version': current_version, 'file_type': file_type}
+
+
+def walk_directories(root_dir):
+    """
+    Yield 'root_dir' and all its sub directories, hidden directories (like .git) are skipped,
+    sub directories are visited in sorted order
+    :param root_dir: string
+    :return: generator of (directory path, file names) tuples
+    """
+    for dir_path, dir_names, file_names in os.walk(root_dir):
+        dir_names[:] = sorted(d for d in dir_names if not d.startswith('.'))
+        yield dir_path, file_names
+
+
+def read_version_from_file(file_path, app_version, read_only=False, locators=None):
+    """
+    Read the 'version' or 'appVersion' from a given file, see read_version_from_stream for return values
+    :param file_path: full path to file as string
+    :param app_version: boolean, if True return appVersion from Helm chart
+    :param read_only: boolean, if True the content is not written back (like 'get'), see read_version_from_stream
+    :param locators: optional PybumpLocators of user defined version locations
+    :return: dict containing file content, version and type
+    """
     with open(file_path, 'r') as stream:
-        filename, file_extension = os.path.splitext(file_path)
+        return read_version_from_stream(file_path, stream, app_version, read_only, locators)
+
+
+def get_report(args):  # pragma: no cover
+    """
+    Create the report that writes and prints changed files of the set/bump sub commands
+    :param args: parsed arguments as dict
+    :return: PybumpReport object
+    """
+    try:
+        from .pybump_report import PybumpReport
+    except ImportError:
+        from pybump_report import PybumpReport
+    return PybumpReport(output=args['output'], dry_run=args['dry_run'], quiet=args.get('quiet', False))
+
+
+def run_workspace(args):  # pragma: no cover
+    """
+    Execute the get/set/bump/check sub commands against all groups of a workspace manifest
+    :param args: parsed arguments as dict
+    """
+    try:
+        from .pybump_workspace import PybumpWorkspace
+    except ImportError:
+        from pybump_workspace import PybumpWorkspace
+
+    if args.get('from_tags'):
+        print("--from-tags flag is not supported with --workspace", file=stderr)
+        exit(1)
+
+    try:
+        workspace = PybumpWorkspace(args['workspace'], args.get('lock_timeout', LOCK_TIMEOUT))
+        if args['sub_command'] == 'bump':
+            report = get_report(args)
+            versions = workspace.bump(args['level'], report)
+            report.close()
+        elif args['sub_command'] == 'set':
+            if args['auto']:
+                try:
+                    from .pybump_git import PybumpShaResolver
+                except ImportError:
+                    from pybump_git import PybumpShaResolver
+                report = get_report(args)
+                versions = workspace.set_auto(PybumpShaResolver().get_head_sha, args.get('metadata'), report)
+                report.close()
+            else:
+                new_version = PybumpVersion(args['set_version'])
+                if not new_version.is_valid_semantic_version():
+                    new_version.print_invalid_version()
+                    exit(1)
+                report = get_report(args)
+                versions = workspace.set_version(new_version, report)
+                report.close()
+        else:  # get / check
+            versions = workspace.check()
+    except (OSError, ValueError, RuntimeError) as exc:
+        print(exc, file=stderr)
+        exit(1)
+
+    if not args.get('quiet') and args.get('output', 'text') == 'text':
+        for group_name, version in versions.items():
+            print('{} {}'.format(group_name, version))
+
+
+def run_charts(args):  # pragma: no cover
+    """
+    Execute the get/set/bump sub commands against all subcharts of a Helm charts directory
+    :param args: parsed arguments as dict
+    """
+    try:
+        from .pybump_helm import PybumpChartTree
+    except ImportError:
+        from pybump_helm import PybumpChartTree
+
+    if args['app_version']:
+        print("--app-version flag is not supported with --charts", file=stderr)
+        exit(1)
+    if args.get('from_tags'):
+        print("--from-tags flag is not supported with --charts", file=stderr)
+        exit(1)
+
+    try:
+        chart_tree = PybumpChartTree(args['charts'], read_only=args['sub_command'] == 'get',
+                                     lock_timeout=args.get('lock_timeout', LOCK_TIMEOUT))
+        if args['sub_command'] == 'get':
+            for path, version in chart_tree.get_versions().items():
+                print('{} {}'.format(path, version))
+            return
+        if args['sub_command'] == 'bump':
+            report = get_report(args)
+            versions, updates = chart_tree.bump_subcharts(args['level'], report)
+            report.close()
+        else:  # set
+            if args['auto']:
+                print("--auto flag is not supported with --charts", file=stderr)
+                exit(1)
+            new_version = PybumpVersion(args['set_version'])
+            if not new_version.is_valid_semantic_version():
+                new_version.print_invalid_version()
+                exit(1)
+            report = get_report(args)
+            versions, updates = chart_tree.set_subcharts_version(new_version, report)
+            report.close()
+    except (OSError, ValueError, RuntimeError) as exc:
+        print(exc, file=stderr)
+        exit(1)
+
+    if not args['quiet'] and args['output'] == 'text':
+        for path, version in versions.items():
+            print('{} {}'.format(path, version))
+        for path, dependency_name, old_version, new_version in updates:
+            print('{} dependency {}: {} -> {}'.format(path, dependency_name, old_version, new_version))
+
+
+def run_changed(args):  # pragma: no cover
+    """
+    Execute the bump sub command against version files owning paths changed since a git ref
+    :param args: parsed arguments as dict
+    """
+    try:
+        from .pybump_changed import PybumpChangedArtifacts
+    except ImportError:
+        from pybump_changed import PybumpChangedArtifacts
+
+    if args['from_tags']:
+        print("--from-tags flag is not supported with --changed-since", file=stderr)
+        exit(1)
+
+    try:
+        changed_artifacts = PybumpChangedArtifacts(args['path'], args['lock_timeout'])
+        report = get_report(args)
+        versions = changed_artifacts.bump(args['changed_since'], args['level'], args['tag_prefix'],
+                                          args['app_version'], report)
+        report.close()
+    except (OSError, ValueError, RuntimeError) as exc:
+        print(exc, file=stderr)
+        exit(1)
+
+    if not args['quiet'] and args['output'] == 'text':
+        for path, version in versions.items():
+            print('{} {}'.format(path, version))
+
+
+def run_repos(args):  # pragma: no cover
+    """
+    Execute the repos sub command, run get/verify/scan across many repositories and print a single report
+    :param args: parsed arguments as dict
+    """
+    try:
+        from .pybump_fanout import PybumpFanout, read_repository_roots
+    except ImportError:
+        from pybump_fanout import PybumpFanout, read_repository_roots
+
+    try:
+        if args['roots'] == '-':
+            roots = read_repository_roots(stdin)
+        else:
+            with open(args['roots'], 'r') as stream:
+                roots = read_repository_roots(stream)
+        records = PybumpFanout(args['workers']).run(roots, args['action'])
+    except (OSError, ValueError, RuntimeError) as exc:
+        print(exc, file=stderr)
+        exit(1)
+
+    if args['output'] == 'json':
+        print(json.dumps(records, indent=2))
+    else:
+        for record in records:
+            print('{repository} {path} {status} {message}'.format(**record))
+    if any(record['status'] in ('invalid', 'drift', 'error') for record in records):
+        exit(1)
+
 
-        if file_extension in ('.py', '.toml'):  # Case setup.py / pyproject.toml files
-            file_content = stream.read()
-            current_version = get_version_from_file(file_content)
-            file_type = 'python'
-        elif file_extension == '.yaml' or file_extension == '.yml':  # Case Helm chart files
+def run_audit(args):  # pragma: no cover
+    """
+    Execute the audit sub command, check the packages of many lockfiles for patch updates
+    :param args: parsed arguments as dict
+    """
+    try:
+        from .pybump_patch import check_locked_patches
+    except ImportError:
+        from pybump_patch import check_locked_patches
+
+    try:
+        packages = check_locked_patches(args['lockfiles'], max_workers=args['workers'])
+    except (OSError, ValueError, RuntimeError) as exc:
+        print(exc, file=stderr)
+        exit(1)
+
+    if not args['all']:
+        packages = [package for package in packages if package['patchable'] or 'error' in package]
+    if args['output'] == 'json':
+        print(json.dumps(packages, indent=2))
+    else:
+        for package in packages:
+            if 'error' in package:
+                status = 'error {}'.format(package['error'])
+            elif package['patchable']:
+                status = '-> {}'.format(package['latest_patch'])
+            else:
+                status = 'ok'
+            print('{} {} {} ({})'.format(package['package_name'], package['version'], status,
+                                         ', '.join(package['files'])))
+    if any('error' in package for package in packages):
+        exit(1)
+
+
+def run_index(args):  # pragma: no cover
+    """
+    Execute the index sub command, query a Helm repository index.yaml, or add a chart version to it
+    :param args: parsed arguments as dict
+    """
+    try:
+        from .pybump_index import PybumpHelmIndex, build_index_entry
+    except ImportError:
+        from pybump_index import PybumpHelmIndex, build_index_entry
+
+    if args['action'] in ('get', 'latest') and not args['chart']:
+        print("--chart is required for index {}".format(args['action']), file=stderr)
+        exit(1)
+    if args['action'] == 'add' and not (args['chart_file'] and args['url']):
+        print("--chart-file and --url are required for index add", file=stderr)
+        exit(1)
+
+    try:
+        helm_index = PybumpHelmIndex(args['index'], sidecar=args['sidecar'], lock_timeout=args['lock_timeout'])
+        if args['action'] == 'add':
+            entry = build_index_entry(args['chart_file'], args['url'], args['digest'])
+            helm_index.add_entry(entry)
+            print('{} {}'.format(entry['name'], entry['version']))
+            return
+        if args['action'] == 'list':
+            for value in helm_index.get_versions(args['chart']) if args['chart'] else helm_index.get_charts():
+                print(value)
+            return
+        version = args['version'] if args['action'] == 'get' else None
+        if version is None:
+            version = helm_index.get_latest(args['chart'], args['line'])
+            if version is None:
+                print("No valid semantic version of chart '{}' found".format(args['chart']), file=stderr)
+                exit(1)
+        if args['action'] == 'latest':
+            print(version)
+        else:
+            print(json.dumps(helm_index.get_entry(args['chart'], version), indent=2))
+    except (OSError, ValueError, RuntimeError) as exc:
+        print(exc, file=stderr)
+        exit(1)
+
+
+def run_image(args):  # pragma: no cover
+    """
+    Execute the image sub command, set the tag of an image across YAML files
+    :param args: parsed arguments as dict
+    """
+    try:
+        from .pybump_image import PybumpImageUpdater
+    except ImportError:
+        from pybump_image import PybumpImageUpdater
+
+    try:
+        updater = PybumpImageUpdater(args['name'], args['set_version'], args['lock_timeout'])
+        report = get_report(args)
+        changes = updater.update_files(args['paths'], report, args['app_version'])
+        report.close()
+    except (OSError, ValueError, RuntimeError) as exc:
+        print(exc, file=stderr)
+        exit(1)
+
+    if not args['quiet'] and args['output'] == 'text':
+        for path, line, old_tag, new_tag in changes:
+            if line is None:
+                print('{} appVersion: {} -> {}'.format(path, old_tag, new_tag))
+            else:
+                print('{}:{} {} -> {}'.format(path, line, old_tag, new_tag))
+
+
+def run_plan(args):  # pragma: no cover
+    """
+    Execute the plan sub command, print (or apply) the release train of changed Helm charts
+    :param args: parsed arguments as dict
+    """
+    try:
+        from .pybump_helm import PybumpChartTree
+    except ImportError:
+        from pybump_helm import PybumpChartTree
+
+    try:
+        chart_tree = PybumpChartTree(args['charts'], lock_timeout=args['lock_timeout'])
+        plan = chart_tree.plan(args['changed'], args['level'], args['dependent_level'])
+        report = get_report(args)
+        if args['apply']:
+            chart_tree.apply_plan(plan, report)
+        elif args['output'] != 'text':
+            for path, name, old_version, new_version in plan:
+                report.emit({'path': path, 'name': name, 'old_version': old_version, 'new_version': new_version})
+        report.close()
+    except (OSError, ValueError, RuntimeError) as exc:
+        print(exc, file=stderr)
+        exit(1)
+
+    if not args['quiet'] and args['output'] == 'text':
+        for path, name, old_version, new_version in plan:
+            print('{} {}: {} -> {}'.format(path, name, old_version, new_version))
+
+
+def run_sort(args):  # pragma: no cover
+    """
+    Execute the sort/max/min sub commands against versions read from stdin or git tags
+    :param args: parsed arguments as dict
+    """
+    try:
+        if args['git_tags']:
             try:
-                yaml = YAML()
-                file_content = yaml.load(stream)
-            except YAMLError as exc:
-                print(exc)
-            # Make sure Helm chart is valid and contains minimal mandatory keys
-            if is_valid_helm_chart(file_content):
-                file_type = 'helm_chart'
-                if app_version:
-                    current_version = file_content.get('appVersion', None)
-
-                    # user passed the 'app-version' flag, but helm chart file does not contain the 'appVersion' field
-                    if not current_version:
-                        raise ValueError(
-                            "Could not find 'appVersion' field in helm chart.yaml file: {}".format(file_content)
-                        )
+                from .pybump_git import list_git_tags
+            except ImportError:
+                from pybump_git import list_git_tags
+            versions = list_git_tags(args['git_tags'])
+        else:
+            versions = (line.strip() for line in stdin if line.strip())
+
+        if args['sub_command'] == 'sort':
+            result = sort_versions(versions, args['reverse'], args['ignore_invalid'], args['line'])
+        elif args['sub_command'] == 'max':
+            result = [max_version(versions, args['ignore_invalid'], args['line'])]
+        else:
+            result = [min_version(versions, args['ignore_invalid'], args['line'])]
+    except (ValueError, RuntimeError) as exc:
+        print(exc, file=stderr)
+        exit(1)
+
+    if result == [None]:
+        print("No valid semantic versions found", file=stderr)
+        exit(1)
+    print('\n'.join(result))
+
+
+def run_watch(args):  # pragma: no cover
+    """
+    Execute the watch sub command, validate version files whenever they change until interrupted
+    :param args: parsed arguments as dict
+    """
+    try:
+        from .pybump_watch import PybumpWatch, create_watcher, find_version_files, wait_for_changes
+        from .pybump_workspace import PybumpWorkspace
+        from .pybump_git import PybumpTagIndex
+    except ImportError:
+        from pybump_watch import PybumpWatch, create_watcher, find_version_files, wait_for_changes
+        from pybump_workspace import PybumpWorkspace
+        from pybump_git import PybumpTagIndex
+
+    try:
+        workspace = PybumpWorkspace(args['workspace']) if args['workspace'] else None
+        tag_version = None
+        if args['from_tags']:
+            _, tag_version = PybumpTagIndex(args['paths'][0]).get_max_version(args['tag_prefix'])
+        pybump_watch = PybumpWatch(workspace, str(tag_version) if tag_version else None)
+        watcher = create_watcher(args['paths'], args['polling'])
+        changes = find_version_files(args['paths'])
+    except (OSError, ValueError, RuntimeError) as exc:
+        print(exc, file=stderr)
+        exit(1)
+
+    try:
+        while True:
+            for status, path, message in pybump_watch.check_files(changes):
+                print('{} {}: {}'.format(status, path, message), flush=True)
+            changes = wait_for_changes(watcher, args['interval'], args['debounce'])
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+
+
+def run_check_staged(args):  # pragma: no cover
+    """
+    Execute the check-staged sub command (a pre-commit hook), exit with 1 if any staged version file fails
+    :param args: parsed arguments as dict
+    """
+    try:
+        from .pybump_staged import check_staged
+    except ImportError:
+        from pybump_staged import check_staged
+
+    try:
+        result = check_staged('.', args['workspace'])
+    except (OSError, ValueError, RuntimeError) as exc:
+        print(exc, file=stderr)
+        exit(1)
+
+    failures = [(status, path, message) for status, path, message in result if status != 'ok']
+    for status, path, message in failures:
+        print('{} {}: {}'.format(status, path, message), file=stderr)
+    if failures:
+        exit(1)
+
+
+def get_version_from_tags(file_path, tag_prefix, version_prefix):  # pragma: no cover
+    """
+    Return the highest semantic version tag of the git repository that contains 'file_path',
+    :param file_path: path to version file as string
+    :param tag_prefix: string, only tags starting with it are considered
+    :param version_prefix: boolean, if True the returned version has the 'v' prefix (keeps the file convention)
+    :return: PybumpVersion object
+    """
+    try:
+        from .pybump_git import PybumpTagIndex
+    except ImportError:
+        from pybump_git import PybumpTagIndex
+
+    try:
+        # the directory of a bare file name is '', which would be reported as the repository path
+        tag, tag_version = PybumpTagIndex(os.path.dirname(os.path.abspath(file_path))).get_max_version(tag_prefix)
+    except RuntimeError as exc:
+        print(exc, file=stderr)
+        exit(1)
+    if tag_version is None:
+        print("No semantic version tags found (tag prefix: '{}')".format(tag_prefix), file=stderr)
+        exit(1)
+    return PybumpVersion(('v' if version_prefix else '') + str(tag_version).lstrip('v'))
+
+
+def get_auto_bump_level(path, tag_prefix):  # pragma: no cover
+    """
+    Pick the bump level from Conventional Commits since the highest semantic version tag
+    :param path: path of a file or directory inside a git repository as string
+    :param tag_prefix: string, only tags starting with it are considered
+    :return: major|minor|patch
+    """
+    try:
+        from .pybump_git import PybumpTagIndex, get_bump_level
+    except ImportError:
+        from pybump_git import PybumpTagIndex, get_bump_level
+
+    try:
+        tag_index = PybumpTagIndex(path)
+        last_tag, _ = tag_index.get_max_version(tag_prefix)
+        return get_bump_level(tag_index.work_dir, last_tag)
+    except RuntimeError as exc:
+        print(exc, file=stderr)
+        exit(1)
+
+
+def run_file(args):  # pragma: no cover
+    """
+    Execute the get/set/bump sub commands against a single file,
+    set/bump hold the lock of the file from reading the current version until the new version is written
+    :param args: parsed arguments as dict
+    """
+    if args['sub_command'] == 'get':
+        if args.get('ref'):
+            run_file_refs(args)
+        else:
+            run_file_command(args)
+        return
+
+    file_lock = PybumpFileLock(args['file'], args['lock_timeout'], shared=args['dry_run'])
+    try:
+        file_lock.acquire()
+    except (OSError, RuntimeError) as exc:
+        print(exc, file=stderr)
+        exit(1)
+    try:
+        run_file_command(args)
+    finally:
+        file_lock.release()
+
+
+def get_version_output(version_object, args):  # pragma: no cover
+    """
+    :param version_object: PybumpVersion object
+    :param args: parsed arguments of the get sub command as dict
+    :return: the version, or the part of it requested by --sem-ver/--release/--metadata, as string
+    """
+    if args['sem_ver']:
+        # Join the array of current_version_dict by dots
+        return '.'.join(str(x) for x in version_object.version)
+    elif args['release']:
+        return str(version_object.release)
+    elif args['metadata']:
+        return str(version_object.metadata)
+    return version_object.__str__()
+
+
+def run_file_refs(args):  # pragma: no cover
+    """
+    Execute the get sub command against the content of a file at git revisions, without checkouts,
+    a single revision prints the version only, several revisions print a '<ref> <version>' line each
+    :param args: parsed arguments as dict
+    """
+    try:
+        from .pybump_git import get_ref_versions
+    except ImportError:
+        from pybump_git import get_ref_versions
+
+    try:
+        locators = load_locators(args['locators']) if args.get('locators') else None
+        versions = get_ref_versions([args['file']], args['ref'], args['app_version'], locators)
+    except (OSError, ValueError, RuntimeError) as exc:
+        print(exc, file=stderr)
+        exit(1)
+
+    for ref in args['ref']:
+        version_object = PybumpVersion(versions[(args['file'], ref)])
+        if not version_object.is_valid_semantic_version():
+            version_object.print_invalid_version()
+            exit(1)
+        output = get_version_output(version_object, args)
+        print(output if len(args['ref']) == 1 else '{} {}'.format(ref, output))
+
+
+def run_file_command(args):  # pragma: no cover
+    """
+    Read, update and write a single file, see run_file
+    :param args: parsed arguments as dict
+    """
+    # Read current version from the given file
+    start = time.perf_counter()
+    try:
+        locators = load_locators(args['locators']) if args.get('locators') else None
+        file_data = read_version_from_file(args['file'], args['app_version'], read_only=args['sub_command'] == 'get',
+                                           locators=locators)
+    except (OSError, ValueError, RuntimeError) as exc:
+        print(exc, file=stderr)
+        exit(1)
+    read_elapsed = time.perf_counter() - start
+    file_content = file_data.get('file_content')
+    version_object = PybumpVersion(file_data.get('version'))
+
+    if not version_object.is_valid_semantic_version():
+        version_object.print_invalid_version()
+        exit(1)
+
+    if args['sub_command'] != 'get':
+        try:
+            check_expected_version(args['file'], version_object, args['expect_version'])
+        except ValueError as exc:
+            print(exc, file=stderr)
+            exit(1)
+
+    if args['sub_command'] == 'get':
+        print(get_version_output(version_object, args))
+    else:
+        # Set new_version to be invalid first
+        new_version = None
+
+        # Set the 'new_version' value
+        if args['sub_command'] == 'set':
+            # Case set-version argument passed, just set the new version with its value
+            if args['set_version']:
+                new_version = PybumpVersion(args['set_version'])
+            # Case the 'auto' flag was set, set release or metadata with git commit SHA
+            elif args['auto']:
+                try:
+                    from .pybump_git import PybumpShaResolver
+                except ImportError:
+                    from pybump_git import PybumpShaResolver
+                try:
+                    commit_sha = PybumpShaResolver().get_head_sha(args['file'])
+                except RuntimeError as exc:
+                    print(exc, file=stderr)
+                    exit(1)
+                # set metadata (+sha) if --metadata flag is set, otherwise set release (-sha)
+                if args.get('metadata'):
+                    version_object.metadata = commit_sha
                 else:
-                    current_version = file_content['version']
-            else:
-                raise ValueError("Input file is not a valid Helm chart.yaml: {0}".format(file_content))
-        else:  # Case file name is just 'VERSION'
-            if os.path.basename(filename) == 'VERSION':
-                # A version file should ONLY contain a valid semantic version string
-                file_content = None
-                current_version = stream.read()
-                file_type = 'plain_version'
+                    version_object.release = commit_sha
+                new_version = version_object
+            # Should never reach this point due to argparse mutual exclusion, but set safety if statement anyway
             else:
-                raise ValueError("File name or extension not known to this app: {}{}"
-                                 .format(os.path.basename(filename), file_extension))
+                print("set-version or auto flags are mandatory", file=stderr)
+                exit(1)
+        else:  # bump version ['sub_command'] == 'bump'
+            if args['from_tags']:
+                version_object = get_version_from_tags(args['file'], args['tag_prefix'], version_object.prefix)
+            # Only bump value of the 'version' key
+            version_object.bump_version(args['level'])
+            new_version = version_object
+        # new_version should never be None at this point, but check this anyway
+        if not new_version or not new_version.is_valid_semantic_version():
+            new_version.print_invalid_version()
+            exit(1)
+        # Write the new version with relevant content back to the file
+        report = get_report(args)
+        report.write(args['file'], file_data.get('file_type'),
+                     set_version_in_content(args['file'], file_content, new_version.__str__(), args['app_version']),
+                     str(file_data.get('version')).strip(), new_version, read_elapsed)
+        report.close()
+
+        if args['quiet'] is False and args['output'] == 'text':
+            print(new_version)
 
-    return {'file_content': file_content, 'version': current_version, 'file_type': file_type}
+
+def add_target_arguments(target_group):  # pragma: no cover
+    """
+    Add the mutually exclusive targets of the get/set/bump sub commands
+    :param target_group: argparse mutually exclusive group
+    """
+    target_group.add_argument('--file', help='Path to Chart.yaml/pyproject.toml/setup.py/VERSION file')
+    target_group.add_argument('--workspace', nargs='?', const='.pybump.toml',
+                              help='Path to a workspace manifest of linked version files (default: .pybump.toml)')
+    target_group.add_argument('--charts',
+                              help='Path to a directory of Helm charts, subcharts found under charts/ directories '
+                                   'are updated, and their versions propagated to parent charts dependencies')
+
+
+def add_locators_argument(parser):  # pragma: no cover
+    """
+    Add the option of user defined version locators, used with --file (a workspace uses the locators of its manifest)
+    :param parser: argparse parser
+    """
+    parser.add_argument('--locators', nargs='?', const=LOCATORS_CONFIG,
+                        help='With --file, config file of user defined version locators '
+                             '(default: {})'.format(LOCATORS_CONFIG))
 
 
 def main():  # pragma: no cover
@@ -166,18 +1109,55 @@ def main():  # pragma: no cover
 
     # Define parses that are shared, and will be used as 'parent' parser to all others
     base_sub_parser = argparse.ArgumentParser(add_help=False)
-    base_sub_parser.add_argument('--file',
-                                 help='Path to Chart.yaml/pyproject.toml/setup.py/VERSION file', required=True)
+    add_target_arguments(base_sub_parser.add_mutually_exclusive_group(required=True))
     base_sub_parser.add_argument('--app-version', action='store_true',
                                  help='Bump Helm chart appVersion, relevant only for Chart.yaml files', required=False)
+    add_locators_argument(base_sub_parser)
+
+    # Define parser shared by commands that write files
+    write_sub_parser = argparse.ArgumentParser(add_help=False)
+    write_sub_parser.add_argument('--dry-run', action='store_true',
+                                  help='Compute all changes without writing files, print a diff with text output',
+                                  required=False)
+    write_sub_parser.add_argument('--output', choices=['text', 'json', 'ndjson'], default='text',
+                                  help='text|json|ndjson, json formats stream a record per changed file',
+                                  required=False)
+    write_sub_parser.add_argument('--lock-timeout', type=float, default=LOCK_TIMEOUT,
+                                  help='Seconds to wait for the lock of a file held by another pybump writer '
+                                       '(default: {})'.format(LOCK_TIMEOUT))
+
+    # Define parser shared by commands that update a single file in place (read-modify-write)
+    lock_sub_parser = argparse.ArgumentParser(add_help=False)
+    lock_sub_parser.add_argument('--expect-version',
+                                 help='With --file, fail unless the current version equals this version '
+                                      '(compare-and-swap)')
 
     # Sub-parser for bump version command
-    parser_bump = subparsers.add_parser('bump', parents=[base_sub_parser])
-    parser_bump.add_argument('--level', choices=['major', 'minor', 'patch'], help='major|minor|patch', required=True)
+    parser_bump = subparsers.add_parser('bump', parents=[write_sub_parser, lock_sub_parser])
+    bump_target_group = parser_bump.add_mutually_exclusive_group(required=True)
+    add_target_arguments(bump_target_group)
+    bump_target_group.add_argument('--changed-since', metavar='REF',
+                                   help='Bump only version files owning paths changed between REF (or "last-tag", '
+                                        'the highest semantic version tag) and HEAD')
+    parser_bump.add_argument('--path', default='.',
+                             help='With --changed-since, directory of version files to consider (default: .)')
+    parser_bump.add_argument('--app-version', action='store_true',
+                             help='Bump Helm chart appVersion, relevant only for Chart.yaml files', required=False)
+    add_locators_argument(parser_bump)
+    parser_bump.add_argument('--level', choices=['major', 'minor', 'patch', 'auto'],
+                             help='major|minor|patch|auto, auto picks the level from Conventional Commits '
+                                  'since the last release tag', required=True)
     parser_bump.add_argument('--quiet', action='store_true', help='Do not print new version', required=False)
+    parser_bump.add_argument('--from-tags', action='store_true',
+                             help='Bump the highest semantic version git tag instead of the file version',
+                             required=False)
+    parser_bump.add_argument('--tag-prefix', default='',
+                             help='With --from-tags or --changed-since last-tag, consider only tags starting with '
+                                  'this prefix (like chart-)',
+                             required=False)
 
     # Sub-parser for set version command
-    parser_set = subparsers.add_parser('set', parents=[base_sub_parser])
+    parser_set = subparsers.add_parser('set', parents=[base_sub_parser, write_sub_parser, lock_sub_parser])
 
     # Set mutual exclusion https://docs.python.org/3/library/argparse.html#mutual-exclusion,
     # To make sure that at least one of the mutually exclusive arguments is required
@@ -196,6 +1176,119 @@ def main():  # pragma: no cover
     parser_get.add_argument('--sem-ver', action='store_true', help='Get the main version only', required=False)
     parser_get.add_argument('--release', action='store_true', help='Get the version release only', required=False)
     parser_get.add_argument('--metadata', action='store_true', help='Get the version metadata only', required=False)
+    parser_get.add_argument('--ref', action='append',
+                            help='With --file, read the file at a git revision (branch, tag or commit) without '
+                                 'a checkout, may be repeated')
+
+    # Sub-parser for workspace consistency check command
+    parser_check = subparsers.add_parser('check')
+    parser_check.add_argument('--workspace', default='.pybump.toml',
+                              help='Path to a workspace manifest of linked version files (default: .pybump.toml)')
+
+    # Sub-parser for release train planning of Helm charts that depend on each other
+    parser_plan = subparsers.add_parser('plan', parents=[write_sub_parser])
+    parser_plan.add_argument('--charts', default='.', help='Path to a directory of Helm charts (default: .)')
+    parser_plan.add_argument('--changed', nargs='+', required=True,
+                             help='Names, directories or Chart.yaml paths of charts that changed')
+    parser_plan.add_argument('--level', choices=['major', 'minor', 'patch'], default='patch',
+                             help='Bump level of changed charts (default: patch)')
+    parser_plan.add_argument('--dependent-level', choices=['major', 'minor', 'patch'], default='patch',
+                             help='Bump level of charts that depend on changed charts (default: patch)')
+    parser_plan.add_argument('--apply', action='store_true', help='Bump all planned charts and their dependencies')
+    parser_plan.add_argument('--quiet', action='store_true', help='Do not print the plan', required=False)
+
+    # Sub-parser for pre-commit hook command, validates staged content of version files
+    parser_check_staged = subparsers.add_parser('check-staged')
+    parser_check_staged.add_argument('--workspace', default='.pybump.toml',
+                                     help='Path to a workspace manifest, relative to the repository root '
+                                          '(default: .pybump.toml)')
+
+    # Sub-parser for watch command, validates version files whenever they change
+    parser_watch = subparsers.add_parser('watch')
+    parser_watch.add_argument('paths', nargs='+', help='Version files or directories to watch')
+    parser_watch.add_argument('--workspace', nargs='?', const='.pybump.toml',
+                              help='Report drift from the other files of workspace groups, '
+                                   'path to a workspace manifest (default: .pybump.toml)')
+    parser_watch.add_argument('--from-tags', action='store_true',
+                              help='Report files with a lower version than the highest semantic version git tag')
+    parser_watch.add_argument('--tag-prefix', default='',
+                              help='Only consider git tags starting with this prefix, like "chart-"')
+    parser_watch.add_argument('--interval', type=float, default=0.5,
+                              help='Seconds between checks for changes (default: 0.5)')
+    parser_watch.add_argument('--debounce', type=float, default=0.2,
+                              help='Seconds with no changes before changed files are read (default: 0.2)')
+    parser_watch.add_argument('--polling', action='store_true',
+                              help='Detect changes by polling file stats instead of inotify')
+
+    # Sub-parser for repos command, runs get/verify/scan across many repositories in a single process
+    parser_repos = subparsers.add_parser('repos')
+    parser_repos.add_argument('action', choices=['get', 'verify', 'scan'],
+                              help='get versions, verify versions (and workspace groups), '
+                                   'or scan python requirements for patch updates')
+    parser_repos.add_argument('--roots', default='-',
+                              help='File with a repository root per line, "-" reads stdin (default: -)')
+    parser_repos.add_argument('--workers', type=int, default=8,
+                              help='Maximum repositories handled at once (default: 8)')
+    parser_repos.add_argument('--output', choices=['text', 'json'], default='text',
+                              help='text|json, a single report of all repositories (default: text)')
+
+    # Sub-parser for audit command, checks the packages of lockfiles for patch updates
+    parser_audit = subparsers.add_parser('audit')
+    parser_audit.add_argument('lockfiles', nargs='+',
+                              help='poetry.lock, uv.lock, pdm.lock, or pinned requirements files '
+                                   '(like pip-compile output)')
+    parser_audit.add_argument('--workers', type=int, default=8,
+                              help='Maximum releases fetched from PYPI at once (default: 8)')
+    parser_audit.add_argument('--output', choices=['text', 'json'], default='text',
+                              help='text|json (default: text)')
+    parser_audit.add_argument('--all', action='store_true',
+                              help='Also print packages without a patch update')
+
+    # Sub-parser for image command, sets an image tag across Kubernetes manifests, values.yaml and kustomization.yaml
+    parser_image = subparsers.add_parser('image', parents=[write_sub_parser])
+    parser_image.add_argument('paths', nargs='+', help='YAML files or directories to scan')
+    parser_image.add_argument('--name', required=True,
+                              help='Image name without tag, like registry.example.com/team/app')
+    parser_image.add_argument('--set-version', required=True, help='New image tag')
+    parser_image.add_argument('--app-version', action='store_true',
+                              help='Also set appVersion of the Chart.yaml next to every changed values.yaml')
+    parser_image.add_argument('--quiet', action='store_true', help='Do not print changes', required=False)
+
+    # Sub-parser for index command, queries a Helm repository index.yaml without loading it
+    parser_index = subparsers.add_parser('index')
+    parser_index.add_argument('action', choices=['get', 'latest', 'list', 'add'],
+                              help='get the entry of a chart version (default: latest), latest version of a chart, '
+                                   'list chart names (versions with --chart), or add a chart version')
+    parser_index.add_argument('--index', default='index.yaml',
+                              help='Path to a Helm repository index.yaml (default: index.yaml)')
+    parser_index.add_argument('--chart', help='Chart name')
+    parser_index.add_argument('--version', help='With get, chart version of the entry (default: latest)')
+    parser_index.add_argument('--line', help='With get/latest, keep only versions of a major (X) or minor (X.Y) line')
+    parser_index.add_argument('--sidecar', action='store_true',
+                              help='Read versions from a compact sidecar index (index.yaml.pybump.json), '
+                                   'built once and rebuilt when index.yaml changes')
+    parser_index.add_argument('--chart-file', help='With add, path to the Chart.yaml of the added version')
+    parser_index.add_argument('--url', action='append', help='With add, URL of the chart package (repeatable)')
+    parser_index.add_argument('--digest', help='With add, sha256 digest of the chart package')
+    parser_index.add_argument('--lock-timeout', type=float, default=LOCK_TIMEOUT,
+                              help='With add, seconds to wait for the lock of the index (index.yaml.lock) held by '
+                                   'another pybump writer (default: {})'.format(LOCK_TIMEOUT))
+
+    # Define parser shared by commands that handle a list of versions
+    versions_sub_parser = argparse.ArgumentParser(add_help=False)
+    versions_sub_parser.add_argument('--git-tags', nargs='?', const='.',
+                                     help='Read versions from tags of a git repository (default: current directory), '
+                                          'instead of stdin')
+    versions_sub_parser.add_argument('--ignore-invalid', action='store_true',
+                                     help='Skip invalid semantic versions instead of failing', required=False)
+    versions_sub_parser.add_argument('--line', help='Keep only versions of a major (X) or minor (X.Y) line',
+                                     required=False)
+
+    # Sub-parsers for sort / max / min versions commands, ordered by semantic version precedence
+    parser_sort = subparsers.add_parser('sort', parents=[versions_sub_parser])
+    parser_sort.add_argument('--reverse', action='store_true', help='Sort from highest to lowest', required=False)
+    subparsers.add_parser('max', parents=[versions_sub_parser])
+    subparsers.add_parser('min', parents=[versions_sub_parser])
 
     # Sub-parser for version the latest patch verification command
     # subparsers.add_parser('patch-update', parents=[base_sub_parser])
@@ -214,7 +1307,7 @@ def main():  # pragma: no cover
         else:
             parser.print_help()
         exit(0)
-    # elif args['sub_command'] == 'patch-update':
+    # if args['sub_command'] == 'patch-update':
     #     with open(args['file'], 'r') as stream:
     #         filename, file_extension = os.path.splitext(args['file'])
     #         file_base_name = os.path.basename(filename)
@@ -230,73 +1323,46 @@ def main():  # pragma: no cover
     #       exit(1)
     #
     #     print(pybump_patch.check_available_python_patches(requirements_list=requirements))
-    else:
-        # Read current version from the given file
-        file_data = read_version_from_file(args['file'], args['app_version'])
-        file_content = file_data.get('file_content')
-        version_object = PybumpVersion(file_data.get('version'))
 
-        if not version_object.is_valid_semantic_version():
-            version_object.print_invalid_version()
-            exit(1)
+    if args.get('expect_version') and not args.get('file'):
+        print("--expect-version flag is supported only with --file", file=stderr)
+        exit(1)
+    if args.get('ref') and not args.get('file'):
+        print("--ref flag is supported only with --file", file=stderr)
+        exit(1)
 
-        if args['sub_command'] == 'get':
-            if args['sem_ver']:
-                # Join the array of current_version_dict by dots
-                print('.'.join(str(x) for x in version_object.version))
-            elif args['release']:
-                print(version_object.release)
-            elif args['metadata']:
-                print(version_object.metadata)
-            else:
-                print(version_object.__str__())
+    try:
+        if args.get('level') == 'auto':
+            args['level'] = get_auto_bump_level(args['file'] or args['workspace'] or args['charts'] or args['path'],
+                                                args['tag_prefix'])
+        if args['sub_command'] in ('sort', 'max', 'min'):
+            run_sort(args)
+        elif args['sub_command'] == 'watch':
+            run_watch(args)
+        elif args['sub_command'] == 'plan':
+            run_plan(args)
+        elif args['sub_command'] == 'repos':
+            run_repos(args)
+        elif args['sub_command'] == 'audit':
+            run_audit(args)
+        elif args['sub_command'] == 'index':
+            run_index(args)
+        elif args['sub_command'] == 'image':
+            run_image(args)
+        elif args['sub_command'] == 'check-staged':
+            run_check_staged(args)
+        elif args.get('changed_since'):
+            run_changed(args)
+        elif args['sub_command'] == 'check' or args.get('workspace'):
+            run_workspace(args)
+        elif args.get('charts'):
+            run_charts(args)
         else:
-            # Set new_version to be invalid first
-            new_version = None
-
-            # Set the 'new_version' value
-            if args['sub_command'] == 'set':
-                # Case set-version argument passed, just set the new version with its value
-                if args['set_version']:
-                    new_version = PybumpVersion(args['set_version'])
-                # Case the 'auto' flag was set, set release or metadata with git commit SHA
-                elif args['auto']:
-                    from git import Repo, InvalidGitRepositoryError
-                    # get the directory path of current working file
-                    file_dirname_path = os.path.dirname(args['file'])
-                    try:
-                        repo = Repo(path=file_dirname_path, search_parent_directories=True)
-                        # get commit SHA (try active branch first, fall back to HEAD)
-                        try:
-                            commit_sha = str(repo.active_branch.commit)
-                        except TypeError:
-                            commit_sha = str(repo.head.object.hexsha)
-                        # set metadata (+sha) if --metadata flag is set, otherwise set release (-sha)
-                        if args.get('metadata'):
-                            version_object.metadata = commit_sha
-                        else:
-                            version_object.release = commit_sha
-                        new_version = version_object
-                    except InvalidGitRepositoryError:
-                        print("{} is not a valid git repo".format(file_dirname_path), file=stderr)
-                        exit(1)
-                # Should never reach this point due to argparse mutual exclusion, but set safety if statement anyway
-                else:
-                    print("set-version or auto flags are mandatory", file=stderr)
-                    exit(1)
-            else:  # bump version ['sub_command'] == 'bump'
-                # Only bump value of the 'version' key
-                version_object.bump_version(args['level'])
-                new_version = version_object
-            # new_version should never be None at this point, but check this anyway
-            if not new_version or not new_version.is_valid_semantic_version():
-                new_version.print_invalid_version()
-                exit(1)
-            # Write the new version with relevant content back to the file
-            write_version_to_file(args['file'], file_content, new_version.__str__(), args['app_version'])
-
-            if args['quiet'] is False:
-                print(new_version)
+            run_file(args)
+    except ModuleNotFoundError as exc:
+        # an optional dependency is missing, print installation instructions
+        print(exc, file=stderr)
+        exit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,159 @@
+import asyncio
+from functools import partial
+
+try:
+    from .pybump import read_version_from_file, write_version_to_file, PybumpFileLock
+    from .pybump_patch import get_versions_from_requirements, fetch_json, PYPI_JSON_URL
+    from .pybump_version import PybumpVersion
+except ImportError:
+    from pybump import read_version_from_file, write_version_to_file, PybumpFileLock
+    from pybump_patch import get_versions_from_requirements, fetch_json, PYPI_JSON_URL
+    from pybump_version import PybumpVersion
+
+
+def get_file_version(file_path, app_version=False, read_only=False):
+    """
+    Read and validate the version of a given file
+    :param file_path: full path to file as string
+    :param app_version: boolean, if True return appVersion from Helm chart
+    :param read_only: boolean, if True the file is not written afterwards, see read_version_from_file
+    :return: tuple of (file data dict as returned by read_version_from_file, PybumpVersion)
+    """
+    file_data = read_version_from_file(file_path, app_version, read_only)
+    version = PybumpVersion(file_data.get('version'))
+    if not version.is_valid_semantic_version():
+        raise ValueError("Invalid semantic version format in {}: {}".format(file_path, version.invalid_version))
+    return file_data, version
+
+
+def set_file_version(file_path, version, app_version=False):
+    """
+    Set version of a given file
+    :param file_path: full path to file as string
+    :param version: PybumpVersion object
+    :param app_version: boolean, if True then set the appVersion key
+    :return: PybumpVersion object
+    """
+    if not version.is_valid_semantic_version():
+        raise ValueError("Invalid semantic version format: {}".format(version.invalid_version))
+    with PybumpFileLock(file_path):
+        file_data, _ = get_file_version(file_path, app_version)
+        write_version_to_file(file_path, file_data.get('file_content'), str(version), app_version)
+    return version
+
+
+def bump_file_version(file_path, level, app_version=False):
+    """
+    Bump version of a given file
+    :param file_path: full path to file as string
+    :param level: string represents major|minor|patch
+    :param app_version: boolean, if True then bump the appVersion key
+    :return: new PybumpVersion object
+    """
+    with PybumpFileLock(file_path):
+        file_data, version = get_file_version(file_path, app_version)
+        version.bump_version(level)
+        write_version_to_file(file_path, file_data.get('file_content'), str(version), app_version)
+    return version
+
+
+class PybumpAsync(object):
+    """
+    asyncio counterparts of the pybump file and PYPI operations,
+    file I/O and parsing are offloaded to an executor so the event loop is never blocked,
+    and at most 'max_concurrency' operations run at once, so hundreds of repositories can be processed in one loop.
+
+    PYPI requests use the passed 'session' (an aiohttp.ClientSession) if given,
+    otherwise they are offloaded to the executor as well
+    """
+
+    def __init__(self, max_concurrency=16, executor=None, session=None, timeout=30):
+        self.__max_concurrency = max_concurrency
+        self.__executor = executor
+        self.__session = session
+        self.__timeout = timeout
+        self.__semaphore = None
+
+    @property
+    def max_concurrency(self):
+        return self.__max_concurrency
+
+    @property
+    def semaphore(self):
+        # created on first use, so it is bound to the running event loop
+        if self.__semaphore is None:
+            self.__semaphore = asyncio.Semaphore(self.__max_concurrency)
+        return self.__semaphore
+
+    async def run_in_executor(self, func, *args):
+        """
+        Run a blocking function in the executor, bounded by the concurrency limit
+        :param func: callable
+        :param args: arguments of func
+        :return: return value of func
+        """
+        async with self.semaphore:
+            return await asyncio.get_running_loop().run_in_executor(self.__executor, partial(func, *args))
+
+    async def get(self, file_path, app_version=False):
+        """
+        :param file_path: full path to file as string
+        :param app_version: boolean, if True return appVersion from Helm chart
+        :return: PybumpVersion object
+        """
+        _, version = await self.run_in_executor(get_file_version, file_path, app_version, True)
+        return version
+
+    async def set(self, file_path, version, app_version=False):
+        """
+        :param file_path: full path to file as string
+        :param version: PybumpVersion object or version string
+        :param app_version: boolean, if True then set the appVersion key
+        :return: PybumpVersion object
+        """
+        if not isinstance(version, PybumpVersion):
+            version = PybumpVersion(version)
+        return await self.run_in_executor(set_file_version, file_path, version, app_version)
+
+    async def bump(self, file_path, level, app_version=False):
+        """
+        :param file_path: full path to file as string
+        :param level: string represents major|minor|patch
+        :param app_version: boolean, if True then bump the appVersion key
+        :return: new PybumpVersion object
+        """
+        return await self.run_in_executor(bump_file_version, file_path, level, app_version)
+
+    async def get_pypi_package_releases(self, package_name):
+        """
+        :param package_name: string, pypi project name
+        :return: json with pypi project response
+        """
+        url = PYPI_JSON_URL.format(package_name)
+        if self.__session is None:
+            return await self.run_in_executor(fetch_json, url, self.__timeout)
+
+        async with self.semaphore:
+            async with self.__session.get(url) as response:
+                if response.status != 200:
+                    raise RuntimeError('error occurred fetching package {} from PYPI.\n'
+                                       'response is: {}'.format(package_name, response.reason))
+                return await response.json()
+
+    async def check_available_python_patches(self, requirements_list):
+        """
+        async counterpart of pybump_patch.check_available_python_patches,
+        releases of all requirements are fetched concurrently
+        :param requirements_list: list of requirement strings, like ['pyyaml==5.3.1', 'GitPython>=3.1']
+        :return: list of dicts in requirements order
+        """
+        requirements = [requirement for requirement in get_versions_from_requirements(requirements_list)
+                        if requirement.version.is_valid_semantic_version()]
+        releases = await asyncio.gather(*(self.get_pypi_package_releases(requirement.package_name)
+                                          for requirement in requirements))
+
+        patchable_packages_array = []
+        for requirement, package_releases in zip(requirements, releases):
+            requirement.identify_possible_patch(package_releases.get('releases').keys())
+            patchable_packages_array.append(requirement.get_dict())
+        return patchable_packages_array
@@ -0,0 +1,164 @@
+import re
+from array import array
+from itertools import compress
+
+try:
+    import numpy
+except ModuleNotFoundError:  # numpy is optional, columns are kept in array.array objects when it is not installed
+    numpy = None
+
+try:
+    from .pybump_version import semver_regex, get_release_sort_key, get_sort_key, parse_version_line
+except ImportError:
+    from pybump_version import semver_regex, get_release_sort_key, get_sort_key, parse_version_line
+
+# semver_regex with the optional lower case 'v' prefix, so every string is matched once
+prefixed_semver_regex = re.compile(r"^v?" + semver_regex.pattern[1:])
+# numbers with up to 18 digits always fit a signed 64 bit column
+MAX_NUMBER_DIGITS = 18
+
+
+class PybumpVersionColumns(object):
+    """
+    Parse many version strings into columns, instead of a PybumpVersion object per string,
+    major/minor/patch are int64 columns (numpy arrays if numpy is installed, otherwise array('q')),
+    release/metadata are lists of strings (empty string if missing), and 'valid' is a mask of valid semantic versions,
+    the numeric columns of invalid versions hold 0.
+
+    Filtering and comparing run over whole columns, for example all valid versions of the 3.1 line:
+        columns = PybumpVersionColumns(versions)
+        columns.select(columns.line_mask('3.1'))
+    """
+
+    def __init__(self, versions, use_numpy=None):
+        """
+        :param versions: iterable of version strings
+        :param use_numpy: boolean, if True return numpy arrays, default is True if numpy is installed
+        """
+        if use_numpy is None:
+            use_numpy = numpy is not None
+        elif use_numpy and numpy is None:
+            raise ModuleNotFoundError("'numpy' is required for use_numpy=True but is not installed", name='numpy')
+        self.__use_numpy = use_numpy
+        self.__versions = versions if isinstance(versions, list) else list(versions)
+
+        major, minor, patch, valid = array('q'), array('q'), array('q'), array('b')
+        release, metadata = [], []
+        match = prefixed_semver_regex.match
+        for version in self.__versions:
+            result = match(version) if isinstance(version, str) else None
+            fields = result.groups() if result is not None else None
+            if fields and max(len(fields[0]), len(fields[1]), len(fields[2])) <= MAX_NUMBER_DIGITS:
+                major.append(int(fields[0]))
+                minor.append(int(fields[1]))
+                patch.append(int(fields[2]))
+                release.append(fields[3] or '')
+                metadata.append(fields[4] or '')
+                valid.append(1)
+            else:
+                major.append(0)
+                minor.append(0)
+                patch.append(0)
+                release.append('')
+                metadata.append('')
+                valid.append(0)
+
+        if use_numpy:
+            # array('q') buffers are int64, so numpy reads them without copying
+            self.__major = numpy.frombuffer(major, dtype=numpy.int64)
+            self.__minor = numpy.frombuffer(minor, dtype=numpy.int64)
+            self.__patch = numpy.frombuffer(patch, dtype=numpy.int64)
+            self.__valid = numpy.frombuffer(valid, dtype=numpy.int8).astype(bool)
+        else:
+            self.__major, self.__minor, self.__patch, self.__valid = major, minor, patch, valid
+        self.__release = release
+        self.__metadata = metadata
+
+    def __len__(self):
+        return len(self.__versions)
+
+    @property
+    def versions(self):
+        return self.__versions
+
+    @property
+    def major(self):
+        return self.__major
+
+    @property
+    def minor(self):
+        return self.__minor
+
+    @property
+    def patch(self):
+        return self.__patch
+
+    @property
+    def release(self):
+        return self.__release
+
+    @property
+    def metadata(self):
+        return self.__metadata
+
+    @property
+    def valid(self):
+        return self.__valid
+
+    def line_mask(self, line):
+        """
+        :param line: string, major ('3') or major.minor ('3.1') line
+        :return: mask of valid versions that are part of 'line', numpy bool array or array('b')
+        """
+        parsed_line = parse_version_line(line)
+        if self.__use_numpy:
+            mask = self.__valid & (self.__major == parsed_line[0])
+            if len(parsed_line) == 2:
+                mask &= self.__minor == parsed_line[1]
+            return mask
+
+        if len(parsed_line) == 1:
+            return array('b', (valid and major == parsed_line[0] for valid, major in zip(self.__valid, self.__major)))
+        return array('b', (valid and major == parsed_line[0] and minor == parsed_line[1]
+                           for valid, major, minor in zip(self.__valid, self.__major, self.__minor)))
+
+    def compare(self, version):
+        """
+        Compare every version with 'version' by semantic version precedence,
+        pre-release strings are compared only for rows with the same major.minor.patch
+        :param version: version string
+        :return: column of -1 (lower), 0 (equal precedence or invalid row) or 1 (higher),
+            numpy int8 array or array('b'), combine with 'valid' to drop invalid rows
+        """
+        key = get_sort_key(version)
+        if key is None:
+            raise ValueError("Invalid semantic version: {}".format(version))
+        major, minor, patch, release_key = key
+
+        if self.__use_numpy:
+            result = numpy.sign(self.__major - major).astype(numpy.int8)
+            for column, value in ((self.__minor, minor), (self.__patch, patch)):
+                tied = result == 0
+                result[tied] = numpy.sign(column[tied] - value)
+            result[~self.__valid] = 0
+            tied_rows = numpy.flatnonzero((result == 0) & self.__valid)
+        else:
+            result = array('b', (valid and ((x > major) - (x < major) or (y > minor) - (y < minor) or
+                                            (z > patch) - (z < patch))
+                                 for valid, x, y, z in zip(self.__valid, self.__major, self.__minor, self.__patch)))
+            tied_rows = [index for index, (valid, value) in enumerate(zip(self.__valid, result))
+                         if valid and value == 0]
+
+        for index in tied_rows:
+            row_release_key = get_release_sort_key(self.__release[index])
+            result[index] = (row_release_key > release_key) - (row_release_key < release_key)
+        return result
+
+    def select(self, mask):
+        """
+        :param mask: iterable of booleans with a value per version, like the result of line_mask
+        :return: list of version strings where 'mask' is True
+        """
+        if self.__use_numpy:
+            return [self.__versions[index] for index in numpy.flatnonzero(mask)]
+        return list(compress(self.__versions, mask))
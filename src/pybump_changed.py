@@ -0,0 +1,166 @@
+import os
+import time
+
+try:
+    from .pybump import read_version_from_file, set_version_in_content, dump_content_to_file, regex_version_pattern, \
+        walk_directories, PybumpFileLock, VERSION_FILE_NAMES, LOCK_TIMEOUT
+    from .pybump_git import PybumpTagIndex, find_git_dir, list_changed_files
+    from .pybump_version import PybumpVersion
+except ImportError:
+    from pybump import read_version_from_file, set_version_in_content, dump_content_to_file, regex_version_pattern, \
+        walk_directories, PybumpFileLock, VERSION_FILE_NAMES, LOCK_TIMEOUT
+    from pybump_git import PybumpTagIndex, find_git_dir, list_changed_files
+    from pybump_version import PybumpVersion
+
+# '--changed-since' value that stands for the highest semantic version tag
+LAST_TAG = 'last-tag'
+
+
+def build_artifact_index(root_dir):
+    """
+    Walk 'root_dir' once and map every directory that holds version files to those files,
+    hidden directories (like .git) are skipped
+    :param root_dir: string
+    :return: dict of absolute directory path to sorted list of version file paths
+    """
+    index = {}
+    for dir_path, file_names in walk_directories(os.path.abspath(root_dir)):
+        version_files = sorted(os.path.join(dir_path, name) for name in file_names if name in VERSION_FILE_NAMES)
+        if version_files:
+            index[dir_path] = version_files
+    return index
+
+
+def has_version_string(file_path):
+    """
+    The version of setup.py / pyproject.toml may be dynamic (like read from a VERSION file), such files own no version
+    :param file_path: full path to file as string
+    :return: boolean
+    """
+    if os.path.splitext(file_path)[1] not in ('.py', '.toml'):
+        return True
+    with open(file_path, 'r') as stream:
+        return regex_version_pattern.search(stream.read()) is not None
+
+
+class PybumpChangedArtifacts(object):
+    """
+    Bump only the artifacts (Helm charts, python projects, VERSION files) that changed since a git ref,
+    changed paths come from a single tree diff, and each one is mapped to the version files of its nearest
+    parent directory in an index built by a single walk, so the cost of a release follows the changed artifacts
+    """
+
+    def __init__(self, root_dir='.', lock_timeout=LOCK_TIMEOUT):
+        """
+        :param root_dir: directory inside a git repository, only version files under it are considered
+        :param lock_timeout: seconds to wait for the lock of a version file held by another pybump writer
+        """
+        self.__root_dir = os.path.abspath(root_dir)
+        self.__lock_timeout = lock_timeout
+        self.__work_dir, _ = find_git_dir(self.__root_dir)
+        self.__index = build_artifact_index(self.__root_dir)
+        # directory to version files of its nearest owning directory, filled for every directory visited
+        self.__owners = {}
+
+    @property
+    def root_dir(self):
+        return self.__root_dir
+
+    @property
+    def work_dir(self):
+        return self.__work_dir
+
+    @property
+    def index(self):
+        return self.__index
+
+    def resolve_ref(self, ref, tag_prefix=''):
+        """
+        :param ref: git ref (commit, branch or tag) as string, or 'last-tag'
+        :param tag_prefix: string, with 'last-tag' only tags starting with it are considered
+        :return: git ref as string
+        """
+        if ref != LAST_TAG:
+            return ref
+        last_tag, _ = PybumpTagIndex(self.__work_dir).get_max_version(tag_prefix)
+        if last_tag is None:
+            raise RuntimeError("No semantic version tag found in {} with prefix '{}'"
+                               .format(self.__work_dir, tag_prefix))
+        return last_tag
+
+    def get_owner_files(self, directory):
+        """
+        Find the version files of the nearest directory (up to root_dir) that owns a version,
+        directories are looked up in the index, the file system is read only for version-less python files
+        :param directory: absolute directory path as string
+        :return: list of version file paths, empty if no directory owns a version
+        """
+        visited = []
+        owner_files = []
+        while directory not in self.__owners:
+            visited.append(directory)
+            owner_files = [path for path in self.__index.get(directory, []) if has_version_string(path)]
+            if owner_files or directory == self.__root_dir:
+                break
+            directory = os.path.dirname(directory)
+        else:
+            owner_files = self.__owners[directory]
+        for path in visited:
+            self.__owners[path] = owner_files
+        return owner_files
+
+    def get_changed_artifacts(self, ref, tag_prefix=''):
+        """
+        :param ref: git ref as string, or 'last-tag'
+        :param tag_prefix: string, see resolve_ref
+        :return: sorted list of version file paths owning a changed path
+        """
+        root_prefix = os.path.join(self.__root_dir, '')
+        changed_dirs = set()
+        for path in list_changed_files(self.__work_dir, self.resolve_ref(ref, tag_prefix)):
+            directory = os.path.dirname(os.path.join(self.__work_dir, *path.split('/')))
+            if directory == self.__root_dir or directory.startswith(root_prefix):
+                changed_dirs.add(directory)
+
+        artifacts = set()
+        for directory in changed_dirs:
+            artifacts.update(self.get_owner_files(directory))
+        return sorted(artifacts)
+
+    def bump(self, ref, level, tag_prefix='', app_version=False, report=None):
+        """
+        Bump every changed artifact, all files are read and validated before any file is written
+        :param ref: git ref as string, or 'last-tag'
+        :param level: string represents major|minor|patch
+        :param tag_prefix: string, see resolve_ref
+        :param app_version: boolean, if True bump appVersion of Helm charts (other files bump their version)
+        :param report: optional PybumpReport that writes and reports changed files
+        :return: dict of version file path to new PybumpVersion
+        """
+        changes = []
+        for path in self.get_changed_artifacts(ref, tag_prefix):
+            start = time.perf_counter()
+            is_chart_app_version = app_version and os.path.basename(path) == 'Chart.yaml'
+            file_data = read_version_from_file(path, is_chart_app_version)
+            version = PybumpVersion(file_data.get('version'))
+            if not version.is_valid_semantic_version():
+                raise ValueError("Invalid semantic version in {}: {}".format(path, version.invalid_version))
+            old_version = str(version)
+            version.bump_version(level)
+            file_content = set_version_in_content(path, file_data.get('file_content'), str(version),
+                                                  is_chart_app_version)
+            changes.append((path, is_chart_app_version, file_data.get('file_type'), file_content, old_version, version,
+                            time.perf_counter() - start))
+
+        # every file is written under its lock, and only if its version did not change since it was read
+        dry_run = report is not None and report.dry_run
+        versions = {}
+        for path, is_chart_app_version, file_type, file_content, old_version, version, elapsed in changes:
+            with PybumpFileLock(path, self.__lock_timeout, shared=dry_run) as file_lock:
+                file_lock.check_version(old_version, is_chart_app_version)
+                if report:
+                    report.write(path, file_type, file_content, old_version, version, elapsed)
+                else:
+                    dump_content_to_file(path, file_content)
+            versions[path] = version
+        return versions
@@ -0,0 +1,202 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from .pybump import read_version_from_file, walk_directories, VERSION_FILE_NAMES
+    from .pybump_changed import has_version_string
+    from .pybump_patch import PybumpReleaseCache, check_available_python_patches, get_setup_py_install_requires
+    from .pybump_version import PybumpVersion
+    from .pybump_watch import PybumpWatch
+    from .pybump_workspace import PybumpWorkspace, WORKSPACE_MANIFEST
+except ImportError:
+    from pybump import read_version_from_file, walk_directories, VERSION_FILE_NAMES
+    from pybump_changed import has_version_string
+    from pybump_patch import PybumpReleaseCache, check_available_python_patches, get_setup_py_install_requires
+    from pybump_version import PybumpVersion
+    from pybump_watch import PybumpWatch
+    from pybump_workspace import PybumpWorkspace, WORKSPACE_MANIFEST
+
+FANOUT_ACTIONS = ('get', 'verify', 'scan')
+requirements_file_regex = re.compile(r"^requirements.*\.txt$")
+
+
+def read_repository_roots(stream):
+    """
+    Read repository roots, one per line, empty lines and '#' comments are skipped, duplicates are kept once
+    :param stream: file object, like an open roots file or stdin
+    :return: list of directory paths in input order
+    """
+    roots = []
+    for line in stream:
+        line = line.strip()
+        if line and not line.startswith('#') and line not in roots:
+            roots.append(line)
+    return roots
+
+
+def find_repository_files(root_dir):
+    """
+    Walk a repository once, and collect its version files and python requirement sources,
+    hidden directories (like .git) are skipped
+    :param root_dir: string
+    :return: tuple of (sorted list of version file paths, sorted list of requirements*.txt / setup.py paths)
+    """
+    version_files, requirement_files = [], []
+    for dir_path, file_names in walk_directories(root_dir):
+        for name in file_names:
+            path = os.path.join(dir_path, name)
+            if name in VERSION_FILE_NAMES:
+                version_files.append(path)
+            if name == 'setup.py' or requirements_file_regex.match(name):
+                requirement_files.append(path)
+    return sorted(version_files), sorted(requirement_files)
+
+
+def read_requirements(file_path):
+    """
+    :param file_path: path of a requirements*.txt or setup.py file
+    :return: list of requirement strings, pip options (like '-r other.txt') and comments are skipped
+    """
+    with open(file_path, 'r') as stream:
+        content = stream.read()
+    if os.path.basename(file_path) == 'setup.py':
+        return get_setup_py_install_requires(content)
+    requirements = []
+    for line in content.splitlines():
+        # pip-compile output continues requirements with a trailing '\', hashes are '--hash' options
+        line = line.split(' #', 1)[0].strip().rstrip('\\').strip()
+        if line and not line.startswith(('#', '-')):
+            requirements.append(line)
+    return requirements
+
+
+def is_version_file(path):
+    """
+    The version of setup.py / pyproject.toml may be dynamic, such files are not version files,
+    unreadable files are kept, so they are reported as errors
+    :param path: full path to file as string
+    :return: boolean
+    """
+    try:
+        return has_version_string(path)
+    except (OSError, ValueError):
+        return True
+
+
+class PybumpFanout(object):
+    """
+    Run get/verify/scan across many repositories with a bounded pool of worker threads, in a single process,
+    so caches are shared by all repositories: parsed versions (parse_semantic_string), YAML engines (one per worker)
+    and PYPI releases (a PybumpReleaseCache, every package is fetched once)
+    """
+
+    def __init__(self, max_workers=8, release_cache=None):
+        """
+        :param max_workers: maximum repositories handled at once
+        :param release_cache: optional PybumpReleaseCache, default fetches releases from PYPI
+        """
+        if max_workers < 1:
+            raise ValueError("Error, max_workers must be at least 1, got: {}".format(max_workers))
+        self.__max_workers = max_workers
+        self.__release_cache = PybumpReleaseCache() if release_cache is None else release_cache
+
+    @property
+    def max_workers(self):
+        return self.__max_workers
+
+    @property
+    def release_cache(self):
+        return self.__release_cache
+
+    @staticmethod
+    def get_versions(version_files):
+        """
+        :param version_files: list of version file paths
+        :return: list of (status, path, message) tuples, status is one of ok|invalid|error
+        """
+        result = []
+        for path in version_files:
+            try:
+                version = PybumpVersion(read_version_from_file(path, False, read_only=True).get('version'))
+            except (OSError, ValueError, RuntimeError, KeyError) as exc:
+                result.append(('error', path, str(exc)))
+                continue
+            if version.is_valid_semantic_version():
+                result.append(('ok', path, str(version)))
+            else:
+                result.append(('invalid', path, 'invalid semantic version: {}'.format(version.invalid_version)))
+        return result
+
+    @staticmethod
+    def verify(root_dir, version_files):
+        """
+        Validate version files, and compare workspace group members if the repository has a workspace manifest
+        :param root_dir: repository root as string
+        :param version_files: list of version file paths
+        :return: list of (status, path, message) tuples, status is one of ok|invalid|drift|error
+        """
+        manifest_path = os.path.join(root_dir, WORKSPACE_MANIFEST)
+        workspace = None
+        if os.path.isfile(manifest_path):
+            try:
+                workspace = PybumpWorkspace(manifest_path)
+            except (OSError, ValueError, RuntimeError) as exc:
+                return [('error', manifest_path, str(exc))]
+        return PybumpWatch(workspace).check_files(version_files)
+
+    def scan(self, requirement_files):
+        """
+        :param requirement_files: list of requirements*.txt / setup.py paths
+        :return: list of (status, path, message) tuples, status is one of ok|patchable|error
+        """
+        result = []
+        for path in requirement_files:
+            try:
+                packages = check_available_python_patches(read_requirements(path), self.__release_cache)
+            except (OSError, ValueError, RuntimeError, SyntaxError) as exc:
+                # network and parsing errors are reported per file
+                result.append(('error', path, str(exc)))
+                continue
+            for package in packages:
+                if package['patchable']:
+                    result.append(('patchable', path, '{} {} -> {}'.format(
+                        package['package_name'], package['version'], package['latest_patch'])))
+                else:
+                    result.append(('ok', path, '{} {}'.format(package['package_name'], package['version'])))
+        return result
+
+    def run_repository(self, root_dir, action):
+        """
+        :param root_dir: repository root as string
+        :param action: one of get|verify|scan
+        :return: list of (status, path, message) tuples, paths are relative to root_dir
+        """
+        if not os.path.isdir(root_dir):
+            return [('error', '.', 'repository root does not exist')]
+        version_files, requirement_files = find_repository_files(root_dir)
+        if action != 'scan':
+            version_files = [path for path in version_files if is_version_file(path)]
+
+        if action == 'get':
+            result = self.get_versions(version_files)
+        elif action == 'verify':
+            result = self.verify(root_dir, version_files)
+        else:
+            result = self.scan(requirement_files)
+        return [(status, os.path.relpath(path, root_dir), message) for status, path, message in result]
+
+    def run(self, roots, action):
+        """
+        Run 'action' on every repository, repositories are handled by the worker pool,
+        and results are aggregated in the order of 'roots'
+        :param roots: list of repository roots
+        :param action: one of get|verify|scan
+        :return: list of record dicts with repository, path, status and message keys
+        """
+        if action not in FANOUT_ACTIONS:
+            raise ValueError("Error, invalid action: '{}', should be get|verify|scan.".format(action))
+        with ThreadPoolExecutor(max_workers=self.__max_workers) as executor:
+            results = executor.map(lambda root_dir: self.run_repository(root_dir, action), roots)
+            return [{'repository': root_dir, 'path': path, 'status': status, 'message': message}
+                    for root_dir, result in zip(roots, results) for status, path, message in result]
@@ -0,0 +1,449 @@
+import os
+import re
+from io import StringIO
+from subprocess import run, Popen, PIPE, DEVNULL
+
+try:
+    from .pybump import import_optional_module, read_version_from_stream
+    from .pybump_version import PybumpVersion, get_sort_key
+except ImportError:
+    from pybump import import_optional_module, read_version_from_stream
+    from pybump_version import PybumpVersion, get_sort_key
+
+# Conventional Commits (https://www.conventionalcommits.org) header, like 'feat(parser)!: message'
+# group 1 is the commit type, group 2 is the optional '!' breaking change mark
+conventional_commit_regex = re.compile(r"^([a-zA-Z]+)(?:\([^)]*\))?(!)?: ")
+breaking_change_regex = re.compile(r"^BREAKING[ -]CHANGE: ", re.MULTILINE)
+bump_levels_rank = {None: 0, 'patch': 1, 'minor': 2, 'major': 3}
+
+
+def run_git_command(repo_path, *args):
+    """
+    Execute a single git command and return its output
+    :param repo_path: path of a directory inside a git repository as string
+    :param args: git command arguments, like ('tag', '--list')
+    :return: stdout of the git command as string
+    """
+    try:
+        result = run(['git', '-C', repo_path] + list(args), stdout=PIPE, stderr=PIPE, universal_newlines=True)
+    except FileNotFoundError:
+        raise RuntimeError("git executable not found")
+    if result.returncode != 0:
+        raise RuntimeError("git {} failed: {}".format(' '.join(args), result.stderr.strip()))
+    return result.stdout
+
+
+def list_staged_files(repo_path):
+    """
+    List files that are added, copied, modified or renamed in the index (staged for the next commit)
+    :param repo_path: path of a directory inside a git repository as string
+    :return: list of paths relative to the worktree root
+    """
+    output = run_git_command(repo_path, 'diff', '--cached', '--name-only', '-z', '--diff-filter=ACMR')
+    return [path for path in output.split('\x00') if path]
+
+
+def list_changed_files(repo_path, ref):
+    """
+    List files that differ between 'ref' and HEAD with a single tree diff, renames are listed as both paths
+    :param repo_path: path of a directory inside a git repository as string
+    :param ref: git ref (commit, branch or tag) as string
+    :return: list of paths relative to the worktree root
+    """
+    output = run_git_command(repo_path, 'diff-tree', '-r', '--name-only', '-z', '--no-commit-id', ref, 'HEAD', '--')
+    return [path for path in output.split('\x00') if path]
+
+
+class PybumpBlobReader(object):
+    """
+    Read blobs straight from the object database with a single long-lived 'git cat-file --batch' process,
+    objects are named like 'v1.2.3:chart/Chart.yaml' (a file at a revision) or ':VERSION' (a staged file),
+    so any number of files and revisions are read without checkouts or a git process per file
+    """
+
+    def __init__(self, repo_path):
+        """
+        :param repo_path: path of a directory inside a git repository as string
+        """
+        self.__repo_path = repo_path
+        self.__process = None
+
+    @property
+    def repo_path(self):
+        return self.__repo_path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def open(self):
+        if self.__process is None:
+            try:
+                self.__process = Popen(['git', '-C', self.__repo_path, 'cat-file', '--batch'],
+                                       stdin=PIPE, stdout=PIPE, stderr=DEVNULL)
+            except FileNotFoundError:
+                raise RuntimeError("git executable not found")
+
+    def close(self):
+        if self.__process is not None:
+            try:
+                self.__process.stdin.close()
+            except BrokenPipeError:
+                # git exited already, like when started outside of a repository
+                pass
+            self.__process.stdout.close()
+            self.__process.wait()
+            self.__process = None
+
+    def read(self, object_name):
+        """
+        :param object_name: revision and path, like 'HEAD:VERSION', or ':VERSION' for the staged content
+        :return: content as string, or None if the object is missing or is not a file
+        """
+        result = self.read_object(object_name)
+        # a path of a directory names a tree
+        return result[1].decode() if result is not None and result[0] == 'blob' else None
+
+    def has_commit(self, ref):
+        """
+        :param ref: revision, like a branch name, a tag or a commit SHA
+        :return: boolean, True if the revision resolves to a commit
+        """
+        return self.read_object('{}^{{commit}}'.format(ref)) is not None
+
+    def read_object(self, object_name):
+        """
+        :param object_name: any object name git understands, like 'HEAD:VERSION' or 'v1.2.3^{commit}'
+        :return: tuple of (object type, content as bytes), or None if the object is missing
+        """
+        if '\n' in object_name:
+            raise ValueError("Invalid git object name: {}".format(object_name))
+        self.open()
+        # every object is returned as '<sha> <type> <size>\n<content>\n', or '<name> missing\n'
+        try:
+            self.__process.stdin.write(object_name.encode() + b'\n')
+            self.__process.stdin.flush()
+            header = self.__process.stdout.readline()
+        except BrokenPipeError:
+            header = b''
+        if not header:
+            self.close()
+            raise RuntimeError("git cat-file failed, {} is probably not a valid git repo".format(self.__repo_path))
+
+        header = header.rstrip(b'\n').split(b' ')
+        if header[-1] in (b'missing', b'ambiguous'):
+            return None
+        size = int(header[2])
+        content = self.__process.stdout.read(size)
+        self.__process.stdout.read(1)
+        return header[1].decode(), content
+
+
+def read_staged_blobs(repo_path, paths):
+    """
+    Read the staged (index) content of files with a single 'git cat-file --batch' process
+    :param repo_path: path of the worktree root as string
+    :param paths: list of paths relative to the worktree root
+    :return: dict of path to content as string, or None if path is not in the index
+    """
+    if not paths:
+        return {}
+    with PybumpBlobReader(repo_path) as reader:
+        return {path: reader.read(':{}'.format(path)) for path in paths}
+
+
+def get_commit_bump_level(message):
+    """
+    Classify a commit message by Conventional Commits,
+    breaking changes ('!' after type/scope or a 'BREAKING CHANGE:' footer) are major, 'feat' is minor, 'fix' is patch
+    :param message: full commit message as string
+    :return: major|minor|patch or None if commit does not require a release
+    """
+    match = conventional_commit_regex.match(message)
+    if (match and match.group(2)) or breaking_change_regex.search(message):
+        return 'major'
+    if not match:
+        return None
+    commit_type = match.group(1).lower()
+    if commit_type == 'feat':
+        return 'minor'
+    if commit_type == 'fix':
+        return 'patch'
+    return None
+
+
+def iter_commit_messages(repo_path, since=None):
+    """
+    Stream commit messages from newest to oldest, reading 'git log' output as it is produced,
+    so the history is never loaded at once, and the git process is stopped when the generator is closed,
+    the exit code of git is checked once its output is consumed, so an unknown revision is never read as no commits
+    :param repo_path: path of a directory inside a git repository as string
+    :param since: optional revision (like the last release tag), only commits after it are listed
+    :return: generator of commit messages as strings
+    """
+    revision = '{}..HEAD'.format(since) if since else 'HEAD'
+    # every message is terminated by a NUL character, since messages may contain empty lines
+    try:
+        process = Popen(['git', '-C', repo_path, 'log', '--format=%B%x00', revision],
+                        stdout=PIPE, stderr=PIPE, universal_newlines=True)
+    except FileNotFoundError:
+        raise RuntimeError("git executable not found")
+    try:
+        message = []
+        for line in process.stdout:
+            if '\x00' in line:
+                message.append(line[:line.index('\x00')])
+                yield ''.join(message).strip()
+                message = []
+            else:
+                message.append(line)
+        # the output is consumed, so git is done, and its (short) error output fits the pipe
+        errors = process.stderr.read()
+        if process.wait() != 0:
+            raise RuntimeError("git log {} failed: {}".format(revision, errors.strip()))
+    finally:
+        if process.poll() is None:
+            process.kill()
+        process.stdout.close()
+        process.stderr.close()
+        process.wait()
+
+
+def get_bump_level(repo_path, since=None, default='patch'):
+    """
+    Find the highest bump level required by commits since the last release,
+    reading stops at the first breaking change since no level is higher
+    :param repo_path: path of a directory inside a git repository as string
+    :param since: optional revision (like the last release tag), only commits after it are considered
+    :param default: level to return if no commit requires a release
+    :return: major|minor|patch
+    """
+    level = None
+    for message in iter_commit_messages(repo_path, since):
+        commit_level = get_commit_bump_level(message)
+        if bump_levels_rank[commit_level] > bump_levels_rank[level]:
+            level = commit_level
+            if level == 'major':
+                break
+    return level or default
+
+
+def read_dot_git(directory):
+    """
+    Check if 'directory' is a worktree root, a '.git' file (worktrees and submodules) that points
+    to the actual git directory is followed
+    :param directory: absolute directory path as string
+    :return: git directory as absolute path, or None if 'directory' holds no '.git'
+    """
+    dot_git = os.path.join(directory, '.git')
+    if os.path.isdir(dot_git):
+        return dot_git
+    if os.path.isfile(dot_git):
+        with open(dot_git, 'r') as stream:
+            content = stream.read().strip()
+        if content.startswith('gitdir:'):
+            return os.path.normpath(os.path.join(directory, content[len('gitdir:'):].strip()))
+    return None
+
+
+def find_git_dir(path):
+    """
+    Search 'path' and its parent directories for a git repository
+    :param path: path of a file or directory as string
+    :return: tuple of (worktree root, git directory) as absolute paths
+    """
+    current = os.path.abspath(path)
+    if not os.path.isdir(current):
+        current = os.path.dirname(current)
+    while True:
+        git_dir = read_dot_git(current)
+        if git_dir is not None:
+            return current, git_dir
+        parent = os.path.dirname(current)
+        if parent == current:
+            raise RuntimeError("{} is not a valid git repo".format(path))
+        current = parent
+
+
+class PybumpShaResolver(object):
+    """
+    Resolve the HEAD commit SHA of the repository that holds a path, for batches of files (like 'set --auto'),
+    every directory visited while searching for a repository root is cached, so each directory chain is walked once,
+    and HEAD is resolved once per repository
+    """
+
+    def __init__(self):
+        self.__repositories = {}
+        self.__commit_shas = {}
+        self.__head_lookups = 0
+
+    @property
+    def head_lookups(self):
+        return self.__head_lookups
+
+    def find_repository(self, path):
+        """
+        :param path: path of a file or directory as string
+        :return: tuple of (worktree root, git directory) as absolute paths
+        """
+        current = os.path.abspath(path)
+        if not os.path.isdir(current):
+            current = os.path.dirname(current)
+        visited = []
+        while current not in self.__repositories:
+            visited.append(current)
+            git_dir = read_dot_git(current)
+            if git_dir is not None:
+                self.__repositories[current] = (current, git_dir)
+                break
+            parent = os.path.dirname(current)
+            if parent == current:
+                self.__repositories[current] = None
+                break
+            current = parent
+
+        repository = self.__repositories[current]
+        for directory in visited:
+            self.__repositories[directory] = repository
+        if repository is None:
+            raise RuntimeError("{} is not a valid git repo".format(os.path.dirname(path) or path))
+        return repository
+
+    def get_head_sha(self, path):
+        """
+        :param path: path of a file or directory inside a git repository as string
+        :return: commit SHA of HEAD as string
+        """
+        work_dir, _ = self.find_repository(path)
+        if work_dir not in self.__commit_shas:
+            git = import_optional_module('git', 'git')
+            self.__head_lookups += 1
+            try:
+                self.__commit_shas[work_dir] = str(git.Repo(work_dir).head.commit.hexsha)
+            except (git.InvalidGitRepositoryError, ValueError) as exc:
+                # ValueError is raised for a repository without commits
+                raise RuntimeError("Unable to resolve HEAD commit of {}: {}".format(work_dir, exc))
+        return self.__commit_shas[work_dir]
+
+
+def get_ref_versions(file_paths, refs, app_version=False, locators=None):
+    """
+    Read the versions of files at git revisions without checkouts, blobs are read from the object database
+    with one PybumpBlobReader per repository, reused for all files and revisions of the repository,
+    every revision is checked once per repository, so an unknown revision is not reported as a missing file
+    :param file_paths: list of file paths as strings, the files do not have to exist in the worktree
+    :param refs: list of revisions, like branch names, tags or commit SHAs
+    :param app_version: boolean, if True return appVersion from Helm charts
+    :param locators: optional PybumpLocators of user defined version locations
+    :return: dict of (file path, ref) to version as string
+    """
+    resolver = PybumpShaResolver()
+    readers = {}
+    result = {}
+    try:
+        for file_path in file_paths:
+            work_dir, _ = resolver.find_repository(file_path)
+            if work_dir not in readers:
+                readers[work_dir] = PybumpBlobReader(work_dir)
+                for ref in refs:
+                    if not readers[work_dir].has_commit(ref):
+                        raise ValueError("Unknown revision {} in {}".format(ref, work_dir))
+            relative_path = os.path.relpath(os.path.abspath(file_path), work_dir).replace(os.sep, '/')
+            for ref in refs:
+                content = readers[work_dir].read('{}:{}'.format(ref, relative_path))
+                if content is None:
+                    raise ValueError("File {} not found at revision {}".format(relative_path, ref))
+                file_data = read_version_from_stream(file_path, StringIO(content), app_version, read_only=True,
+                                                     locators=locators)
+                result[(file_path, ref)] = str(file_data.get('version')).strip()
+    finally:
+        for reader in readers.values():
+            reader.close()
+    return result
+
+
+def get_common_git_dir(git_dir):
+    """
+    Linked worktrees keep their refs in the main repository git directory, declared by the 'commondir' file
+    :param git_dir: git directory path as string
+    :return: git directory that holds the shared refs
+    """
+    common_dir_file = os.path.join(git_dir, 'commondir')
+    if os.path.isfile(common_dir_file):
+        with open(common_dir_file, 'r') as stream:
+            return os.path.normpath(os.path.join(git_dir, stream.read().strip()))
+    return git_dir
+
+
+class PybumpTagIndex(object):
+    """
+    Index of tag names of a git repository, read straight from 'refs/tags' and 'packed-refs',
+    so no git process is executed, and repositories with many tags are listed with a single directory walk
+    """
+
+    def __init__(self, repo_path='.'):
+        self.__work_dir, git_dir = find_git_dir(repo_path)
+        self.__git_dir = get_common_git_dir(git_dir)
+        self.__tags = self.read_tags()
+
+    @property
+    def work_dir(self):
+        return self.__work_dir
+
+    @property
+    def tags(self):
+        return self.__tags
+
+    def read_tags(self):
+        """
+        :return: sorted list of tag names
+        """
+        tags = set()
+        packed_refs = os.path.join(self.__git_dir, 'packed-refs')
+        if os.path.isfile(packed_refs):
+            with open(packed_refs, 'r') as stream:
+                for line in stream:
+                    # skip the header ('# pack-refs with: ...') and peeled object lines ('^<sha>')
+                    if line[0] in '#^':
+                        continue
+                    ref = line.rstrip('\n').split(' ', 1)[-1]
+                    if ref.startswith('refs/tags/'):
+                        tags.add(ref[len('refs/tags/'):])
+
+        tags_dir = os.path.join(self.__git_dir, 'refs', 'tags')
+        for dir_path, _, file_names in os.walk(tags_dir):
+            relative_dir = os.path.relpath(dir_path, tags_dir)
+            for file_name in file_names:
+                tag = file_name if relative_dir == '.' else os.path.join(relative_dir, file_name)
+                tags.add(tag.replace(os.sep, '/'))
+        return sorted(tags)
+
+    def get_max_version(self, prefix=''):
+        """
+        Return the highest tag by semantic version precedence, tags that are not a semantic version are skipped
+        :param prefix: string, only tags that start with 'prefix' are considered, and it is removed before parsing,
+            for example 'chart-' for tags like 'chart-v1.2.3'
+        :return: tuple of (tag name, PybumpVersion), or (None, None) if no valid tag found
+        """
+        max_key = None
+        max_tag = None
+        for tag in self.__tags:
+            if not tag.startswith(prefix):
+                continue
+            key = get_sort_key(tag[len(prefix):])
+            if key is not None and (max_key is None or key > max_key):
+                max_key, max_tag = key, tag
+        if max_tag is None:
+            return None, None
+        return max_tag, PybumpVersion(max_tag[len(prefix):])
+
+
+def list_git_tags(repo_path='.'):
+    """
+    Return all tag names of a git repository
+    :param repo_path: path of a directory inside a git repository as string
+    :return: list of strings
+    """
+    return PybumpTagIndex(repo_path).tags
@@ -0,0 +1,329 @@
+import os
+import time
+from collections import deque
+from io import StringIO
+
+try:
+    from .pybump import read_bounded, read_version_from_stream, set_version_in_content, dump_content_to_file, \
+        walk_directories, PybumpFileLock, LOCK_TIMEOUT
+    from .pybump_version import PybumpVersion
+except ImportError:
+    from pybump import read_bounded, read_version_from_stream, set_version_in_content, dump_content_to_file, \
+        walk_directories, PybumpFileLock, LOCK_TIMEOUT
+    from pybump_version import PybumpVersion
+
+HELM_CHART_FILE = 'Chart.yaml'
+HELM_SUBCHARTS_DIR = 'charts'
+
+
+def find_helm_charts(root_dir):
+    """
+    Walk 'root_dir' and yield path of every Chart.yaml file, hidden directories (like .git) are skipped
+    :param root_dir: string
+    :return: generator of Chart.yaml paths as strings
+    """
+    for dir_path, file_names in walk_directories(root_dir):
+        if HELM_CHART_FILE in file_names:
+            yield os.path.join(dir_path, HELM_CHART_FILE)
+
+
+def is_subchart(chart_path, root_dir):
+    """
+    A chart is a subchart if it was discovered under a 'charts/' directory of 'root_dir'
+    :param chart_path: path to Chart.yaml as string
+    :param root_dir: string
+    :return: boolean
+    """
+    relative_dir = os.path.relpath(os.path.dirname(chart_path), root_dir)
+    return HELM_SUBCHARTS_DIR in relative_dir.split(os.sep)
+
+
+class PybumpChartTree(object):
+    """
+    All Helm charts found under a directory, indexed once by chart name,
+    bumping the subcharts propagates their new versions to 'dependencies' of parent charts,
+    every chart is read once, its original text is kept for the report and to restore it if writing fails
+    """
+
+    def __init__(self, root_dir, read_only=False, lock_timeout=LOCK_TIMEOUT):
+        """
+        :param root_dir: string
+        :param read_only: boolean, if True charts are parsed with the fast loader and cannot be written
+        :param lock_timeout: seconds to wait for the lock of a chart held by another pybump writer
+        """
+        self.__root_dir = root_dir
+        self.__lock_timeout = lock_timeout
+        self.__charts = {}
+        self.__index = {}
+        self.__read_elapsed = {}
+        self.__original_versions = {}
+        self.__original_texts = {}
+        self.__changed_files = set()
+        for chart_path in find_helm_charts(root_dir):
+            start = time.perf_counter()
+            with open(chart_path, 'r') as stream:
+                text = read_bounded(chart_path, stream)
+            file_data = read_version_from_stream(chart_path, StringIO(text), False, read_only)
+            self.__read_elapsed[chart_path] = time.perf_counter() - start
+            self.__charts[chart_path] = file_data
+            self.__original_versions[chart_path] = file_data.get('version')
+            if not read_only:
+                self.__original_texts[chart_path] = text
+            self.__index.setdefault(file_data.get('file_content')['name'], []).append(chart_path)
+
+    @property
+    def charts(self):
+        return self.__charts
+
+    @property
+    def index(self):
+        """
+        :return: dict of chart name to list of Chart.yaml paths
+        """
+        return self.__index
+
+    def get_subcharts(self):
+        """
+        :return: list of subchart Chart.yaml paths
+        """
+        return [path for path in self.__charts if is_subchart(path, self.__root_dir)]
+
+    def get_versions(self):
+        """
+        :return: dict of Chart.yaml path to PybumpVersion
+        """
+        versions = {}
+        for path, file_data in self.__charts.items():
+            version = PybumpVersion(file_data.get('version'))
+            if not version.is_valid_semantic_version():
+                raise ValueError("Chart '{}' contains an invalid semantic version: {}"
+                                 .format(path, version.invalid_version))
+            versions[path] = version
+        return versions
+
+    def set_chart_version(self, chart_path, version):
+        """
+        :param chart_path: path to Chart.yaml as string
+        :param version: version to set as string
+        """
+        file_data = self.__charts[chart_path]
+        file_data['file_content'] = set_version_in_content(chart_path, file_data.get('file_content'), version, False)
+        file_data['version'] = version
+        self.__changed_files.add(chart_path)
+
+    def bump_subcharts(self, level, report=None):
+        """
+        Bump all subcharts, then propagate new versions to parent charts and write all changed files
+        :param level: string represents major|minor|patch
+        :param report: optional PybumpReport that writes and reports changed files
+        :return: tuple of (dict of subchart path to new PybumpVersion, list of propagated dependency updates)
+        """
+        versions = self.get_versions()
+        bumped = {}
+        for path in self.get_subcharts():
+            versions[path].bump_version(level)
+            bumped[path] = versions[path]
+            self.set_chart_version(path, str(versions[path]))
+        updates = self.propagate_dependencies(bumped)
+        self.write_files(report)
+        return bumped, updates
+
+    def set_subcharts_version(self, version, report=None):
+        """
+        Set the same version to all subcharts, then propagate it to parent charts and write all changed files
+        :param version: PybumpVersion object
+        :param report: optional PybumpReport that writes and reports changed files
+        :return: tuple of (dict of subchart path to new PybumpVersion, list of propagated dependency updates)
+        """
+        self.get_versions()
+        bumped = {}
+        for path in self.get_subcharts():
+            bumped[path] = version
+            self.set_chart_version(path, str(version))
+        updates = self.propagate_dependencies(bumped)
+        self.write_files(report)
+        return bumped, updates
+
+    def propagate_dependencies(self, new_versions):
+        """
+        Update 'dependencies[].version' of every chart that depends on a chart from 'new_versions',
+        only pinned (valid semantic version) entries that differ from the new version are patched,
+        version ranges like '~1.2.0' are left untouched
+        :param new_versions: dict of Chart.yaml path to new PybumpVersion
+        :return: list of (parent chart path, dependency name, old version, new version) tuples
+        """
+        versions_by_name = {}
+        for path, version in new_versions.items():
+            name = self.__charts[path].get('file_content')['name']
+            if versions_by_name.get(name, str(version)) != str(version):
+                raise ValueError("Chart name '{}' resolves to different versions: {}, {}"
+                                 .format(name, versions_by_name[name], version))
+            versions_by_name[name] = str(version)
+
+        updates = []
+        for path, file_data in self.__charts.items():
+            for dependency in file_data.get('file_content').get('dependencies') or []:
+                new_version = versions_by_name.get(dependency.get('name'))
+                old_version = dependency.get('version')
+                if new_version is None or old_version == new_version:
+                    continue
+                if not PybumpVersion(str(old_version)).is_valid_semantic_version():
+                    continue
+                dependency['version'] = new_version
+                self.__changed_files.add(path)
+                updates.append((path, dependency.get('name'), old_version, new_version))
+        return updates
+
+    def get_dependents_graph(self):
+        """
+        Build the dependency graph of all charts in a single pass over their 'dependencies',
+        a dependency is resolved by name to every chart with that name in the tree
+        :return: dict of Chart.yaml path to list of Chart.yaml paths of charts that depend on it
+        """
+        dependents = {path: [] for path in self.__charts}
+        for path, file_data in self.__charts.items():
+            for dependency in file_data.get('file_content').get('dependencies') or []:
+                for dependency_path in self.__index.get(dependency.get('name'), []):
+                    dependents[dependency_path].append(path)
+        return dependents
+
+    def get_release_order(self, dependents=None):
+        """
+        Order charts topologically (Kahn's algorithm), every chart comes after all charts it depends on
+        :param dependents: optional graph as returned by get_dependents_graph
+        :return: list of Chart.yaml paths
+        """
+        if dependents is None:
+            dependents = self.get_dependents_graph()
+        in_degree = dict.fromkeys(self.__charts, 0)
+        for paths in dependents.values():
+            for path in paths:
+                in_degree[path] += 1
+
+        queue = deque(path for path, degree in in_degree.items() if degree == 0)
+        order = []
+        while queue:
+            path = queue.popleft()
+            order.append(path)
+            for dependent in dependents[path]:
+                in_degree[dependent] -= 1
+                if in_degree[dependent] == 0:
+                    queue.append(dependent)
+
+        if len(order) != len(self.__charts):
+            raise ValueError("Dependency cycle between charts: {}"
+                             .format(', '.join(sorted(path for path, degree in in_degree.items() if degree))))
+        return order
+
+    def resolve_charts(self, charts):
+        """
+        :param charts: iterable of chart names, chart directories or Chart.yaml paths
+        :return: set of Chart.yaml paths
+        """
+        paths_by_location = {os.path.normpath(path): path for path in self.__charts}
+        result = set()
+        for chart in charts:
+            if chart in self.__index:
+                result.update(self.__index[chart])
+                continue
+            location = os.path.normpath(chart)
+            if os.path.basename(location) != HELM_CHART_FILE:
+                location = os.path.join(location, HELM_CHART_FILE)
+            if location not in paths_by_location:
+                raise ValueError("Chart '{}' was not found under {}".format(chart, self.__root_dir))
+            result.add(paths_by_location[location])
+        return result
+
+    def plan(self, changed, level='patch', dependent_level='patch'):
+        """
+        Compute the release train of changed charts, charts are visited once in release order,
+        a chart is bumped if it changed, or if a pinned 'dependencies[].version' entry of it has to be updated,
+        charts that depend on a dependency by range (like '~1.2.0') are not bumped
+        :param changed: iterable of chart names, chart directories or Chart.yaml paths that changed
+        :param level: string represents major|minor|patch, bump level of changed charts
+        :param dependent_level: string represents major|minor|patch, bump level of charts that depend on them
+        :return: list of (Chart.yaml path, chart name, old version, new version) tuples in release order
+        """
+        changed_paths = self.resolve_charts(changed)
+        new_versions_by_name = {}
+        plan = []
+        for path in self.get_release_order():
+            content = self.__charts[path].get('file_content')
+            if path in changed_paths:
+                chart_level = level
+            elif any(self.is_dependency_outdated(dependency, new_versions_by_name)
+                     for dependency in content.get('dependencies') or []):
+                chart_level = dependent_level
+            else:
+                continue
+
+            version = PybumpVersion(self.__charts[path].get('version'))
+            if not version.is_valid_semantic_version():
+                raise ValueError("Chart '{}' contains an invalid semantic version: {}"
+                                 .format(path, version.invalid_version))
+            old_version = str(version)
+            version.bump_version(chart_level)
+            name = content['name']
+            if new_versions_by_name.get(name, str(version)) != str(version):
+                raise ValueError("Chart name '{}' resolves to different versions: {}, {}"
+                                 .format(name, new_versions_by_name[name], version))
+            new_versions_by_name[name] = str(version)
+            plan.append((path, name, old_version, str(version)))
+        return plan
+
+    @staticmethod
+    def is_dependency_outdated(dependency, new_versions_by_name):
+        """
+        :param dependency: dict, a 'dependencies' entry of Chart.yaml
+        :param new_versions_by_name: dict of chart name to new version string
+        :return: boolean, True if the entry is pinned to a version other than the new version of the chart
+        """
+        new_version = new_versions_by_name.get(dependency.get('name'))
+        old_version = dependency.get('version')
+        return new_version is not None and old_version != new_version and \
+            PybumpVersion(str(old_version)).is_valid_semantic_version()
+
+    def apply_plan(self, plan, report=None):
+        """
+        Set new versions of a plan, update 'dependencies' of charts and write all changed files,
+        nothing is written until every change is computed
+        :param plan: list as returned by plan
+        :param report: optional PybumpReport that writes and reports changed files
+        :return: list of propagated dependency updates, see propagate_dependencies
+        """
+        new_versions = {}
+        for path, _, _, new_version in plan:
+            self.set_chart_version(path, new_version)
+            new_versions[path] = PybumpVersion(new_version)
+        updates = self.propagate_dependencies(new_versions)
+        self.write_files(report)
+        return updates
+
+    def write_files(self, report=None):
+        """
+        Write every changed Chart.yaml exactly once, under its lock (a shared lock on dry runs),
+        a chart whose version changed since it was read is not written (ValueError),
+        if writing any file fails, files that were already written are restored, so no partial release is left
+        :param report: optional PybumpReport that writes and reports changed files
+        """
+        dry_run = report is not None and report.dry_run
+        written = []
+        try:
+            for path in sorted(self.__changed_files):
+                file_data = self.__charts[path]
+                with PybumpFileLock(path, self.__lock_timeout, shared=dry_run) as file_lock:
+                    file_lock.check_version(self.__original_versions[path])
+                    if not dry_run:
+                        written.append(path)
+                    if report:
+                        report.write(path, file_data.get('file_type'), file_data.get('file_content'),
+                                     self.__original_versions[path], file_data.get('version'),
+                                     self.__read_elapsed[path], old_text=self.__original_texts[path])
+                    else:
+                        dump_content_to_file(path, file_data.get('file_content'))
+        except Exception:
+            for path in written:
+                with open(path, 'w') as stream:
+                    stream.write(self.__original_texts[path])
+            raise
+        self.__changed_files.clear()
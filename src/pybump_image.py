@@ -0,0 +1,231 @@
+import os
+import re
+import time
+
+try:
+    from .pybump import read_version_from_file, set_version_in_content, format_content, dump_content_to_file, \
+        walk_directories, PybumpFileLock, LOCK_TIMEOUT
+except ImportError:
+    from pybump import read_version_from_file, set_version_in_content, format_content, dump_content_to_file, \
+        walk_directories, PybumpFileLock, LOCK_TIMEOUT
+
+IMAGE_FILE_EXTENSIONS = ('.yaml', '.yml')
+# keys that name an image in a mapping: values.yaml 'image.repository', kustomization.yaml 'images[].name/newName'
+IMAGE_NAME_KEYS = ('repository', 'name', 'newName')
+# keys that hold the tag of the image named by a sibling key
+IMAGE_TAG_KEYS = ('tag', 'newTag')
+
+# a block mapping line, like '  tag: 1.2.3 # comment' or '- name: registry/app', the key column is the mapping column
+key_line_regex = re.compile(r"^(?P<indent> *)(?P<dash>- +)?(?P<key>[A-Za-z_][\w.-]*) *:(?: +|$)")
+# document separators of multi-document files
+document_separator_regex = re.compile(r"^(---|\.\.\.)(\s|$)")
+# https://docs.docker.com/reference/cli/docker/image/tag/, a tag is up to 128 word characters, dots and dashes
+docker_tag_regex = re.compile(r"^\w[\w.-]{0,127}$")
+
+
+def find_scalar(line, start):
+    """
+    Find the plain or quoted scalar value that starts at 'start', a trailing comment is not part of it
+    :param line: string without the line break
+    :param start: index of the value
+    :return: tuple of (value start, value end, value) without quotes, or None if the value is not a scalar
+        (like an empty value, a flow collection, a block scalar, an anchor or a template)
+    """
+    if start >= len(line) or line[start] in '{[|>&*!#':
+        return None
+    quote = line[start]
+    if quote in '"\'':
+        end = line.find(quote, start + 1)
+        if end < 0:
+            return None
+        start += 1
+    else:
+        comment = line.find(' #', start)
+        end = (len(line) if comment < 0 else comment)
+        end = start + len(line[start:end].rstrip())
+    value = line[start:end]
+    if not value or '{{' in value:
+        return None
+    return start, end, value
+
+
+def split_image_reference(reference):
+    """
+    Split an image reference like 'registry:5000/team/app:1.2.3' into its name and tag
+    :param reference: string
+    :return: tuple of (name, tag), tag is None for references without one, or with a digest (pinned by content)
+    """
+    if '@' in reference:
+        return reference.split('@', 1)[0], None
+    colon = reference.rfind(':')
+    if colon > reference.rfind('/'):
+        return reference[:colon], reference[colon + 1:]
+    return reference, None
+
+
+class PybumpImageUpdater(object):
+    """
+    Set the tag of an image across YAML files with a line level scanner instead of YAML round-trips,
+    comments, quotes and formatting are kept, and multi-document files are handled, matched fields are:
+        image: registry/app:1.2.3                       (Kubernetes manifests, values.yaml)
+        image: {repository: registry/app, tag: 1.2.3}   (values.yaml, as block mapping only)
+        images: [{name: registry/app, newTag: 1.2.3}]   (kustomization.yaml, as block sequence only)
+    """
+
+    def __init__(self, image, tag, lock_timeout=LOCK_TIMEOUT):
+        """
+        :param image: image name without tag, like 'registry.example.com/team/app'
+        :param tag: new tag as string
+        :param lock_timeout: seconds to wait for the lock of a file held by another pybump writer
+        """
+        if not docker_tag_regex.match(tag):
+            raise ValueError("Invalid image tag: '{}', a tag holds up to 128 letters, digits, '_', '.' and '-' "
+                             "(semantic version metadata '+' is not allowed)".format(tag))
+        self.__image = image
+        self.__tag = tag
+        self.__lock_timeout = lock_timeout
+
+    @property
+    def image(self):
+        return self.__image
+
+    @property
+    def tag(self):
+        return self.__tag
+
+    def update_text(self, text):
+        """
+        :param text: YAML text
+        :return: tuple of (new text, list of (line number, old tag) tuples), line numbers start at 1
+        """
+        lines = text.splitlines(keepends=True)
+        replacements = {}
+        # open block mappings by key column, every mapping is a dict of key to (line index, value start, end, value)
+        blocks = {}
+
+        def close_blocks(min_column):
+            for column in [column for column in blocks if column >= min_column]:
+                self.match_block(blocks.pop(column), replacements)
+
+        for index, line in enumerate(lines):
+            content = line.rstrip('\r\n')
+            if document_separator_regex.match(content):
+                close_blocks(0)
+                continue
+            match = key_line_regex.match(content)
+            if match is None:
+                stripped = content.lstrip(' ')
+                if stripped and not stripped.startswith('#'):
+                    # a sequence item or continuation line ends deeper mappings
+                    close_blocks(len(content) - len(stripped) + 1)
+                continue
+
+            indent = len(match.group('indent'))
+            column = match.end('dash') if match.group('dash') else indent
+            # a line ends the mappings deeper than its indent, a new sequence item also ends the mapping of its column
+            close_blocks(indent + 1)
+            scalar = find_scalar(content, match.end())
+            if scalar is None:
+                continue
+            blocks.setdefault(column, {})[match.group('key')] = (index,) + scalar
+            if match.group('key') == 'image':
+                name, old_tag = split_image_reference(scalar[2])
+                if name == self.__image and old_tag is not None:
+                    replacements[index] = (scalar[0] + len(name) + 1, scalar[1], old_tag)
+        close_blocks(0)
+
+        changes = []
+        for index in sorted(replacements):
+            start, end, old_tag = replacements[index]
+            if old_tag == self.__tag:
+                continue
+            lines[index] = lines[index][:start] + self.__tag + lines[index][end:]
+            changes.append((index + 1, old_tag))
+        return ''.join(lines), changes
+
+    def match_block(self, block, replacements):
+        """
+        Register the tag of a mapping that names the image, like {repository: registry/app, tag: 1.2.3}
+        :param block: dict of key to (line index, value start, value end, value)
+        :param replacements: dict of line index to (start, end, old tag), updated in place
+        """
+        if not any(key in block and block[key][3] == self.__image for key in IMAGE_NAME_KEYS):
+            return
+        for key in IMAGE_TAG_KEYS:
+            if key in block:
+                index, start, end, old_tag = block[key]
+                replacements[index] = (start, end, old_tag)
+
+    def update_files(self, paths, report=None, app_version=False):
+        """
+        Scan files and directories (hidden directories are skipped) for YAML files that use the image, and update them,
+        files that do not mention the image are not scanned line by line, files that do are read again and written
+        under their lock (a shared lock on dry runs)
+        :param paths: list of file or directory paths
+        :param report: optional PybumpReport that writes and reports changed files
+        :param app_version: boolean, if True also set appVersion of the Chart.yaml next to every changed values.yaml
+        :return: list of (path, line number, old tag, new tag) tuples, line number is None for appVersion changes
+        """
+        dry_run = report is not None and report.dry_run
+        result = []
+        for path in sorted(self.find_files(paths)):
+            start = time.perf_counter()
+            with open(path, 'r') as stream:
+                if self.__image not in stream.read():
+                    continue
+            with PybumpFileLock(path, self.__lock_timeout, shared=dry_run):
+                with open(path, 'r') as stream:
+                    text = stream.read()
+                new_text, changes = self.update_text(text)
+                if not changes:
+                    continue
+                old_tags = ','.join(sorted(set(old_tag for _, old_tag in changes)))
+                if report:
+                    report.write_text(path, 'image_tag', new_text, old_tags, self.__tag, time.perf_counter() - start,
+                                      {'lines': [line for line, _ in changes]}, old_text=text)
+                else:
+                    with open(path, 'w') as outfile:
+                        outfile.write(new_text)
+            result.extend((path, line, old_tag, self.__tag) for line, old_tag in changes)
+
+            chart_path = os.path.join(os.path.dirname(path), 'Chart.yaml')
+            if app_version and os.path.basename(path) == 'values.yaml' and os.path.isfile(chart_path):
+                result.extend(self.update_app_version(chart_path, report))
+        return result
+
+    def update_app_version(self, chart_path, report=None):
+        """
+        :param chart_path: path of a Chart.yaml
+        :param report: optional PybumpReport that writes and reports changed files
+        :return: list with a (path, None, old appVersion, new appVersion) tuple, empty if unchanged
+        """
+        with PybumpFileLock(chart_path, self.__lock_timeout, shared=report is not None and report.dry_run):
+            file_data = read_version_from_file(chart_path, True)
+            old_version = str(file_data.get('version'))
+            if old_version == self.__tag:
+                return []
+            file_content = set_version_in_content(chart_path, file_data.get('file_content'), self.__tag, True)
+            if report:
+                report.write_text(chart_path, file_data.get('file_type'), format_content(chart_path, file_content),
+                                  old_version, self.__tag)
+            else:
+                dump_content_to_file(chart_path, file_content)
+        return [(chart_path, None, old_version, self.__tag)]
+
+    @staticmethod
+    def find_files(paths):
+        """
+        :param paths: list of file or directory paths
+        :return: set of YAML file paths
+        """
+        files = set()
+        for path in paths:
+            if os.path.isdir(path):
+                for dir_path, file_names in walk_directories(path):
+                    files.update(os.path.join(dir_path, name) for name in file_names
+                                 if os.path.splitext(name)[1] in IMAGE_FILE_EXTENSIONS)
+            elif os.path.splitext(path)[1] in IMAGE_FILE_EXTENSIONS:
+                files.add(path)
+            else:
+                raise ValueError("Not a YAML file: {}".format(path))
+        return files
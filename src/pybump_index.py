@@ -0,0 +1,405 @@
+import json
+import os
+import stat
+from datetime import datetime, timezone
+from importlib import import_module
+
+try:
+    from .pybump import get_libyaml_loader, get_yaml_engine, shorten_content, read_version_from_file, \
+        PybumpFileLock, LOCK_TIMEOUT
+    from .pybump_version import sort_versions, max_version
+except ImportError:
+    from pybump import get_libyaml_loader, get_yaml_engine, shorten_content, read_version_from_file, \
+        PybumpFileLock, LOCK_TIMEOUT
+    from pybump_version import sort_versions, max_version
+
+# the sidecar index is written next to the Helm repository index, like index.yaml.pybump.json
+SIDECAR_SUFFIX = '.pybump.json'
+SIDECAR_FORMAT = 1
+# writers of the index lock a file next to it, a lock of index.yaml itself is lost when the file is replaced
+LOCK_SUFFIX = '.lock'
+
+COLLECTION_START_EVENTS = ('MappingStartEvent', 'SequenceStartEvent')
+COLLECTION_END_EVENTS = ('MappingEndEvent', 'SequenceEndEvent')
+
+
+def iter_yaml_events(stream):
+    """
+    Parse YAML into a stream of events without building documents, the C accelerated PyYAML (libyaml) parser
+    is used if installed, otherwise the ruamel parser, both emit events with the same class names
+    :param stream: text stream
+    :return: generator of events
+    """
+    libyaml_loader = get_libyaml_loader()
+    if libyaml_loader is not None:
+        pyyaml = import_module('yaml')
+        events, yaml_error = pyyaml.parse(stream, Loader=libyaml_loader), pyyaml.YAMLError
+    else:
+        events, yaml_error = get_yaml_engine('safe').parse(stream), import_module('ruamel.yaml').YAMLError
+    try:
+        yield from events
+    except yaml_error as exc:
+        raise ValueError("Invalid YAML: {}".format(shorten_content(exc)))
+
+
+def get_event_type(event):
+    return type(event).__name__
+
+
+def skip_node(events, event):
+    """
+    Consume the events of a node without building it
+    :param events: iterator of events
+    :param event: first event of the node
+    """
+    if get_event_type(event) not in COLLECTION_START_EVENTS:
+        return
+    depth = 1
+    while depth:
+        event_type = get_event_type(next(events))
+        if event_type in COLLECTION_START_EVENTS:
+            depth += 1
+        elif event_type in COLLECTION_END_EVENTS:
+            depth -= 1
+
+
+def compose_node(events, event):
+    """
+    Build a node from its events, scalars are kept as strings
+    :param events: iterator of events
+    :param event: first event of the node
+    :return: string, list or dict
+    """
+    event_type = get_event_type(event)
+    if event_type == 'MappingStartEvent':
+        node = {}
+        for key_event in events:
+            if get_event_type(key_event) == 'MappingEndEvent':
+                return node
+            node[compose_node(events, key_event)] = compose_node(events, next(events))
+    if event_type == 'SequenceStartEvent':
+        node = []
+        for item_event in events:
+            if get_event_type(item_event) == 'SequenceEndEvent':
+                return node
+            node.append(compose_node(events, item_event))
+    return getattr(event, 'value', None)
+
+
+def get_timestamp():
+    """
+    :return: current UTC time as RFC 3339 string, the format of 'created' and 'generated' of Helm indexes
+    """
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+
+def build_index_entry(chart_path, urls, digest=None, created=None):
+    """
+    Build the index entry of a chart version from its Chart.yaml, like 'helm repo index' does
+    :param chart_path: path of a Chart.yaml
+    :param urls: list of chart package URLs
+    :param digest: optional sha256 digest of the chart package
+    :param created: optional creation time string, default is now
+    :return: entry dict
+    """
+    entry = dict(read_version_from_file(chart_path, False).get('file_content'))
+    entry['urls'] = list(urls)
+    entry['created'] = created or get_timestamp()
+    if digest:
+        entry['digest'] = digest
+    return entry
+
+
+def format_index_entry(entry, indent):
+    """
+    Format an entry as an item of a block sequence, every value is written in JSON (flow) style,
+    which YAML parsers read as is, so no YAML emitter is needed
+    :param entry: entry dict
+    :param indent: column of the '-' of the item
+    :return: string of lines
+    """
+    return ''.join('{}{}: {}\n'.format(' ' * indent + ('- ' if index == 0 else '  '), key,
+                                       json.dumps(entry[key], default=str))
+                   for index, key in enumerate(sorted(entry)))
+
+
+def iter_mapping(events):
+    """
+    Iterate the pairs of a mapping whose start event was consumed, the caller must consume (or skip) every value
+    :param events: iterator of events
+    :return: generator of (key, first event of value) tuples
+    """
+    for key_event in events:
+        if get_event_type(key_event) == 'MappingEndEvent':
+            return
+        yield compose_node(events, key_event), next(events)
+
+
+class PybumpHelmIndex(object):
+    """
+    Query a Helm repository index.yaml without loading it, the index is streamed as YAML events,
+    entries of other charts are skipped without being built, and reading stops once the requested chart was read.
+    For repeated lookups an optional sidecar compact index (chart name to sorted versions) is built once,
+    and reused until the size or modification time of index.yaml changes
+    """
+
+    def __init__(self, index_path, sidecar=False, lock_timeout=LOCK_TIMEOUT):
+        """
+        :param index_path: path of a Helm repository index.yaml
+        :param sidecar: boolean, if True versions are read from (and cached in) the sidecar index
+        :param lock_timeout: seconds to wait for the lock of the index held by another pybump writer
+        """
+        self.__index_path = index_path
+        self.__sidecar = sidecar
+        self.__lock_timeout = lock_timeout
+        self.__sidecar_charts = None
+
+    @property
+    def index_path(self):
+        return self.__index_path
+
+    @property
+    def lock_path(self):
+        return self.__index_path + LOCK_SUFFIX
+
+    @property
+    def sidecar_path(self):
+        return self.__index_path + SIDECAR_SUFFIX
+
+    def iter_entries(self, chart=None, keys=None, names_only=False):
+        """
+        Stream the chart entries of the index
+        :param chart: optional chart name, only its entries are built, and reading stops after them
+        :param keys: optional tuple of entry keys to keep (like ('version',)), other values are skipped
+        :param names_only: boolean, if True entries are skipped and a (name, None) tuple is yielded per chart
+        :return: generator of (chart name, entry dict) tuples
+        """
+        with open(self.__index_path, 'r') as stream:
+            events = iter_yaml_events(stream)
+            for event in events:
+                if get_event_type(event) == 'MappingStartEvent':
+                    break
+            else:
+                raise ValueError("Invalid Helm repository index, expected a mapping: {}".format(self.__index_path))
+
+            for key, value_event in iter_mapping(events):
+                if key != 'entries' or get_event_type(value_event) != 'MappingStartEvent':
+                    skip_node(events, value_event)
+                    continue
+                for name, entries_event in iter_mapping(events):
+                    if names_only or (chart is not None and name != chart) or \
+                            get_event_type(entries_event) != 'SequenceStartEvent':
+                        skip_node(events, entries_event)
+                        if names_only:
+                            yield name, None
+                        continue
+                    for entry_event in events:
+                        if get_event_type(entry_event) == 'SequenceEndEvent':
+                            break
+                        if get_event_type(entry_event) != 'MappingStartEvent':
+                            skip_node(events, entry_event)
+                            continue
+                        entry = {}
+                        for entry_key, entry_value_event in iter_mapping(events):
+                            if keys is None or entry_key in keys:
+                                entry[entry_key] = compose_node(events, entry_value_event)
+                            else:
+                                skip_node(events, entry_value_event)
+                        yield name, entry
+                    if chart is not None:
+                        return
+                # keys after 'entries' (like 'generated') are not needed
+                return
+
+    def get_charts(self):
+        """
+        :return: sorted list of chart names
+        """
+        if self.__sidecar:
+            return sorted(self.load_sidecar())
+        return sorted(set(name for name, _ in self.iter_entries(names_only=True)))
+
+    def get_versions(self, chart):
+        """
+        :param chart: chart name
+        :return: list of valid semantic versions of the chart, from lowest to highest
+        """
+        if self.__sidecar:
+            charts = self.load_sidecar()
+            if chart not in charts:
+                raise ValueError("Chart '{}' not found in {}".format(chart, self.__index_path))
+            return charts[chart]
+
+        versions = [entry.get('version') for _, entry in self.iter_entries(chart, keys=('version',))]
+        if not versions:
+            raise ValueError("Chart '{}' not found in {}".format(chart, self.__index_path))
+        return sort_versions(versions, ignore_invalid=True)
+
+    def get_latest(self, chart, line=None):
+        """
+        :param chart: chart name
+        :param line: optional string, only versions of a major ('3') or major.minor ('3.1') line are considered
+        :return: highest version string, or None if the chart has no (matching) valid semantic version
+        """
+        return max_version(self.get_versions(chart), ignore_invalid=True, line=line)
+
+    def get_entry(self, chart, version):
+        """
+        :param chart: chart name
+        :param version: version string, as written in the index
+        :return: entry dict (like version, appVersion, digest, urls)
+        """
+        for _, entry in self.iter_entries(chart):
+            if entry.get('version') == version:
+                return entry
+        raise ValueError("Chart '{}' version '{}' not found in {}".format(chart, version, self.__index_path))
+
+    def locate_entry(self, chart, version):
+        """
+        Stream the index once, and find where a new entry of a chart is inserted:
+        before the first entry of the chart (Helm lists the newest version first),
+        or as a new chart key, before the first chart key that sorts after it
+        :param chart: chart name
+        :param version: version string of the new entry, it must not be in the index yet
+        :return: tuple of (line index, indent, new chart boolean, line index of 'generated' or None)
+        """
+        position = None
+        generated = None
+        with open(self.__index_path, 'r') as stream:
+            events = iter_yaml_events(stream)
+            for event in events:
+                if get_event_type(event) == 'MappingStartEvent':
+                    break
+            else:
+                raise ValueError("Invalid Helm repository index, expected a mapping: {}".format(self.__index_path))
+
+            for key_event in events:
+                if get_event_type(key_event) == 'MappingEndEvent':
+                    break
+                key = compose_node(events, key_event)
+                value_event = next(events)
+                if key == 'entries' and get_event_type(value_event) == 'MappingStartEvent':
+                    position = self.locate_in_entries(events, value_event, chart, version)
+                    continue
+                if key == 'generated' and value_event.end_mark.line == key_event.start_mark.line:
+                    generated = key_event.start_mark.line
+                skip_node(events, value_event)
+
+        if position is None:
+            raise ValueError("Invalid Helm repository index, expected an 'entries' mapping: {}"
+                             .format(self.__index_path))
+        return position + (generated,)
+
+    def locate_in_entries(self, events, entries_event, chart, version):
+        """
+        :param events: iterator of events, the start event of 'entries' was consumed
+        :param entries_event: start event of 'entries'
+        :param chart: chart name
+        :param version: version string of the new entry
+        :return: tuple of (line index, indent, new chart boolean)
+        """
+        if entries_event.flow_style:
+            raise ValueError("Entries of {} are in flow style (like {{}}), they cannot be updated in place"
+                             .format(self.__index_path))
+        position = None
+        for key_event in events:
+            if get_event_type(key_event) == 'MappingEndEvent':
+                # the end of a block mapping is marked at the next key, or at the end of the last line of the file
+                end_line = key_event.start_mark.line + (1 if key_event.start_mark.column else 0)
+                return position or (end_line, entries_event.start_mark.column, True)
+            name = compose_node(events, key_event)
+            value_event = next(events)
+            if name != chart:
+                if position is None and name > chart:
+                    position = (key_event.start_mark.line, key_event.start_mark.column, True)
+                skip_node(events, value_event)
+                continue
+            if get_event_type(value_event) != 'SequenceStartEvent' or value_event.flow_style:
+                raise ValueError("Entries of chart '{}' in {} are not a block sequence, they cannot be updated in place"
+                                 .format(chart, self.__index_path))
+            entries = compose_node(events, value_event)
+            if any(isinstance(entry, dict) and entry.get('version') == version for entry in entries):
+                raise ValueError("Chart '{}' version '{}' is already in {}".format(chart, version, self.__index_path))
+            position = (value_event.start_mark.line, value_event.start_mark.column, False)
+
+    def add_entry(self, entry):
+        """
+        Add a chart version without loading the index, the index is streamed once to find the position of the entry,
+        and copied line by line with the entry spliced in (and 'generated' set to now), to a temporary file first,
+        so readers never see a partial index, writers hold the lock of the index from locating the entry until
+        the index is replaced, so concurrent additions run one after the other
+        :param entry: entry dict, with at least 'name' and 'version', see build_index_entry
+        """
+        chart, version = entry.get('name'), entry.get('version')
+        if not chart or not version:
+            raise ValueError("Index entry must contain 'name' and 'version'")
+        with PybumpFileLock(self.lock_path, self.__lock_timeout, create=True):
+            self.splice_entry(entry, *self.locate_entry(chart, str(version)))
+
+    def splice_entry(self, entry, line_index, indent, new_chart, generated):
+        """
+        Copy the index with the entry inserted, see add_entry and locate_entry
+        :param entry: entry dict
+        :param line_index: line index the entry is inserted before
+        :param indent: column of the entry
+        :param new_chart: boolean, if True the chart key is inserted too
+        :param generated: line index of 'generated', or None
+        """
+        chart = entry.get('name')
+        text = format_index_entry(entry, indent)
+        if new_chart:
+            text = '{}{}:\n{}'.format(' ' * indent, chart, text)
+
+        temporary_path = '{}.{}.tmp'.format(self.__index_path, os.getpid())
+        with open(self.__index_path, 'r') as stream, open(temporary_path, 'w') as outfile:
+            index, line = -1, '\n'
+            for index, line in enumerate(stream):
+                if index == line_index:
+                    outfile.write(text)
+                if index == generated:
+                    line = '{}generated: "{}"\n'.format(line[:len(line) - len(line.lstrip())], get_timestamp())
+                outfile.write(line)
+            if line_index > index:
+                # the entry goes after the last line
+                outfile.write(text if line.endswith('\n') else '\n' + text)
+        os.chmod(temporary_path, stat.S_IMODE(os.stat(self.__index_path).st_mode))
+        os.replace(temporary_path, self.__index_path)
+
+    def get_source_stat(self):
+        source_stat = os.stat(self.__index_path)
+        return {'size': source_stat.st_size, 'mtime_ns': source_stat.st_mtime_ns}
+
+    def build_sidecar(self):
+        """
+        Stream the whole index once, and write the sidecar compact index
+        :return: dict of chart name to sorted list of versions
+        """
+        source = self.get_source_stat()
+        versions = {}
+        for name, entry in self.iter_entries(keys=('version',)):
+            versions.setdefault(name, []).append(entry.get('version'))
+        charts = {name: sort_versions(chart_versions, ignore_invalid=True) for name, chart_versions in versions.items()}
+
+        # written to a temporary file first, so readers never see a partial sidecar
+        temporary_path = '{}.{}.tmp'.format(self.sidecar_path, os.getpid())
+        with open(temporary_path, 'w') as outfile:
+            json.dump({'format': SIDECAR_FORMAT, 'source': source, 'charts': charts}, outfile, separators=(',', ':'))
+        os.replace(temporary_path, self.sidecar_path)
+        return charts
+
+    def load_sidecar(self):
+        """
+        Read the sidecar compact index, it is built (again) if missing or older than the index
+        :return: dict of chart name to sorted list of versions
+        """
+        if self.__sidecar_charts is None:
+            try:
+                with open(self.sidecar_path, 'r') as stream:
+                    sidecar = json.load(stream)
+            except (OSError, ValueError):
+                sidecar = {}
+            if sidecar.get('format') == SIDECAR_FORMAT and sidecar.get('source') == self.get_source_stat():
+                self.__sidecar_charts = sidecar['charts']
+            else:
+                self.__sidecar_charts = self.build_sidecar()
+        return self.__sidecar_charts
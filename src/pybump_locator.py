@@ -0,0 +1,338 @@
+import os
+import re
+from fnmatch import fnmatch
+from functools import lru_cache
+
+try:
+    import tomllib
+except ModuleNotFoundError:  # tomllib is part of the standard library only since python 3.11
+    import tomli as tomllib
+
+# locators are declared in the same config file as workspace groups
+LOCATORS_CONFIG = '.pybump.toml'
+LOCATOR_VERSION_GROUP = 'version'
+# number of config files whose compiled locators are kept, see load_locators
+LOCATORS_CACHE_SIZE = 32
+
+# a section header of INI / TOML files, like '[metadata]' or '[tool.poetry]'
+section_pattern = r"(?P<section>^[ \t]*\[{1,2}[ \t]*(?P<section_name>[^\[\]\n]+?)[ \t]*\]{1,2}[ \t]*(?:[#;].*)?$)"
+named_group_regex = re.compile(r"\(\?P(<|=)(\w+)")
+numbered_reference_regex = re.compile(r"\\[1-9]")
+
+
+class PybumpLocator(object):
+    """
+    User defined location of a version in files that pybump does not know, declared in the config file as either:
+        pattern: a regex with a named 'version' group, like 'LABEL version="(?P<version>[^"]+)"' in a Dockerfile
+        key: a key path of an INI / TOML file, like 'metadata.version' of setup.cfg ('section.key', or 'key' only
+             for keys outside of any section)
+    a 'separator' stores the version as numbers joined by it, like VERSION = (1, 2, 3) of _version.py
+    """
+
+    def __init__(self, name, files, pattern=None, key=None, separator=None):
+        """
+        :param name: locator name as string
+        :param files: list of glob patterns, matched against the file name, or the path relative to the config file
+            if the glob contains '/'
+        :param pattern: regex string with a (?P<version>...) group, exclusive with key
+        :param key: key path string, exclusive with pattern
+        :param separator: optional string that joins the numbers of the version instead of '.'
+        """
+        if not files or not isinstance(files, list) or not all(isinstance(glob, str) for glob in files):
+            raise ValueError("Locator '{}' must contain a non empty 'files' list".format(name))
+        if (pattern is None) == (key is None):
+            raise ValueError("Locator '{}' must contain exactly one of 'pattern' or 'key'".format(name))
+        if separator is not None and not (isinstance(separator, str) and separator.strip(' ')):
+            raise ValueError("Locator '{}' separator must be a non blank string".format(name))
+
+        if pattern is not None:
+            try:
+                compiled_pattern = re.compile(pattern, re.MULTILINE)
+            except (re.error, TypeError) as exc:
+                raise ValueError("Locator '{}' has an invalid pattern: {}".format(name, exc))
+            try:
+                # patterns are combined as groups of a single regex, where global inline flags like (?i) are invalid
+                re.compile('(?:{})'.format(pattern), re.MULTILINE)
+            except re.error as exc:
+                raise ValueError("Locator '{}' pattern cannot be combined with other locators ({}), "
+                                 "use scoped inline flags, like (?i:...)".format(name, exc))
+            if LOCATOR_VERSION_GROUP not in compiled_pattern.groupindex:
+                raise ValueError("Locator '{}' pattern must contain a (?P<{}>...) group"
+                                 .format(name, LOCATOR_VERSION_GROUP))
+            if numbered_reference_regex.search(pattern):
+                # locators of a file are combined into a single regex, so group numbers are not stable
+                raise ValueError("Locator '{}' pattern must use named back references, like (?P=name)".format(name))
+        elif not isinstance(key, str) or not re.match(r"^[\w-]+(\.[\w-]+)*$", key):
+            raise ValueError("Locator '{}' has an invalid key path: {}".format(name, key))
+
+        self.__name = name
+        self.__files = files
+        self.__pattern = pattern
+        self.__key = key
+        self.__separator = separator
+
+    @property
+    def name(self):
+        return self.__name
+
+    @property
+    def files(self):
+        return self.__files
+
+    @property
+    def pattern(self):
+        return self.__pattern
+
+    @property
+    def key(self):
+        return self.__key
+
+    @property
+    def separator(self):
+        return self.__separator
+
+    @property
+    def section(self):
+        """
+        :return: section name of a key locator, None for keys outside of any section
+        """
+        return self.__key.rpartition('.')[0] or None
+
+    def matches(self, relative_path):
+        """
+        :param relative_path: path relative to the config file, with '/' separators
+        :return: boolean
+        """
+        return any(fnmatch(relative_path if '/' in glob else relative_path.rpartition('/')[2], glob)
+                   for glob in self.__files)
+
+    def get_regex(self, index):
+        """
+        :param index: unique index of the locator in a combined regex
+        :return: regex string whose groups are suffixed by the index, the version is in group 'v<index>'
+        """
+        if self.__key is not None:
+            key_name = re.escape(self.__key.rpartition('.')[2])
+            # quotes of TOML strings are kept, comments of INI / TOML files are not part of the version
+            return r"(?P<l{0}>^[ \t]*{1}[ \t]*[=:][ \t]*(?P<q{0}>[\"']?)(?P<v{0}>[^\"'\s#;]+)(?P=q{0}))".format(
+                index, key_name)
+
+        def rename(match):
+            group_name = 'v{}'.format(index) if match.group(2) == LOCATOR_VERSION_GROUP \
+                else '{}_{}'.format(match.group(2), index)
+            return '(?P{}{}'.format(match.group(1), group_name)
+        return '(?P<l{}>{})'.format(index, named_group_regex.sub(rename, self.__pattern))
+
+    def to_version(self, value):
+        """
+        :param value: located string, like '1, 2, 3' with a ', ' separator
+        :return: version string, like '1.2.3'
+        """
+        if self.__separator is None:
+            return value
+        return '.'.join(part.strip() for part in value.split(self.__separator.strip()))
+
+    def from_version(self, version):
+        """
+        :param version: version string
+        :return: string to write at the located position
+        """
+        if self.__separator is None:
+            return version
+        if not re.match(r"^\d+(\.\d+)*$", version):
+            raise ValueError("Locator '{}' stores numbers only, it cannot hold version {}".format(self.__name, version))
+        return self.__separator.join(version.split('.'))
+
+
+class PybumpVersionScanner(object):
+    """
+    All locators of a file compiled into a single regex, so a file is scanned once regardless the number of locators,
+    key locators are matched only in their section, which is tracked by section header matches of the same scan
+    """
+
+    def __init__(self, locators):
+        """
+        :param locators: list of PybumpLocator objects
+        """
+        self.__locators = locators
+        patterns = [locator.get_regex(index) for index, locator in enumerate(locators)]
+        if any(locator.key is not None for locator in locators):
+            patterns.insert(0, section_pattern)
+        self.__regex = re.compile('|'.join(patterns), re.MULTILINE)
+
+    @property
+    def locators(self):
+        return self.__locators
+
+    def find(self, text):
+        """
+        :param text: file content as string
+        :return: list of (locator, start, end, value) tuples in file order
+        """
+        result = []
+        section = None
+        for match in self.__regex.finditer(text):
+            if match.lastgroup == 'section':
+                section = match.group('section_name')
+                continue
+            index = int(match.lastgroup[1:])
+            locator = self.__locators[index]
+            if locator.key is not None and locator.section != section:
+                continue
+            group_name = 'v{}'.format(index)
+            result.append((locator, match.start(group_name), match.end(group_name), match.group(group_name)))
+        return result
+
+    def get_version(self, file_path, text):
+        """
+        :param file_path: path used in error messages
+        :param text: file content as string
+        :return: version string, all located versions must be equal
+        """
+        versions = sorted(set(locator.to_version(value) for locator, _, _, value in self.find(text)))
+        if len(versions) > 1:
+            raise RuntimeError("More than one 'version' found in {}: {}".format(file_path, versions))
+        if not versions:
+            raise RuntimeError("Unable to find version string in {} with locators: {}".format(
+                file_path, ', '.join(locator.name for locator in self.__locators)))
+        return versions[0]
+
+    def set_version(self, text, version):
+        """
+        Replace ALL located versions
+        :param text: file content as string
+        :param version: version string
+        :return: new file content
+        """
+        parts = []
+        position = 0
+        for locator, start, end, _ in self.find(text):
+            parts.extend((text[position:start], locator.from_version(version)))
+            position = end
+        parts.append(text[position:])
+        return ''.join(parts)
+
+
+class PybumpLocatedText(object):
+    """
+    Content of a file read with user defined locators, keeps the text and the scanner that located its version
+    """
+
+    def __init__(self, text, scanner):
+        self.__text = text
+        self.__scanner = scanner
+
+    @property
+    def text(self):
+        return self.__text
+
+    @property
+    def scanner(self):
+        return self.__scanner
+
+    def with_version(self, version):
+        """
+        :param version: version string
+        :return: new PybumpLocatedText object
+        """
+        return PybumpLocatedText(self.__scanner.set_version(self.__text, version), self.__scanner)
+
+
+def parse_locators(content):
+    """
+    Parse the [locators.<name>] tables of a config file, for example:
+
+    [locators.dockerfile]
+    files = ["Dockerfile"]
+    pattern = '^LABEL version="(?P<version>[^"]+)"'
+
+    [locators.setup_cfg]
+    files = ["setup.cfg"]
+    key = "metadata.version"
+
+    :param content: config content as string
+    :return: list of PybumpLocator objects, empty if the config has no locators
+    """
+    try:
+        config = tomllib.loads(content)
+    except tomllib.TOMLDecodeError as exc:
+        raise ValueError("Invalid locators config: {}".format(exc))
+    locators = config.get('locators', {})
+    if not isinstance(locators, dict):
+        raise ValueError("Locators must be declared as [locators.<name>] tables")
+
+    result = []
+    for name, locator in locators.items():
+        if not isinstance(locator, dict):
+            raise ValueError("Locator '{}' must be a table".format(name))
+        unknown_keys = set(locator) - {'files', 'pattern', 'key', 'separator'}
+        if unknown_keys:
+            raise ValueError("Locator '{}' has unknown keys: {}".format(name, ', '.join(sorted(unknown_keys))))
+        result.append(PybumpLocator(name, locator.get('files'), locator.get('pattern'), locator.get('key'),
+                                    locator.get('separator')))
+    return result
+
+
+class PybumpLocators(object):
+    """
+    Locators of a config file, a scanner is compiled once per combination of locators that match a file
+    """
+
+    def __init__(self, config_path=LOCATORS_CONFIG, content=None):
+        """
+        :param config_path: path to config file as string, file globs are relative to its directory
+        :param content: optional config content as string (like a staged blob), read from config_path if None
+        """
+        self.__config_path = config_path
+        self.__root_dir = os.path.dirname(os.path.abspath(config_path))
+        if content is None:
+            with open(config_path, 'r') as stream:
+                content = stream.read()
+        self.__locators = parse_locators(content)
+        self.__scanners = {}
+
+    def __len__(self):
+        return len(self.__locators)
+
+    @property
+    def config_path(self):
+        return self.__config_path
+
+    @property
+    def locators(self):
+        return self.__locators
+
+    def get_scanner(self, file_path):
+        """
+        :param file_path: path to file as string
+        :return: PybumpVersionScanner of the locators that match the file, None if no locator matches
+        """
+        relative_path = os.path.relpath(os.path.abspath(file_path), self.__root_dir).replace(os.sep, '/')
+        matching = tuple(index for index, locator in enumerate(self.__locators) if locator.matches(relative_path))
+        if not matching:
+            return None
+        if matching not in self.__scanners:
+            self.__scanners[matching] = PybumpVersionScanner([self.__locators[index] for index in matching])
+        return self.__scanners[matching]
+
+
+@lru_cache(maxsize=LOCATORS_CACHE_SIZE)
+def get_cached_locators(config_path, mtime_ns):
+    """
+    Locators of a config file, cached by (config_path, mtime_ns) so a changed config is loaded again,
+    at most LOCATORS_CACHE_SIZE (32) configs are kept, the least recently used is dropped first
+    :param config_path: absolute path to config file as string
+    :param mtime_ns: modification time of the config file in nanoseconds, part of the cache key only
+    :return: PybumpLocators object
+    """
+    return PybumpLocators(config_path)
+
+
+def load_locators(config_path=LOCATORS_CONFIG):
+    """
+    Load the locators of a config file once per process, the config is loaded again only if it changed
+    :param config_path: path to config file as string
+    :return: PybumpLocators object
+    """
+    config_path = os.path.abspath(config_path)
+    return get_cached_locators(config_path, os.stat(config_path).st_mtime_ns)
@@ -1,11 +1,169 @@
+import json
+import os
 import re
-from pybump_version import PybumpVersion
+import threading
+from bisect import bisect_left, bisect_right
+from concurrent.futures import Future, ThreadPoolExecutor
+from operator import itemgetter
+from urllib.error import URLError
+from urllib.request import urlopen
+
+try:
+    from .pybump import import_optional_module
+    from .pybump_version import PybumpVersion, get_sort_key
+except ImportError:
+    from pybump import import_optional_module
+    from pybump_version import PybumpVersion, get_sort_key
+
+# operators of the specifier clause that holds the current version of a requirement
+REQUIREMENT_VERSION_OPERATORS = ('==', '===', '>=', '~=')
+# pinning operators, ignored when looking for updates, since they only allow the current version
+PIN_OPERATORS = ('==', '===')
+PYPI_JSON_URL = 'https://pypi.org/pypi/{}/json'
+PYPI_TIMEOUT = 30
+# lockfiles that list packages as TOML '[[package]]' tables, other lockfiles are read as pinned requirements files
+# (like pip-compile output)
+TOML_LOCKFILE_NAMES = ('poetry.lock', 'uv.lock', 'pdm.lock')
+
+# a line of a TOML lockfile, like '[[package]]', '[package.source]', 'name = "pyyaml"' or 'source = { editable = "." }'
+lock_table_regex = re.compile(r"^\[\[?\s*([\w.-]+)\s*\]\]?\s*(?:#.*)?$")
+lock_key_regex = re.compile(r"^(name|version)\s*=\s*[\"']([^\"']*)[\"']")
+lock_source_regex = re.compile(r"^source\s*=\s*\{(.*)\}")
+# a pinned requirement, like 'pyyaml==6.0.1 \' or 'uvicorn[standard]==0.29.0 ; python_version >= "3.8"'
+pinned_requirement_regex = re.compile(r"^([A-Za-z0-9][A-Za-z0-9._-]*)\s*(?:\[[^\]]*\])?\s*===?\s*([^\s;\\]+)")
+
+
+class PybumpReleaseIndex(object):
+    """
+    Releases of a package sorted once by semantic version precedence,
+    so the latest release of a major/minor line is found with bisection instead of a scan of all releases,
+    releases that are not a semantic version are skipped
+    """
+
+    def __init__(self, releases):
+        keyed_releases = [(get_sort_key(release), release) for release in releases]
+        keyed_releases = sorted((item for item in keyed_releases if item[0] is not None), key=itemgetter(0))
+        self.__keys = [key for key, _ in keyed_releases]
+        self.__releases = [release for _, release in keyed_releases]
+
+    def __len__(self):
+        return len(self.__releases)
+
+    @property
+    def releases(self):
+        return self.__releases
+
+    def get_latest(self, line=(), predicate=None, upper_bound=None):
+        """
+        Return the highest release of a line that satisfies 'predicate',
+        releases are checked from the top of the line (or 'upper_bound') downwards, so usually only one is checked
+        :param line: tuple of ints, () for all releases, (X,) for a major line or (X, Y) for a minor line
+        :param predicate: optional callable that gets a release string and returns boolean
+        :param upper_bound: optional tuple of (sort key, inclusive), releases above it are skipped without checks
+        :return: release string, or None if no release matches
+        """
+        if line:
+            upper = bisect_left(self.__keys, line[:-1] + (line[-1] + 1,))
+        else:
+            upper = len(self.__keys)
+        if upper_bound is not None:
+            bound_key, inclusive = upper_bound
+            upper = min(upper, (bisect_right if inclusive else bisect_left)(self.__keys, bound_key))
+
+        for index in range(upper - 1, -1, -1):
+            if self.__keys[index][:len(line)] != line:
+                break
+            if predicate is None or predicate(self.__releases[index]):
+                return self.__releases[index]
+        return None
+
+
+class PybumpRequirement(object):
+    """
+    A requirement string parsed once with packaging (PEP 508),
+    like 'GitPython[ssh]>=3.1,!=3.1.5,<4; python_version>"3.8"',
+    the specifier clauses (except pinning ones) are compiled into a predicate of allowed updates,
+    and upper bound clauses ('<', '<=') into a sort key that bounds the search of a PybumpReleaseIndex
+    """
+
+    def __init__(self, requirement_string):
+        requirements = import_optional_module('packaging.requirements', 'patch')
+        self.__specifiers = import_optional_module('packaging.specifiers', 'patch')
+        self.__invalid_version_error = import_optional_module('packaging.version', 'patch').InvalidVersion
+
+        # comments are not part of PEP 508
+        requirement_string = requirement_string.split('#')[0].strip()
+        try:
+            self.__requirement = requirements.Requirement(requirement_string)
+        except requirements.InvalidRequirement as exc:
+            raise ValueError("Invalid requirement '{}': {}".format(requirement_string, exc))
+
+        specifier_set = self.__requirement.specifier
+        self.__version = next((specifier.version for specifier in specifier_set
+                               if specifier.operator in REQUIREMENT_VERSION_OPERATORS), None)
+        self.__update_specifier = self.__specifiers.SpecifierSet(','.join(
+            str(specifier) for specifier in specifier_set if specifier.operator not in PIN_OPERATORS))
+        self.__upper_bound = self.get_upper_bound(specifier_set)
+
+    @property
+    def name(self):
+        return self.__requirement.name
+
+    @property
+    def extras(self):
+        return self.__requirement.extras
+
+    @property
+    def marker(self):
+        return self.__requirement.marker
+
+    @property
+    def specifier(self):
+        return self.__requirement.specifier
+
+    @property
+    def version(self):
+        return self.__version
+
+    @property
+    def upper_bound(self):
+        return self.__upper_bound
+
+    @staticmethod
+    def get_upper_bound(specifier_set):
+        """
+        :param specifier_set: packaging SpecifierSet
+        :return: tuple of (sort key, inclusive) of the lowest '<' / '<=' clause, or None
+        """
+        bounds = []
+        for specifier in specifier_set:
+            if specifier.operator not in ('<', '<='):
+                continue
+            numbers = specifier.version.split('.')
+            if not 1 <= len(numbers) <= 3 or not all(number.isdigit() for number in numbers):
+                # pre-release, epoch or wildcard bounds are left to the predicate
+                continue
+            key = tuple(int(number) for number in numbers) + (0,) * (3 - len(numbers))
+            # '<X.Y.Z' excludes pre-releases of X.Y.Z too, '<=X.Y.Z' includes X.Y.Z itself
+            bounds.append((key + ((1,),), True) if specifier.operator == '<=' else (key, False))
+        return min(bounds) if bounds else None
+
+    def is_update_allowed(self, release):
+        """
+        :param release: release string
+        :return: boolean, True if 'release' satisfies all clauses except pinning ones
+        """
+        try:
+            return self.__update_specifier.contains(release)
+        except self.__invalid_version_error:
+            return False
 
 
 class PybumpPatchableVersion(object):
-    def __init__(self, package_name, version):
+    def __init__(self, package_name, version, requirement=None):
         self.__package_name = package_name
         self.__version = version
+        self.__requirement = requirement
         self.patchable = False
         self.latest_patch = None
 
@@ -17,41 +175,35 @@ class PybumpPatchableVersion(object):
     def version(self):
         return self.__version
 
+    @property
+    def requirement(self):
+        return self.__requirement
+
     def identify_possible_patch(self, releases_list):
         """
         check if there is a possible patch version (in releases_list) newer than self.__version,
-        get list of semantic versions, for example ['0.1.2', '0.1.3', '0.3.1', '0.3.2']
+        get list of semantic versions, for example ['0.1.2', '0.1.3', '0.3.1', '0.3.2'],
+        if the version came from a requirement, candidates must also satisfy its other clauses (like '!=', '<')
 
-        param releases_list: list of strings
+        param releases_list: list of strings, or a PybumpReleaseIndex (reused for requirements of the same package)
         """
         if not releases_list:
             raise ValueError('releases_list cannot be empty')
+        release_index = releases_list if isinstance(releases_list, PybumpReleaseIndex) \
+            else PybumpReleaseIndex(releases_list)
 
-        # assume self.__version is the latest version
-        latest_patch_version = self.__version
-
-        for release in releases_list:
-            release_patch_candidate = PybumpVersion(release)
+        predicate, upper_bound = None, None
+        if self.__requirement is not None:
+            predicate, upper_bound = self.__requirement.is_update_allowed, self.__requirement.upper_bound
+        # the highest release of the same major.minor line, so if version_to_patch is [0, 3, 1],
+        # and releases are [0, 3, 2] and [0, 3, 3], then [0, 3, 3] is found
+        latest_release = release_index.get_latest(tuple(self.__version.version[:2]), predicate, upper_bound)
 
-            if not release_patch_candidate.is_valid_semantic_version():
-                # current 'release' does not meet semantic version, skip
-                continue
-
-            # check if version_to_patch is patchable
-            if not self.is_patchable(release_patch_candidate.version, self.__version.version):
-                continue
-
-            # at this point possible patch version found, so if version_to_patch is [0, 3, 1],
-            # and current iteration over releases_list is [0, 3, 2] then it matches for a patch,
-            # but there also might be a release with version [0, 3, 3] and even newer, we need to find most recent.
-            # calculate the highest value found for patch (for cases when the 'releases' is not sorted)
-            if release_patch_candidate.version[2] > latest_patch_version.version[2]:
-                latest_patch_version = release_patch_candidate
+        latest_patch_version = self.__version
+        if latest_release is not None and PybumpVersion(latest_release).is_larger_then(self.__version):
+            latest_patch_version = PybumpVersion(latest_release)
 
-        if latest_patch_version.is_larger_then(self.__version):
-            self.patchable = True
-        else:
-            self.patchable = False
+        self.patchable = latest_patch_version is not self.__version
         self.latest_patch = latest_patch_version
 
     def get_dict(self):
@@ -99,6 +251,66 @@ def get_pypi_package_releases(package_name):
     return result.json()
 
 
+def fetch_json(url, timeout):
+    """
+    Blocking HTTP GET of a JSON document with the standard library
+    :param url: string
+    :param timeout: seconds
+    :return: parsed JSON
+    """
+    try:
+        with urlopen(url, timeout=timeout) as response:
+            return json.load(response)
+    except URLError as exc:
+        raise RuntimeError('error occurred fetching {}: {}'.format(url, exc))
+
+
+def fetch_pypi_package_releases(package_name, timeout=PYPI_TIMEOUT):
+    """
+    :param package_name: string, pypi project name
+    :param timeout: seconds
+    :return: json with pypi project response
+    """
+    return fetch_json(PYPI_JSON_URL.format(package_name), timeout)
+
+
+class PybumpReleaseCache(object):
+    """
+    Thread safe cache of package release indexes, shared by many requirements files (like a fan-out over repositories),
+    every package is fetched once, threads that ask for a package being fetched wait for that fetch
+    """
+
+    def __init__(self, fetch=None):
+        """
+        :param fetch: optional callable that gets a package name and returns the PYPI json response,
+            default is fetch_pypi_package_releases
+        """
+        self.__fetch = fetch or fetch_pypi_package_releases
+        self.__futures = {}
+        self.__lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.__futures)
+
+    def get_index(self, package_name):
+        """
+        :param package_name: string, pypi project name
+        :return: PybumpReleaseIndex object
+        """
+        key = normalize_package_name(package_name)
+        with self.__lock:
+            future = self.__futures.get(key)
+            is_owner = future is None
+            if is_owner:
+                future = self.__futures[key] = Future()
+        if is_owner:
+            try:
+                future.set_result(PybumpReleaseIndex(self.__fetch(package_name).get('releases', {}).keys()))
+            except Exception as exc:
+                future.set_exception(exc)
+        return future.result()
+
+
 def get_setup_py_install_requires(content):
     """
     Extract 'install_requires' value using regex from 'content',
@@ -135,7 +347,9 @@ def get_versions_from_requirements(requirements_list):
     coverage != 3.5             # Version Exclusion. Anything except version 3.5
     pybump ~= 1.1               # Compatible release. Same as >= 1.1, == 1.*
 
-    the function is interested only in exact version match (case '=='), and will not consider '!=' patching
+    every requirement is parsed once with packaging (see PybumpRequirement), so extras, markers,
+    and multi clause specifiers (like 'GitPython>=3.1,!=3.1.5,<4') are supported,
+    the version is taken from the first '==', '>=' or '~=' clause, the rest of the clauses limit possible patches,
     brake python requirements list, in the form of ['package_a', 'package_b ==1.5.6', 'package_c>=  3.0 #   comment'],
     for example
     ['pyyaml==5.3.1', 'pybump', 'GitPython>=3.1']
@@ -145,29 +359,163 @@ def get_versions_from_requirements(requirements_list):
     """
     dependencies = []
     for req in requirements_list:
-        # a valid package requirement can be "GitPython  == 3.1.27 # comment here"
-        # split name from version by all allowed operators
-        package_array = re.split("==|>=|~=", req)
+        try:
+            requirement = PybumpRequirement(req)
+        except ValueError:
+            # not a valid requirement, keep the name part so it is still reported
+            package_name = re.split("[=<>!~;\\[ ]", req.strip(), maxsplit=1)[0]
+            dependencies.append(PybumpPatchableVersion(package_name, PybumpVersion('invalid')))
+            continue
+
+        # a requirement without a version clause (like 'pyyaml') has an invalid version
+        version = PybumpVersion(requirement.version if requirement.version else 'invalid')
+        dependencies.append(PybumpPatchableVersion(requirement.name, version, requirement))
 
-        if len(package_array) != 2:
-            # if after split, a list that is not of type ["name", "ver"] returned, then the delimiter is not valid
-            version = PybumpVersion('invalid')
-        else:  # else the object will have a (probably) valid semantic version
-            # the "ver" part can be like " 3.1.27 # comment here" with a comment
-            # the semantic version also needs to get extracted
-            raw_version = package_array[1].split("#")
-            version = PybumpVersion(raw_version[0].strip())
+    return dependencies
 
-        # get package name and strip all spaces so "GitPython  " becomes "GitPython"
-        package_name = package_array[0].strip()
 
-        # append current package
-        dependencies.append(PybumpPatchableVersion(package_name, version))
+def normalize_package_name(package_name):
+    """
+    :param package_name: string, pypi project name
+    :return: name normalized as described in PEP 503, so 'PyYAML' and 'pyyaml' are the same package
+    """
+    return re.sub(r"[-_.]+", "-", package_name).lower()
 
-    return dependencies
+
+def iter_toml_lock_packages(stream):
+    """
+    Stream the (name, version) pairs of a TOML lockfile (poetry.lock, uv.lock, pdm.lock) line by line,
+    a package is yielded once its table ends, without parsing the document,
+    packages that are not installed from an index (a '[package.source]' table of poetry,
+    or an editable, virtual, path or git 'source' of uv) are skipped
+    :param stream: text stream
+    :return: generator of (name, version) tuples
+    """
+    # keys of the current '[[package]]' table, None outside of one
+    package = None
+    in_package_table = False
+    for line in stream:
+        table_match = lock_table_regex.match(line)
+        if table_match is None:
+            if in_package_table:
+                key_match = lock_key_regex.match(line)
+                source_match = lock_source_regex.match(line)
+                if key_match:
+                    package.setdefault(key_match.group(1), key_match.group(2))
+                elif source_match and 'registry' not in source_match.group(1):
+                    package['skip'] = True
+            continue
+
+        if line.startswith('[['):
+            # an array table header ends the previous package
+            if package and not package.get('skip') and package.get('name') and package.get('version'):
+                yield package['name'], package['version']
+            package = {} if table_match.group(1) == 'package' else None
+            in_package_table = package is not None
+        else:
+            # sub-tables (like '[package.dependencies]') have no package keys, '[package.source]' marks a non index one
+            if package is not None and table_match.group(1) == 'package.source':
+                package['skip'] = True
+            in_package_table = False
+    if package and not package.get('skip') and package.get('name') and package.get('version'):
+        yield package['name'], package['version']
+
+
+def iter_pinned_requirements(stream):
+    """
+    Stream the (name, version) pairs of a pinned requirements file (like pip-compile output),
+    hashes, comments, pip options and requirements that are not pinned with '==' are skipped
+    :param stream: text stream
+    :return: generator of (name, version) tuples
+    """
+    for line in stream:
+        match = pinned_requirement_regex.match(line.strip())
+        if match:
+            yield match.group(1), match.group(2)
+
+
+def iter_lockfile_packages(file_path):
+    """
+    :param file_path: path of a poetry.lock, uv.lock, pdm.lock, or a pinned requirements file
+    :return: generator of (name, version) tuples
+    """
+    with open(file_path, 'r') as stream:
+        if os.path.basename(file_path) in TOML_LOCKFILE_NAMES:
+            yield from iter_toml_lock_packages(stream)
+        else:
+            yield from iter_pinned_requirements(stream)
+
+
+def get_locked_packages(file_paths):
+    """
+    Read lockfiles and dedupe their packages, a package version shared by many lockfiles is kept once
+    :param file_paths: list of lockfile paths
+    :return: dict of (normalized name, version) to (name, sorted list of lockfile paths)
+    """
+    packages = {}
+    for file_path in file_paths:
+        for name, version in iter_lockfile_packages(file_path):
+            key = (normalize_package_name(name), version)
+            if key not in packages:
+                packages[key] = (name, set())
+            packages[key][1].add(file_path)
+    return {key: (name, sorted(paths)) for key, (name, paths) in packages.items()}
 
 
-def check_available_python_patches(requirements_list=None):
+def check_locked_patches(file_paths, release_cache=None, max_workers=8):
+    """
+    Check the packages of many lockfiles for patch updates, every unique (package, version) is checked once,
+    and the releases of every unique package are fetched once, by a bounded pool of worker threads,
+    return will be in the form of:
+    [
+        {'package_name': 'pyyaml', 'version': '5.3.1', 'patchable': True, 'latest_patch': '5.3.2',
+         'files': ['app/poetry.lock', 'lib/requirements.txt']},
+    ]
+    :param file_paths: list of lockfile paths
+    :param release_cache: optional PybumpReleaseCache, default fetches releases from PYPI
+    :param max_workers: maximum releases fetched at once
+    :return: list of dicts sorted by package name and version, versions that are not a semantic version are skipped,
+        packages whose releases could not be fetched have an 'error' key
+    """
+    if max_workers < 1:
+        raise ValueError("Error, max_workers must be at least 1, got: {}".format(max_workers))
+    if release_cache is None:
+        release_cache = PybumpReleaseCache()
+
+    packages = []
+    for (_, version), (name, paths) in get_locked_packages(file_paths).items():
+        # a locked version is checked as a pinned requirement, so pre-releases are not patches
+        package = get_versions_from_requirements(['{}=={}'.format(name, version)])[0]
+        if package.version.is_valid_semantic_version():
+            packages.append((package, paths))
+
+    def fetch_releases(package_name):
+        try:
+            release_cache.get_index(package_name)
+        except Exception:
+            # the error is kept by the cache, and reported with every version of the package
+            pass
+
+    # releases are fetched in parallel, once per unique package name
+    names = {normalize_package_name(package.package_name): package.package_name for package, _ in packages}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(fetch_releases, names.values()))
+
+    result = []
+    for package, paths in packages:
+        record = {'files': paths}
+        try:
+            package.identify_possible_patch(release_cache.get_index(package.package_name))
+        except (OSError, ValueError, RuntimeError) as exc:
+            # like a private package that is not on PYPI, other packages are still checked
+            record['error'] = str(exc)
+            package.latest_patch = package.version
+        result.append(dict(package.get_dict(), **record))
+    return sorted(result, key=lambda item: (normalize_package_name(item['package_name']),
+                                            get_sort_key(item['version'])))
+
+
+def check_available_python_patches(requirements_list=None, release_cache=None):
     """
     get list of python requirements and return a list of dicts with possible patchable dependencies versions,
     return will be in the form of:
@@ -176,6 +524,7 @@ def check_available_python_patches(requirements_list=None):
         {'package_name': 'GitPython', 'version': '3.1.7', 'patchable': True, 'latest_patch': '3.1.12'}
     ]
     :param requirements_list: content of setup.py file
+    :param release_cache: optional PybumpReleaseCache, releases are fetched through it instead of once per requirement
     :return: list of dicts
     """
     requirements_versions = get_versions_from_requirements(requirements_list)
@@ -183,11 +532,14 @@ def check_available_python_patches(requirements_list=None):
     patchable_packages_array = []
     for requirement in requirements_versions:
         if requirement.version.is_valid_semantic_version():
-            # get current package info (as json) from pypi api
-            package_releases = get_pypi_package_releases(requirement.package_name)
-
-            # convert keys of the 'releases' dict, into a list (only version numbers),
-            releases_list = package_releases.get('releases').keys()  # releases_list is a list of strings
+            if release_cache is not None:
+                releases_list = release_cache.get_index(requirement.package_name)
+            else:
+                # get current package info (as json) from pypi api
+                package_releases = get_pypi_package_releases(requirement.package_name)
+
+                # convert keys of the 'releases' dict, into a list (only version numbers),
+                releases_list = package_releases.get('releases').keys()  # releases_list is a list of strings
             requirement.identify_possible_patch(releases_list)
             patchable_packages_array.append(requirement.get_dict())
 
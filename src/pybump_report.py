@@ -0,0 +1,142 @@
+import difflib
+import json
+import sys
+import time
+
+try:
+    from .pybump import format_content
+except ImportError:
+    from pybump import format_content
+
+OUTPUT_FORMATS = ('text', 'json', 'ndjson')
+
+
+def count_changed_bytes(old_text, new_text):
+    """
+    Return the size of the changed region between two texts,
+    the common prefix and suffix are skipped, so replacing '1.0.9' with '1.0.10' counts 2 bytes
+    :param old_text: string
+    :param new_text: string
+    :return: int
+    """
+    old_bytes = old_text.encode('utf-8')
+    new_bytes = new_text.encode('utf-8')
+    max_common = min(len(old_bytes), len(new_bytes))
+
+    prefix = 0
+    while prefix < max_common and old_bytes[prefix] == new_bytes[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < max_common - prefix and old_bytes[-1 - suffix] == new_bytes[-1 - suffix]:
+        suffix += 1
+    return max(len(old_bytes), len(new_bytes)) - prefix - suffix
+
+
+class PybumpReport(object):
+    """
+    Write changed files and report each one as soon as it completes,
+    'text' prints a unified diff on dry runs (unless quiet), 'json' streams a JSON array,
+    'ndjson' streams a JSON object per line
+    """
+
+    def __init__(self, output='text', dry_run=False, stream=None, quiet=False):
+        """
+        :param output: text|json|ndjson
+        :param dry_run: boolean, if True files are not written
+        :param stream: optional text stream, default is stdout
+        :param quiet: boolean, if True text output prints nothing, json formats are printed anyway
+        """
+        if output not in OUTPUT_FORMATS:
+            raise ValueError("Error, invalid output format: '{}', should be text|json|ndjson.".format(output))
+        self.__output = output
+        self.__dry_run = dry_run
+        self.__quiet = quiet
+        self.__stream = stream or sys.stdout
+        self.__records = 0
+
+    @property
+    def output(self):
+        return self.__output
+
+    @property
+    def dry_run(self):
+        return self.__dry_run
+
+    def write(self, file_path, file_type, file_content, old_version, new_version, elapsed=0.0, old_text=None):
+        """
+        Write 'file_content' to 'file_path' (unless dry run) and report it
+        :param file_path: full path to file as string
+        :param file_type: python|helm_chart|plain_version
+        :param file_content: content of the file as returned by set_version_in_content
+        :param old_version: version before the change as string
+        :param new_version: version after the change as string
+        :param elapsed: seconds already spent on this file (like reading it)
+        :param old_text: optional file text before the change, read from the file if not given
+        :return: dict record of the change
+        """
+        start = time.perf_counter()
+        new_text = format_content(file_path, file_content)
+        return self.write_text(file_path, file_type, new_text, old_version, new_version,
+                               elapsed + time.perf_counter() - start, old_text=old_text)
+
+    def write_text(self, file_path, file_type, new_text, old_version, new_version, elapsed=0.0, extra=None,
+                   old_text=None):
+        """
+        Write 'new_text' to 'file_path' (unless dry run) and report it, for text changed in place (like image tags)
+        :param file_path: full path to file as string
+        :param file_type: string, like image_tag
+        :param new_text: file text after the change
+        :param old_version: version before the change as string
+        :param new_version: version after the change as string
+        :param elapsed: seconds already spent on this file (like reading it)
+        :param extra: optional dict of more record keys
+        :param old_text: optional file text before the change, read from the file if not given
+        :return: dict record of the change
+        """
+        start = time.perf_counter()
+        if old_text is None:
+            with open(file_path, 'r') as stream:
+                old_text = stream.read()
+        if not self.__dry_run:
+            with open(file_path, 'w') as outfile:
+                outfile.write(new_text)
+
+        record = {
+            'path': file_path,
+            'file_type': file_type,
+            'old_version': str(old_version),
+            'new_version': str(new_version),
+            'bytes_changed': count_changed_bytes(old_text, new_text),
+            'elapsed': round(elapsed + time.perf_counter() - start, 6),
+            'dry_run': self.__dry_run,
+        }
+        record.update(extra or {})
+        self.emit(record, old_text, new_text)
+        return record
+
+    def emit(self, record, old_text='', new_text=''):
+        """
+        Print a single record according to the output format
+        :param record: dict
+        :param old_text: file text before the change, used for the dry run diff
+        :param new_text: file text after the change, used for the dry run diff
+        """
+        if self.__output == 'ndjson':
+            self.__stream.write(json.dumps(record) + '\n')
+        elif self.__output == 'json':
+            self.__stream.write(('[\n' if self.__records == 0 else ',\n') + json.dumps(record))
+        elif self.__dry_run and not self.__quiet:
+            for line in difflib.unified_diff(old_text.splitlines(keepends=True), new_text.splitlines(keepends=True),
+                                             fromfile=record['path'], tofile=record['path']):
+                # last line of a file might not end with a new line
+                self.__stream.write(line if line.endswith('\n') else line + '\n')
+        self.__records += 1
+        self.__stream.flush()
+
+    def close(self):
+        """
+        Terminate the JSON array, an empty array is printed if no records reported
+        """
+        if self.__output == 'json':
+            self.__stream.write('[]\n' if self.__records == 0 else '\n]\n')
+            self.__stream.flush()
@@ -0,0 +1,135 @@
+import os
+from io import StringIO
+
+try:
+    from .pybump import read_version_from_stream, regex_version_pattern, VERSION_FILE_NAMES
+    from .pybump_git import find_git_dir, list_staged_files, read_staged_blobs
+    from .pybump_locator import PybumpLocators
+    from .pybump_version import PybumpVersion
+    from .pybump_workspace import parse_workspace_manifest, WORKSPACE_MANIFEST
+except ImportError:
+    from pybump import read_version_from_stream, regex_version_pattern, VERSION_FILE_NAMES
+    from pybump_git import find_git_dir, list_staged_files, read_staged_blobs
+    from pybump_locator import PybumpLocators
+    from pybump_version import PybumpVersion
+    from pybump_workspace import parse_workspace_manifest, WORKSPACE_MANIFEST
+
+
+def get_blob_version(path, content, app_version=False, locators=None):
+    """
+    :param path: file path, used to detect the file type
+    :param content: file content as string
+    :param app_version: boolean, if True return appVersion from Helm chart
+    :param locators: optional PybumpLocators, a matching locator takes precedence over the file type
+    :return: PybumpVersion object
+    """
+    return PybumpVersion(read_version_from_stream(path, StringIO(content), app_version, read_only=True,
+                                                  locators=locators).get('version'))
+
+
+def check_blob(path, content, app_version=False, locators=None):
+    """
+    Classify the staged content of a single version file
+    :param path: file path, used to detect the file type
+    :param content: file content as string
+    :param app_version: boolean, if True check appVersion of Helm chart
+    :param locators: optional PybumpLocators, see get_blob_version
+    :return: (status, message) tuple, status is one of ok|invalid|error, the message of ok is the version
+    """
+    try:
+        version = get_blob_version(path, content, app_version, locators)
+    except (ValueError, RuntimeError, KeyError) as exc:
+        return 'error', str(exc)
+    if not version.is_valid_semantic_version():
+        return 'invalid', 'invalid semantic version: {}'.format(version.invalid_version)
+    return 'ok', str(version)
+
+
+def get_staged_groups(blobs, staged, manifest):
+    """
+    :param blobs: dict of path to staged content (None if not in the index)
+    :param staged: set of staged file paths
+    :param manifest: path of a workspace manifest, relative to the worktree root, with '/' separators
+    :return: dict of group name to list of (path, app_version) tuples, of groups with a staged member
+        (all groups if the manifest itself is staged)
+    """
+    if blobs.get(manifest) is None:
+        return {}
+    groups = {}
+    for group_name, members in parse_workspace_manifest(blobs[manifest], os.path.dirname(manifest)).items():
+        members = [(path.replace(os.sep, '/'), app_version) for path, app_version in members]
+        if manifest in staged or any(path in staged for path, _ in members):
+            groups[group_name] = members
+    return groups
+
+
+def check_staged_group(group_name, members, blobs, staged, locators=None):
+    """
+    Compare the staged content of the members of a workspace group
+    :param group_name: string
+    :param members: list of (path, app_version) tuples
+    :param blobs: dict of path to staged content (None if not in the index)
+    :param staged: set of staged file paths
+    :param locators: optional PybumpLocators of the staged manifest
+    :return: list of (status, path, message) tuples of staged members
+    """
+    result = []
+    versions = []
+    for path, app_version in members:
+        if blobs.get(path) is None:
+            if path in staged:
+                result.append(('error', path, 'file is not in the index'))
+            continue
+        status, message = check_blob(path, blobs[path], app_version, locators)
+        if status == 'ok':
+            versions.append((path, message))
+        else:
+            result.append((status, path, message))
+
+    if len(set(version for _, version in versions)) > 1:
+        message = "workspace group '{}' has different versions: {}".format(
+            group_name, ', '.join('{}={}'.format(path, version) for path, version in versions))
+        result.extend(('drift', path, message) for path, _ in versions if path in staged)
+    else:
+        result.extend(('ok', path, version) for path, version in versions if path in staged)
+    return result
+
+
+def check_staged(repo_path='.', manifest=WORKSPACE_MANIFEST):
+    """
+    Validate the staged content of version files, so a commit never holds an invalid or drifted version,
+    git is asked once for the staged file list, and staged blobs are read in batch (the worktree is never read),
+    members of workspace groups are compared with the staged content of the rest of their group,
+    and read with the [locators.<name>] tables of the staged manifest
+    :param repo_path: path of a directory inside a git repository as string
+    :param manifest: path of a workspace manifest, relative to the worktree root
+    :return: list of (status, path, message) tuples, status is one of ok|invalid|drift|error
+    """
+    work_dir, _ = find_git_dir(repo_path)
+    staged = set(list_staged_files(work_dir))
+    if not staged:
+        return []
+
+    manifest = manifest.replace(os.sep, '/')
+    candidates = [path for path in sorted(staged) if os.path.basename(path) in VERSION_FILE_NAMES]
+    blobs = read_staged_blobs(work_dir, candidates + [manifest])
+    groups = get_staged_groups(blobs, staged, manifest)
+    # file globs of locators are relative to the manifest, like the paths of staged files to the worktree root
+    locators = PybumpLocators(manifest, blobs[manifest]) if groups else None
+
+    # members of affected groups may have any name (like src/app/__init__.py), read the missing ones in batch
+    group_paths = set(path for members in groups.values() for path, _ in members)
+    blobs.update(read_staged_blobs(work_dir, sorted(group_paths - set(blobs))))
+
+    result = []
+    for group_name, members in groups.items():
+        result.extend(check_staged_group(group_name, members, blobs, staged, locators))
+
+    for path in candidates:
+        # the version of setup.py / pyproject.toml may be dynamic, such files are not version files
+        if path in group_paths or (os.path.splitext(path)[1] in ('.py', '.toml') and
+                                   not regex_version_pattern.search(blobs[path] or '')):
+            continue
+        status, message = check_blob(path, blobs[path])
+        result.append((status, path, message))
+    return result
@@ -1,6 +1,145 @@
 import re
+from functools import lru_cache
+from operator import itemgetter
 from sys import stderr
 
+semver_regex = re.compile(r"^(0|[1-9]\d*)\.(0|[1-9]\d*)\.(0|[1-9]\d*)"  # Match x.y.z
+                          # Match -sometext-12.here
+                          r"(?:-((?:0|[1-9]\d*|\d*[a-zA-Z-][0-9a-zA-Z-]*)"
+                          r"(?:\.(?:0|[1-9]\d*|\d*[a-zA-Z-][0-9a-zA-Z-]*))*))?"
+                          # Match +more.123.here
+                          r"(?:\+([0-9a-zA-Z-]+(?:\.[0-9a-zA-Z-]+)*))?$")
+
+# number of distinct version strings whose parse result is kept, see parse_semantic_string
+PARSE_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_semantic_string(version):
+    """
+    Parse a version string, results are kept in a bounded LRU cache keyed by the raw string,
+    since the same strings (like PYPI releases of many requirements) are parsed over and over,
+    the result is an immutable tuple so it is safely shared by all callers
+    :param version: non empty string, optionally prefixed with a lower case 'v'
+    :return: tuple of (prefix, (major, minor, patch), release, metadata),
+        release/metadata are empty strings if missing, or None if version is not a valid semantic version
+    """
+    prefix = version[0] == 'v'
+    match = semver_regex.match(version[1:] if prefix else version)
+    if match is None:
+        return None
+    major, minor, patch, release, metadata = match.groups()
+    return prefix, (int(major), int(minor), int(patch)), release or '', metadata or ''
+
+
+def get_parse_cache_info():
+    """
+    :return: functools CacheInfo named tuple of (hits, misses, maxsize, currsize) of parse_semantic_string
+    """
+    return parse_semantic_string.cache_info()
+
+
+def clear_parse_cache():
+    parse_semantic_string.cache_clear()
+
+
+def get_release_sort_key(release):
+    """
+    Return a tuple that orders pre-release strings by semantic version precedence
+    (https://semver.org/#spec-item-11), a version without a pre-release is higher than one with a pre-release,
+    numeric identifiers are compared numerically and are lower than alphanumeric identifiers,
+    and a larger set of identifiers is higher if all preceding identifiers are equal.
+    :param release: pre-release string, like 'alpha.1', or None/empty string
+    :return: tuple
+    """
+    if not release:
+        return (1,)
+    return (0,) + tuple((0, int(x)) if x.isdigit() else (1, x) for x in release.split('.'))
+
+
+def get_sort_key(version):
+    """
+    Return a tuple that orders version strings by semantic version precedence, metadata and 'v' prefix are ignored,
+    the key is built from the cached parse result so sorting many strings does not create PybumpVersion objects
+    :param version: string
+    :return: tuple of (major, minor, patch, release key), or None if version is not a valid semantic version
+    """
+    if not isinstance(version, str) or len(version) == 0:
+        return None
+    parsed = parse_semantic_string(version)
+    if parsed is None:
+        return None
+    _, numbers, release, _ = parsed
+    return numbers + (get_release_sort_key(release),)
+
+
+def parse_version_line(line):
+    """
+    Parse a major or major.minor line, like '3' or '3.1' into a tuple of ints
+    :param line: string
+    :return: tuple of ints
+    """
+    try:
+        parsed_line = tuple(int(x) for x in line.split('.'))
+    except ValueError:
+        parsed_line = ()
+    if not 1 <= len(parsed_line) <= 2:
+        raise ValueError("Error, invalid version line: '{}', should be X or X.Y".format(line))
+    return parsed_line
+
+
+def get_sort_keys(versions, ignore_invalid=False, line=None):
+    """
+    Pair each version string with its sort key
+    :param versions: iterable of version strings
+    :param ignore_invalid: boolean, if True skip invalid versions, else raise ValueError
+    :param line: optional string, keep only versions of a major ('3') or major.minor ('3.1') line
+    :return: generator of (sort key, version string) tuples
+    """
+    parsed_line = parse_version_line(line) if line else ()
+    for version in versions:
+        key = get_sort_key(version)
+        if key is None:
+            if ignore_invalid:
+                continue
+            raise ValueError("Invalid semantic version: {}".format(version))
+        if key[:len(parsed_line)] == parsed_line:
+            yield key, version
+
+
+def sort_versions(versions, reverse=False, ignore_invalid=False, line=None):
+    """
+    Sort version strings by semantic version precedence,
+    versions with equal precedence (like '1.0.0' and 'v1.0.0+meta') keep their input order
+    :param versions: iterable of version strings
+    :param reverse: boolean, if True sort from highest to lowest
+    :param ignore_invalid: boolean, if True skip invalid versions, else raise ValueError
+    :param line: optional string, keep only versions of a major ('3') or major.minor ('3.1') line
+    :return: list of version strings
+    """
+    keyed_versions = sorted(get_sort_keys(versions, ignore_invalid, line), key=itemgetter(0), reverse=reverse)
+    return [version for _, version in keyed_versions]
+
+
+def max_version(versions, ignore_invalid=False, line=None):
+    """
+    :param versions: iterable of version strings
+    :param ignore_invalid: boolean, if True skip invalid versions, else raise ValueError
+    :param line: optional string, keep only versions of a major ('3') or major.minor ('3.1') line
+    :return: highest version string, or None if there are no versions
+    """
+    return max(get_sort_keys(versions, ignore_invalid, line), key=itemgetter(0), default=(None, None))[1]
+
+
+def min_version(versions, ignore_invalid=False, line=None):
+    """
+    :param versions: iterable of version strings
+    :param ignore_invalid: boolean, if True skip invalid versions, else raise ValueError
+    :param line: optional string, keep only versions of a major ('3') or major.minor ('3.1') line
+    :return: lowest version string, or None if there are no versions
+    """
+    return min(get_sort_keys(versions, ignore_invalid, line), key=itemgetter(0), default=(None, None))[1]
+
 
 class PybumpVersion(object):
 
@@ -26,38 +165,17 @@ class PybumpVersion(object):
 
         param version: string
         """
-        orig_version = version
         # only if passed version is non-empty string
-        if isinstance(version, str) and len(version) != 0:
-            # In case the version if of type 'v2.2.5' then save 'v' prefix and cut it for further 'semver' validation
-            if version[0] == 'v':
-                version = version[1:]
-                self.__prefix = True
-
-            semver_regex = re.compile(r"^(0|[1-9]\d*)\.(0|[1-9]\d*)\.(0|[1-9]\d*)"  # Match x.y.z
-                                      # Match -sometext-12.here
-                                      r"(?:-((?:0|[1-9]\d*|\d*[a-zA-Z-][0-9a-zA-Z-]*)"
-                                      r"(?:\.(?:0|[1-9]\d*|\d*[a-zA-Z-][0-9a-zA-Z-]*))*))?"
-                                      # Match +more.123.here
-                                      r"(?:\+([0-9a-zA-Z-]+(?:\.[0-9a-zA-Z-]+)*))?$")
-            # returns a list of tuples, for example [('2', '2', '7', 'alpha', '')]
-            match = semver_regex.findall(version)
-
-            # if there was no match using 'semver_regex', then empty list returned
-            if len(match) != 0:
-                try:
-                    self.__version = [int(n) for n in match[0][:3]]
-
-                    self.__release = match[0][3]
-                    self.__metadata = match[0][4]
-
-                    self.__valid_sem_ver = True
-                    self.__invalid_version = None
-                    return True
-                except ValueError:
-                    pass
+        parsed = parse_semantic_string(version) if isinstance(version, str) and len(version) != 0 else None
+        if parsed is not None:
+            self.__prefix, version_numbers, self.__release, self.__metadata = parsed
+            # the cached tuple is shared, so the mutable list (see bump_version) is a copy
+            self.__version = list(version_numbers)
+            self.__valid_sem_ver = True
+            self.__invalid_version = None
+            return True
         self.__valid_sem_ver = False
-        self.__invalid_version = orig_version
+        self.__invalid_version = version
         return False
 
     @property
@@ -131,13 +249,21 @@ class PybumpVersion(object):
 
         return self.__version
 
+    def sort_key(self):
+        """
+        Return a tuple that orders versions by semantic version precedence, see get_sort_key
+        :return: tuple of (major, minor, patch, release key)
+        """
+        return self.__version[0], self.__version[1], self.__version[2], get_release_sort_key(self.__release)
+
     def is_larger_then(self, other_version):
         """
-        return True if current version is higher the 'other',
+        return True if current version is higher the 'other' by semantic version precedence,
+        so '1.0.0' is higher than '1.0.0-alpha', and metadata is ignored
         :param other_version: PybumpVersion object
         :return: boolean
         """
-        return self.__version > other_version.version
+        return self.sort_key() > other_version.sort_key()
 
     def is_valid_semantic_version(self):
         return self.__valid_sem_ver
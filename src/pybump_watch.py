@@ -0,0 +1,266 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+
+try:
+    from .pybump import read_version_from_file, is_supported_file, walk_directories, VERSION_FILE_NAMES
+    from .pybump_version import PybumpVersion, get_sort_key
+except ImportError:
+    from pybump import read_version_from_file, is_supported_file, walk_directories, VERSION_FILE_NAMES
+    from pybump_version import PybumpVersion, get_sort_key
+
+# inotify events (see 'man 7 inotify'), a file is reported once it was written and closed, moved or created
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_ISDIR = 0x40000000
+INOTIFY_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+# struct inotify_event {int wd; uint32_t mask; uint32_t cookie; uint32_t len; char name[];}
+inotify_event_header = struct.Struct('iIII')
+
+
+def find_version_files(paths):
+    """
+    Resolve paths to watch into version files, explicit files must be supported by this app,
+    and directories are searched for well known version files (Chart.yaml, pyproject.toml, setup.py, VERSION)
+    :param paths: list of file or directory paths
+    :return: set of absolute file paths
+    """
+    files = set()
+    for path in paths:
+        path = os.path.abspath(path)
+        if os.path.isdir(path):
+            for dir_path, file_names in walk_directories(path):
+                files.update(os.path.join(dir_path, name) for name in file_names if name in VERSION_FILE_NAMES)
+        elif is_supported_file(path):
+            files.add(path)
+        else:
+            raise ValueError("File name or extension not known to this app: {}".format(path))
+    return files
+
+
+class PybumpPollingWatcher(object):
+    """
+    Detect changed version files by comparing modification time and size of all files on every poll
+    """
+
+    def __init__(self, paths):
+        self.__paths = paths
+        self.__snapshot = self.take_snapshot()
+
+    def take_snapshot(self):
+        snapshot = {}
+        for path in find_version_files(self.__paths):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def poll(self, timeout):
+        """
+        :param timeout: seconds to wait before checking for changes
+        :return: set of changed (or new) file paths
+        """
+        time.sleep(timeout)
+        snapshot = self.take_snapshot()
+        changed = set(path for path, stat in snapshot.items() if self.__snapshot.get(path) != stat)
+        self.__snapshot = snapshot
+        return changed
+
+    def close(self):
+        pass
+
+
+class PybumpInotifyWatcher(object):
+    """
+    Detect changed version files with Linux inotify, so files are not scanned while nothing changes,
+    every directory of a watched tree is registered when the watcher is created, and when it is created or moved in
+    """
+
+    def __init__(self, paths):
+        self.__libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.__fd = self.__libc.inotify_init1(os.O_CLOEXEC)
+        if self.__fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self.__watches = {}
+        self.__tree_watches = set()
+        self.__files = set()
+        for path in paths:
+            path = os.path.abspath(path)
+            if os.path.isdir(path):
+                self.add_tree(path)
+            elif is_supported_file(path):
+                self.add_watch(os.path.dirname(path))
+                self.__files.add(path)
+            else:
+                raise ValueError("File name or extension not known to this app: {}".format(path))
+
+    def add_watch(self, directory):
+        watch_descriptor = self.__libc.inotify_add_watch(self.__fd, os.fsencode(directory), INOTIFY_MASK)
+        if watch_descriptor < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_add_watch failed for {}'.format(directory))
+        self.__watches[watch_descriptor] = directory
+        return watch_descriptor
+
+    def poll(self, timeout):
+        """
+        :param timeout: maximum seconds to wait for events
+        :return: set of changed (or new) file paths
+        """
+        readable, _, _ = select.select([self.__fd], [], [], timeout)
+        if not readable:
+            return set()
+
+        data = os.read(self.__fd, 65536)
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            watch_descriptor, mask, cookie, length = inotify_event_header.unpack_from(data, offset)
+            offset += inotify_event_header.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+
+            path = os.path.join(self.__watches.get(watch_descriptor, ''), name)
+            if mask & IN_ISDIR:
+                if watch_descriptor in self.__tree_watches and not name.startswith('.'):
+                    changed |= self.add_tree(path)
+                continue
+            if path in self.__files or (watch_descriptor in self.__tree_watches and name in VERSION_FILE_NAMES):
+                changed.add(path)
+        return changed
+
+    def add_tree(self, directory):
+        """
+        Watch a directory created (or moved) inside a watched tree, version files may be written to it
+        before its watch is registered, so they are reported as changed
+        :param directory: full path to directory as string
+        :return: set of version file paths found in the directory tree
+        """
+        found = set()
+        for dir_path, file_names in walk_directories(directory):
+            self.__tree_watches.add(self.add_watch(dir_path))
+            found.update(os.path.join(dir_path, name) for name in file_names if name in VERSION_FILE_NAMES)
+        return found
+
+    def close(self):
+        os.close(self.__fd)
+
+
+def create_watcher(paths, polling=False):
+    """
+    Create an inotify watcher on Linux, falling back to polling when inotify is not available
+    :param paths: list of file or directory paths
+    :param polling: boolean, if True always use the polling watcher
+    :return: PybumpInotifyWatcher or PybumpPollingWatcher object
+    """
+    if not polling and sys.platform.startswith('linux'):
+        try:
+            return PybumpInotifyWatcher(paths)
+        except (OSError, AttributeError, TypeError):
+            # inotify limits reached, or libc without inotify support
+            pass
+    return PybumpPollingWatcher(paths)
+
+
+def wait_for_changes(watcher, interval=0.5, debounce=0.2):
+    """
+    Block until files change, then keep collecting changes until no change arrives for 'debounce' seconds,
+    so a burst of saves is handled as a single change of each file
+    :param watcher: PybumpInotifyWatcher or PybumpPollingWatcher object
+    :param interval: seconds between checks while waiting for the first change
+    :param debounce: seconds with no changes that end a burst
+    :return: set of changed file paths
+    """
+    changed = set()
+    while not changed:
+        changed = watcher.poll(interval)
+    while True:
+        more_changes = watcher.poll(debounce)
+        if not more_changes:
+            return changed
+        changed |= more_changes
+
+
+class PybumpWatch(object):
+    """
+    Validate version files, and report drift from a workspace group or from the latest git tag
+    """
+
+    def __init__(self, workspace=None, tag_version=None):
+        """
+        :param workspace: optional PybumpWorkspace object, members are compared with the rest of their group
+        :param tag_version: optional version string, files with a lower version are reported
+        """
+        self.__workspace = workspace
+        self.__tag_version = tag_version
+        self.__tag_sort_key = get_sort_key(tag_version) if tag_version else None
+
+    def read_versions(self, path):
+        """
+        Read the versions of a single file, workspace members are parsed once through the workspace,
+        with the appVersion flags and locators the workspace declares for them, the cached content of changed
+        files must be dropped first, see check_files
+        :param path: full path to file as string
+        :return: list of (group name, PybumpVersion object) tuples, the group name is None for non members
+        """
+        if self.__workspace is None:
+            return [(None, PybumpVersion(read_version_from_file(path, False, read_only=True).get('version')))]
+
+        members = self.__workspace.get_file_members(path)
+        if not members:
+            file_data = read_version_from_file(path, False, read_only=True, locators=self.__workspace.locators)
+            return [(None, PybumpVersion(file_data.get('version')))]
+        return [(group_name, PybumpVersion(self.__workspace.get_member_version(path, app_version)))
+                for group_name, app_version in members]
+
+    def check_file(self, path):
+        """
+        Read a single file and validate it, see read_versions
+        :param path: full path to file as string
+        :return: list of (status, path, message) tuples, status is one of ok|invalid|drift|error
+        """
+        try:
+            versions = self.read_versions(path)
+        except (OSError, ValueError, RuntimeError) as exc:
+            return [('error', path, str(exc))]
+        invalid = [version for _, version in versions if not version.is_valid_semantic_version()]
+        if invalid:
+            return [('invalid', path, 'invalid semantic version: {}'.format(version.invalid_version))
+                    for version in invalid]
+
+        result = []
+        for group_name, version in versions:
+            if group_name is None:
+                continue
+            try:
+                self.__workspace.get_group_version(group_name)
+            except (OSError, ValueError, RuntimeError) as exc:
+                result.append(('drift', path, str(exc)))
+        unique_versions = sorted(set(str(version) for _, version in versions))
+        if self.__tag_sort_key is not None:
+            result.extend(('drift', path, '{} is lower than the latest tag {}'.format(version, self.__tag_version))
+                          for version in unique_versions if get_sort_key(version) < self.__tag_sort_key)
+        return result or [('ok', path, ', '.join(unique_versions))]
+
+    def check_files(self, paths):
+        """
+        Validate changed files, the cached content of all of them is dropped before any is checked,
+        so a member is never compared with the stale version of a sibling that changed in the same batch
+        :param paths: iterable of full file paths
+        :return: list of (status, path, message) tuples
+        """
+        paths = sorted(paths)
+        if self.__workspace is not None:
+            # dropped before reading, so the cache is never stale even if a read fails
+            for path in paths:
+                self.__workspace.reload_file(path)
+        result = []
+        for path in paths:
+            result.extend(self.check_file(path))
+        return result
@@ -0,0 +1,281 @@
+import os
+import time
+
+try:
+    import tomllib
+except ModuleNotFoundError:  # tomllib is part of the standard library only since python 3.11
+    import tomli as tomllib
+
+try:
+    from .pybump import read_version_from_file, set_version_in_content, dump_content_to_file, PybumpFileLock, \
+        LOCK_TIMEOUT
+    from .pybump_locator import load_locators
+    from .pybump_version import PybumpVersion
+except ImportError:
+    from pybump import read_version_from_file, set_version_in_content, dump_content_to_file, PybumpFileLock, \
+        LOCK_TIMEOUT
+    from pybump_locator import load_locators
+    from pybump_version import PybumpVersion
+
+WORKSPACE_MANIFEST = '.pybump.toml'
+WORKSPACE_KEYS = ('version', 'appVersion')
+
+
+def parse_workspace_manifest(content, root_dir):
+    """
+    Parse the content of a '.pybump.toml' workspace manifest,
+    every group lists files that share the same version, a file entry is either a path string,
+    or a table with 'path' and 'key' ('version' or 'appVersion', relevant only for Helm charts), for example:
+
+    [groups.app]
+    files = ["VERSION", "pyproject.toml", {path = "chart/Chart.yaml", key = "appVersion"}]
+
+    [groups.chart]
+    files = [{path = "chart/Chart.yaml", key = "version"}]
+
+    :param content: manifest content as string
+    :param root_dir: directory that relative file paths are resolved against
+    :return: dict of group name to list of (path, app_version) tuples
+    """
+    manifest = tomllib.loads(content)
+    groups = manifest.get('groups')
+    if not groups or not isinstance(groups, dict):
+        raise ValueError("Workspace manifest must contain at least one [groups.<name>] table")
+
+    seen_members = {}
+    result = {}
+    for group_name, group in groups.items():
+        files = group.get('files') if isinstance(group, dict) else None
+        if not files or not isinstance(files, list):
+            raise ValueError("Workspace group '{}' must contain a non empty 'files' list".format(group_name))
+
+        members = []
+        for entry in files:
+            if isinstance(entry, str):
+                path, key = entry, 'version'
+            elif isinstance(entry, dict) and 'path' in entry:
+                path, key = entry['path'], entry.get('key', 'version')
+            else:
+                raise ValueError("Invalid file entry in workspace group '{}': {}".format(group_name, entry))
+            if key not in WORKSPACE_KEYS:
+                raise ValueError("Invalid key '{}' in workspace group '{}', should be version|appVersion"
+                                 .format(key, group_name))
+
+            path = os.path.normpath(os.path.join(root_dir, path))
+            filename, file_extension = os.path.splitext(path)
+            # 'appVersion' exists only in Helm charts, every other file type holds a single version
+            app_version = key == 'appVersion' and file_extension in ('.yaml', '.yml')
+            if (path, app_version) in seen_members:
+                raise ValueError("File '{}' ({}) is listed in both '{}' and '{}' workspace groups"
+                                 .format(path, key, seen_members[(path, app_version)], group_name))
+            seen_members[(path, app_version)] = group_name
+            members.append((path, app_version))
+        result[group_name] = members
+    return result
+
+
+class PybumpWorkspace(object):
+    """
+    Group of version files declared in a '.pybump.toml' manifest,
+    each file is read once, and written once, regardless the number of groups it participates in,
+    files are read with the [locators.<name>] tables of the manifest, see parse_locators,
+    every file is written under its lock, and only if its version did not change since it was read
+    """
+
+    def __init__(self, manifest_path=WORKSPACE_MANIFEST, lock_timeout=LOCK_TIMEOUT):
+        """
+        :param manifest_path: path to workspace manifest as string
+        :param lock_timeout: seconds to wait for the lock of a file held by another pybump writer
+        """
+        self.__manifest_path = manifest_path
+        self.__lock_timeout = lock_timeout
+        with open(manifest_path, 'r') as stream:
+            self.__groups = parse_workspace_manifest(stream.read(),
+                                                     os.path.dirname(os.path.abspath(manifest_path)))
+        self.__locators = load_locators(manifest_path)
+        self.__files = {}
+        self.__read_elapsed = {}
+        self.__original_versions = {}
+        self.__updates = {}
+        self.__changed_files = set()
+
+    @property
+    def manifest_path(self):
+        return self.__manifest_path
+
+    @property
+    def groups(self):
+        return self.__groups
+
+    @property
+    def locators(self):
+        return self.__locators
+
+    def get_file_groups(self, path):
+        """
+        :param path: full path to file as string
+        :return: list of group names the file is a member of
+        """
+        return [group_name for group_name, members in self.__groups.items()
+                if any(member_path == path for member_path, _ in members)]
+
+    def get_file_members(self, path):
+        """
+        :param path: full path to file as string
+        :return: list of (group name, app_version) tuples, one per group membership of the file
+        """
+        return [(group_name, app_version) for group_name, members in self.__groups.items()
+                for member_path, app_version in members if member_path == path]
+
+    def reload_file(self, path):
+        """
+        Drop the cached content of a file that changed on disk, it is read again on next access
+        :param path: full path to file as string
+        """
+        self.__files.pop(path, None)
+        self.__read_elapsed.pop(path, None)
+        self.__original_versions.pop(path, None)
+
+    def get_member_version(self, path, app_version):
+        """
+        :param path: full path to file as string
+        :param app_version: boolean, if True return appVersion from Helm chart
+        :return: version as string
+        """
+        if path not in self.__files:
+            start = time.perf_counter()
+            self.__files[path] = read_version_from_file(path, app_version=False, locators=self.__locators)
+            self.__read_elapsed[path] = time.perf_counter() - start
+            self.__original_versions[path] = self.__files[path].get('version')
+        file_data = self.__files[path]
+        if not app_version:
+            # VERSION files may end with a new line
+            return str(file_data.get('version')).strip()
+
+        current_version = file_data.get('file_content').get('appVersion', None)
+        if not current_version:
+            raise ValueError("Could not find 'appVersion' field in helm chart.yaml file: {}".format(path))
+        return str(current_version)
+
+    def get_group_versions(self, group_name):
+        """
+        :param group_name: string
+        :return: list of (path, app_version, version) tuples of all group members
+        """
+        return [(path, app_version, self.get_member_version(path, app_version))
+                for path, app_version in self.__groups[group_name]]
+
+    def get_group_version(self, group_name):
+        """
+        Return the single version shared by all group members,
+        raise ValueError if group members drifted apart
+        :param group_name: string
+        :return: version as string
+        """
+        group_versions = self.get_group_versions(group_name)
+        versions = set(version for _, _, version in group_versions)
+        if len(versions) != 1:
+            raise ValueError("Workspace group '{}' versions drifted: {}".format(
+                group_name,
+                ', '.join('{}{}={}'.format(path, ':appVersion' if app_version else '', version)
+                          for path, app_version, version in group_versions)))
+        return versions.pop()
+
+    def check(self):
+        """
+        Validate every group holds a single valid semantic version, fail on the first drifted group
+        :return: dict of group name to PybumpVersion
+        """
+        result = {}
+        for group_name in self.__groups:
+            version = PybumpVersion(self.get_group_version(group_name))
+            if not version.is_valid_semantic_version():
+                raise ValueError("Workspace group '{}' contains an invalid semantic version: {}"
+                                 .format(group_name, version.invalid_version))
+            result[group_name] = version
+        return result
+
+    def set_group_version(self, group_name, version):
+        """
+        Set version to all members of a group, files are updated in memory until write_files is called
+        :param group_name: string
+        :param version: version to set as string
+        """
+        for path, app_version in self.__groups[group_name]:
+            # a Helm chart may take part in two groups, report its 'version' change over the 'appVersion' change
+            if path not in self.__updates or not app_version:
+                self.__updates[path] = (self.get_member_version(path, app_version), version)
+            file_data = self.__files[path]
+            file_data['file_content'] = set_version_in_content(path, file_data.get('file_content'),
+                                                               version, app_version)
+            if not app_version:
+                file_data['version'] = version
+            self.__changed_files.add(path)
+
+    def bump(self, level, report=None):
+        """
+        Bump each group once, and write all changed files
+        :param level: string represents major|minor|patch
+        :param report: optional PybumpReport that writes and reports changed files
+        :return: dict of group name to new PybumpVersion
+        """
+        versions = self.check()
+        for group_name, version in versions.items():
+            version.bump_version(level)
+            self.set_group_version(group_name, str(version))
+        self.write_files(report)
+        return versions
+
+    def set_version(self, version, report=None):
+        """
+        Set the same version to all groups, and write all changed files
+        :param version: PybumpVersion object
+        :param report: optional PybumpReport that writes and reports changed files
+        :return: dict of group name to new PybumpVersion
+        """
+        versions = self.check()
+        for group_name in versions:
+            versions[group_name] = version
+            self.set_group_version(group_name, str(version))
+        self.write_files(report)
+        return versions
+
+    def set_auto(self, get_commit_sha, metadata=False, report=None):
+        """
+        Set the commit SHA of each group as release (-sha) or metadata (+sha), and write all changed files,
+        the SHA of a group is the one of the repository that holds its first member
+        :param get_commit_sha: callable that returns the commit SHA for a file path, like PybumpShaResolver.get_head_sha
+        :param metadata: boolean, if True set metadata instead of release
+        :param report: optional PybumpReport that writes and reports changed files
+        :return: dict of group name to new PybumpVersion
+        """
+        versions = self.check()
+        for group_name, version in versions.items():
+            commit_sha = get_commit_sha(self.__groups[group_name][0][0])
+            if metadata:
+                version.metadata = commit_sha
+            else:
+                version.release = commit_sha
+            self.set_group_version(group_name, str(version))
+        self.write_files(report)
+        return versions
+
+    def write_files(self, report=None):
+        """
+        Write every changed file exactly once, under its lock (a shared lock on dry runs),
+        raise ValueError if another writer changed the version of a file since it was read
+        :param report: optional PybumpReport that writes and reports changed files
+        """
+        dry_run = report is not None and report.dry_run
+        for path in sorted(self.__changed_files):
+            file_data = self.__files[path]
+            with PybumpFileLock(path, self.__lock_timeout, shared=dry_run) as file_lock:
+                file_lock.check_version(self.__original_versions[path], locators=self.__locators)
+                if report:
+                    old_version, new_version = self.__updates[path]
+                    report.write(path, file_data.get('file_type'), file_data.get('file_content'),
+                                 old_version, new_version, self.__read_elapsed.get(path, 0.0))
+                else:
+                    dump_content_to_file(path, file_data.get('file_content'))
+        self.__changed_files.clear()
+        self.__updates.clear()
@@ -1,10 +1,60 @@
 # make sure to import package directory whe running tests from root dir
 import os
 import sys
+import tempfile
+import unittest
+from subprocess import run, PIPE
 
 ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
 sys.path.append(os.path.join(ROOT, 'src'))
 
+
+class PybumpTempDirTestCase(unittest.TestCase):
+    """
+    Test case that runs in a fresh temporary directory (self.root), removed after every test,
+    paths are relative to it and use '/' separators, like 'chart/Chart.yaml'
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root = self.tmp_dir.name
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def path(self, *paths):
+        return os.path.join(self.root, *[part for path in paths for part in path.split('/')])
+
+    def write(self, path, content):
+        """
+        Write a file, parent directories are created
+        :return: full path of the file
+        """
+        path = self.path(path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def read(self, path):
+        with open(self.path(path)) as f:
+            return f.read()
+
+
+class PybumpGitTestCase(PybumpTempDirTestCase):
+    """
+    Test case that runs in a fresh git repository
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.git('init', '-q')
+
+    def git(self, *args):
+        return run(['git', '-C', self.root, '-c', 'user.name=pybump', '-c', 'user.email=pybump@test'] + list(args),
+                   stdout=PIPE, stderr=PIPE, check=True)
+
+
 valid_helm_chart = {'apiVersion': 'v1',
                     'appVersion': '1.0',
                     'description': 'A Helm chart for Kubernetes',
@@ -1,7 +1,14 @@
+import os
+import tempfile
 import unittest
+from io import StringIO
 
+from src.pybump_version import get_sort_key, sort_versions, max_version, min_version, get_parse_cache_info, \
+    clear_parse_cache
 from src.pybump import PybumpVersion, get_version_from_file, set_version_in_file, \
-    is_valid_helm_chart, write_version_to_file, read_version_from_file
+    is_valid_helm_chart, write_version_to_file, read_version_from_file, import_optional_module, \
+    read_version_from_stream, read_bounded, shorten_content, get_yaml_engine, load_yaml, PybumpFileLock, \
+    get_libyaml_loader, check_expected_version
 
 from . import valid_helm_chart, invalid_helm_chart, empty_helm_chart, \
     valid_setup_py, invalid_setup_py_1, invalid_setup_py_multiple_ver, \
@@ -130,6 +137,46 @@ class PyBumpTest(unittest.TestCase):
         self.assertTrue(self.version_b.is_larger_then(self.version_c))
         self.assertFalse(self.version_c.is_larger_then(self.version_a))
 
+    def test_is_larger_then_precedence(self):
+        self.assertTrue(PybumpVersion('1.0.0').is_larger_then(PybumpVersion('1.0.0-rc.1')))
+        self.assertTrue(PybumpVersion('1.0.0-beta.11').is_larger_then(PybumpVersion('1.0.0-beta.2')))
+        self.assertTrue(PybumpVersion('1.0.0-alpha.beta').is_larger_then(PybumpVersion('1.0.0-alpha.1')))
+        self.assertFalse(PybumpVersion('1.0.0+meta').is_larger_then(PybumpVersion('v1.0.0')),
+                         msg="metadata and prefix should be ignored by precedence")
+
+    def test_get_sort_key(self):
+        self.assertEqual(get_sort_key('v1.2.3'), (1, 2, 3, (1,)))
+        self.assertEqual(get_sort_key('1.2.3-alpha.10+meta'), (1, 2, 3, (0, (1, 'alpha'), (0, 10))))
+        self.assertEqual(get_sort_key('1.2.3-rc.1'), PybumpVersion('1.2.3-rc.1').sort_key())
+        self.assertIsNone(get_sort_key('1.02.3'))
+        self.assertIsNone(get_sort_key(''))
+        self.assertIsNone(get_sort_key(None))
+
+    def test_sort_versions(self):
+        # example precedence list from https://semver.org/#spec-item-11
+        ordered = ['1.0.0-alpha', '1.0.0-alpha.1', '1.0.0-alpha.beta', '1.0.0-beta',
+                   '1.0.0-beta.2', '1.0.0-beta.11', '1.0.0-rc.1', '1.0.0']
+        self.assertEqual(sort_versions(reversed(ordered)), ordered)
+        self.assertEqual(sort_versions(ordered, reverse=True), list(reversed(ordered)))
+
+        with self.assertRaises(ValueError):
+            sort_versions(['1.0.0', 'latest'])
+        self.assertEqual(sort_versions(['1.0.0', 'latest', 'v0.9.0'], ignore_invalid=True), ['v0.9.0', '1.0.0'])
+
+        versions = ['3.1.2', '3.10.0', '3.1.10', '2.9.9', '4.0.0-rc.1']
+        self.assertEqual(sort_versions(versions, line='3.1'), ['3.1.2', '3.1.10'])
+        self.assertEqual(sort_versions(versions, line='3'), ['3.1.2', '3.1.10', '3.10.0'])
+        with self.assertRaises(ValueError):
+            sort_versions(versions, line='3.1.2')
+
+    def test_max_min_version(self):
+        versions = ['v2.0.0-rc.1', '1.9.9', '2.0.0-beta', 'latest']
+        self.assertEqual(max_version(versions, ignore_invalid=True), 'v2.0.0-rc.1')
+        self.assertEqual(min_version(versions, ignore_invalid=True), '1.9.9')
+        self.assertEqual(max_version(versions, ignore_invalid=True, line='1'), '1.9.9')
+        self.assertIsNone(max_version([]))
+        self.assertIsNone(min_version(['latest'], ignore_invalid=True))
+
     def test_is_valid_semantic_version(self):
         self.assertTrue(self.version_a.is_valid_semantic_version())
         self.assertFalse(self.version_d.is_valid_semantic_version())
@@ -161,6 +208,18 @@ class PyBumpTest(unittest.TestCase):
         self.assertRaises(ValueError, self.version_b.bump_version, None)
         self.assertRaises(ValueError, self.version_b.bump_version, 'not_patch')
 
+    def test_parse_cache(self):
+        clear_parse_cache()
+        self.assertEqual(PybumpVersion('v5.6.7-rc.1').bump_version('patch'), [5, 6, 8])
+        version = PybumpVersion('v5.6.7-rc.1')
+        self.assertEqual(version.version, [5, 6, 7], msg="bumping a version does not change the cached result")
+        self.assertEqual((version.prefix, version.release, version.metadata), (True, 'rc.1', ''))
+        self.assertFalse(PybumpVersion('5.6').is_valid_semantic_version())
+        self.assertFalse(PybumpVersion('5.6').is_valid_semantic_version())
+
+        cache_info = get_parse_cache_info()
+        self.assertEqual((cache_info.hits, cache_info.misses, cache_info.currsize), (2, 2, 2))
+
     def test_is_valid_helm_chart(self):
         self.assertTrue(is_valid_helm_chart(valid_helm_chart))
         self.assertFalse(is_valid_helm_chart(invalid_helm_chart))
@@ -217,6 +276,91 @@ class PyBumpTest(unittest.TestCase):
         self.assertFalse(self.invalid_version_2.is_valid_semantic_version())
         self.assertEqual(self.invalid_version_2.invalid_version, '\n    version=1.5.0\n    ')
 
+    def test_bounded_reading(self):
+        self.assertEqual(shorten_content('short'), 'short')
+        self.assertEqual(shorten_content('x' * 250, limit=10), 'xxxxxxxxxx... (240 more characters)')
+        self.assertEqual(read_bounded('setup.py', StringIO('x' * 10), limit=10), 'x' * 10)
+        with self.assertRaisesRegex(ValueError, 'longer than 10 characters'):
+            read_bounded('setup.py', StringIO('x' * 11), limit=10)
+        with open('test/test_content_files/test_valid_setup.py') as stream:
+            with self.assertRaisesRegex(ValueError, 'larger than 10 bytes'):
+                read_bounded('test/test_content_files/test_valid_setup.py', stream, limit=10)
+
+        # only the first line of a VERSION file is read
+        file_data = read_version_from_stream('VERSION', StringIO('1.2.3\nmore\ntext\n'), False)
+        self.assertEqual(file_data['version'], '1.2.3')
+
+        with self.assertRaises(RuntimeError) as context:
+            get_version_from_file('no version here ' * 1000)
+        self.assertLess(len(str(context.exception)), 300, msg="large content is cut in error messages")
+
+    def test_read_only_yaml(self):
+        self.assertIs(get_yaml_engine(), get_yaml_engine(), msg="round-trip engine is reused")
+        self.assertIsNot(get_yaml_engine(), get_yaml_engine('safe'))
+
+        chart_path = 'test/test_content_files/test_valid_chart.yaml'
+        round_trip = read_version_from_file(chart_path, app_version=False)
+        read_only = read_version_from_file(chart_path, app_version=False, read_only=True)
+        self.assertEqual(read_only['version'], round_trip['version'])
+        self.assertEqual(read_only['file_type'], 'helm_chart')
+        self.assertIs(type(read_only['file_content']), dict, msg="read only content is a plain dict")
+        self.assertEqual(read_version_from_file(chart_path, app_version=True, read_only=True)['version'],
+                         read_version_from_file(chart_path, app_version=True)['version'])
+
+        for read_only in (False, True):
+            with self.assertRaises(ValueError):
+                load_yaml('key: [unclosed', read_only)
+
+        if get_libyaml_loader() is not None:
+            content = load_yaml('version: 010\nappVersion: 1.10\ncreated: 2024-01-01\nflag: yes\nempty:\n'
+                                'base: &base {a: 1}\nmerged:\n  <<: *base\n', read_only=True)
+            self.assertEqual(content, {'version': '010', 'appVersion': '1.10', 'created': '2024-01-01', 'flag': 'yes',
+                                       'empty': None, 'base': {'a': '1'}, 'merged': {'a': '1'}},
+                             msg="no YAML 1.1 type resolution of the libyaml loader")
+
+    @unittest.skipUnless(os.name == 'posix', 'file locks are taken only where fcntl is available')
+    def test_file_lock(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'VERSION')
+            with open(path, 'w') as f:
+                f.write('1.2.3\n')
+
+            with PybumpFileLock(path) as file_lock:
+                self.assertTrue(file_lock.locked)
+                with self.assertRaisesRegex(RuntimeError, 'Timed out'):
+                    PybumpFileLock(path, timeout=0.05).acquire()
+            self.assertFalse(file_lock.locked)
+
+            other_lock = PybumpFileLock(path, timeout=0.05)
+            other_lock.acquire()
+            other_lock.release()
+
+            os.chmod(path, 0o444)
+            with PybumpFileLock(path, shared=True) as file_lock, PybumpFileLock(path, 0.05, shared=True):
+                self.assertTrue(file_lock.locked, msg="dry runs take shared locks, of read only files too")
+                file_lock.check_version('1.2.3')
+                with self.assertRaisesRegex(ValueError, 'expected 1.2.4'):
+                    file_lock.check_version('1.2.4')
+                os.chmod(path, 0o644)
+                with self.assertRaisesRegex(RuntimeError, 'Timed out'):
+                    PybumpFileLock(path, timeout=0.05).acquire()
+
+            with self.assertRaises(FileNotFoundError):
+                PybumpFileLock(os.path.join(tmp_dir, 'missing')).acquire()
+
+    def test_check_expected_version(self):
+        check_expected_version('VERSION', '1.2.3', None)
+        check_expected_version('VERSION', PybumpVersion('1.2.3'), '1.2.3 ')
+        with self.assertRaisesRegex(ValueError, 'Version of VERSION is 1.2.4, expected 1.2.3'):
+            check_expected_version('VERSION', '1.2.4', '1.2.3')
+
+    def test_import_optional_module(self):
+        self.assertEqual(import_optional_module('os.path', 'helm').__name__, 'posixpath')
+
+        with self.assertRaisesRegex(ModuleNotFoundError, r"pip install 'pybump\[helm\]'",
+                                    msg="missing optional dependency should explain which extra to install"):
+            import_optional_module('not_installed_yaml_module', 'helm')
+
     def test_write_read_files(self):
         # write_version_to_file will write any text to a given file,
         # but later when reading data from files, they will be validated.
@@ -0,0 +1,91 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from src.pybump_async import PybumpAsync
+
+
+def mocked_fetch_json(url, timeout):
+    mocks = {
+        'https://pypi.org/pypi/pybump/json': 'test/test_content_files/pypi_mocks/pypi_pybump_api_result.json',
+        'https://pypi.org/pypi/GitPython/json': 'test/test_content_files/pypi_mocks/pypi_gitpython_api_result.json',
+    }
+    if url not in mocks:
+        raise RuntimeError('error occurred fetching {}: Not Found'.format(url))
+    with open(mocks[url]) as json_file:
+        return json.load(json_file)
+
+
+class PyBumpAsyncTest(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.files = []
+        for index in range(10):
+            path = os.path.join(self.tmp_dir.name, 'package_{}.py'.format(index))
+            with open(path, 'w') as f:
+                f.write('__version__ = "1.{}.0"\n'.format(index))
+            self.files.append(path)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    async def test_get_set_bump(self):
+        pybump_async = PybumpAsync(max_concurrency=4)
+
+        versions = await asyncio.gather(*(pybump_async.get(path) for path in self.files))
+        self.assertEqual([str(version) for version in versions], ['1.{}.0'.format(i) for i in range(10)])
+
+        versions = await asyncio.gather(*(pybump_async.bump(path, 'patch') for path in self.files))
+        self.assertEqual([str(version) for version in versions], ['1.{}.1'.format(i) for i in range(10)])
+
+        self.assertEqual(str(await pybump_async.set(self.files[0], 'v2.0.0')), 'v2.0.0')
+        self.assertEqual(str(await pybump_async.get(self.files[0])), 'v2.0.0')
+
+        with self.assertRaises(ValueError):
+            await pybump_async.set(self.files[0], '2.0')
+
+    async def test_concurrent_bumps_of_one_file(self):
+        pybump_async = PybumpAsync(max_concurrency=8)
+        versions = await asyncio.gather(*(pybump_async.bump(self.files[0], 'patch') for _ in range(20)))
+        self.assertEqual(sorted(version.version[2] for version in versions), list(range(1, 21)),
+                         msg="concurrent read-modify-write of a file are serialised by the file lock")
+        self.assertEqual(str(await pybump_async.get(self.files[0])), '1.0.20')
+
+    async def test_max_concurrency(self):
+        pybump_async = PybumpAsync(max_concurrency=3)
+        lock = threading.Lock()
+        counters = {'running': 0, 'max_running': 0}
+
+        def blocking_operation():
+            with lock:
+                counters['running'] += 1
+                counters['max_running'] = max(counters['max_running'], counters['running'])
+            time.sleep(0.01)
+            with lock:
+                counters['running'] -= 1
+
+        await asyncio.gather(*(pybump_async.run_in_executor(blocking_operation) for _ in range(12)))
+        self.assertLessEqual(counters['max_running'], 3)
+
+    @mock.patch('src.pybump_async.fetch_json', side_effect=mocked_fetch_json)
+    async def test_check_available_python_patches(self, mock_fetch_json):
+        result = await PybumpAsync().check_available_python_patches(
+            ['pybump==1.3.3', 'GitPython >= 3.1.7 # comment', 'pyyaml'])
+        self.assertEqual(result, [
+            {'package_name': 'pybump', 'version': '1.3.3', 'patchable': True, 'latest_patch': '1.3.8'},
+            {'package_name': 'GitPython', 'version': '3.1.7', 'patchable': True, 'latest_patch': '3.1.12'},
+        ])
+        self.assertEqual(mock_fetch_json.call_count, 2, msg="requirements without a version are not fetched")
+
+        with self.assertRaises(RuntimeError):
+            await PybumpAsync().get_pypi_package_releases('SOME_not_ex1st1ng_pypi_package')
+
+
+if __name__ == '__main__':
+    unittest.main()
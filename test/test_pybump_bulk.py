@@ -0,0 +1,54 @@
+import unittest
+
+from src.pybump_bulk import PybumpVersionColumns, numpy
+
+versions = ['1.2.3', 'v3.1.0-rc.1', '3.1.0', '3.1.10+build.5', '3.2.0', 'not-a-version', '3.1',
+            '1' * 19 + '.0.0', None, '3.1.0-alpha']
+
+
+class PyBumpBulkTest(unittest.TestCase):
+    use_numpy = False
+
+    def setUp(self):
+        self.columns = PybumpVersionColumns(versions, use_numpy=self.use_numpy)
+
+    def test_columns(self):
+        self.assertEqual(len(self.columns), 10)
+        self.assertEqual(list(self.columns.major), [1, 3, 3, 3, 3, 0, 0, 0, 0, 3])
+        self.assertEqual(list(self.columns.minor), [2, 1, 1, 1, 2, 0, 0, 0, 0, 1])
+        self.assertEqual(list(self.columns.patch), [3, 0, 0, 10, 0, 0, 0, 0, 0, 0])
+        self.assertEqual(self.columns.release, ['', 'rc.1', '', '', '', '', '', '', '', 'alpha'])
+        self.assertEqual(self.columns.metadata, ['', '', '', 'build.5', '', '', '', '', '', ''])
+        self.assertEqual([bool(x) for x in self.columns.valid],
+                         [True, True, True, True, True, False, False, False, False, True],
+                         msg="numbers that do not fit 64 bits are invalid")
+
+    def test_line_mask(self):
+        self.assertEqual(self.columns.select(self.columns.line_mask('3.1')),
+                         ['v3.1.0-rc.1', '3.1.0', '3.1.10+build.5', '3.1.0-alpha'])
+        self.assertEqual(self.columns.select(self.columns.line_mask('1')), ['1.2.3'])
+        with self.assertRaises(ValueError):
+            self.columns.line_mask('3.1.0')
+
+    def test_compare(self):
+        self.assertEqual(list(self.columns.compare('3.1.0-beta')), [-1, 1, 1, 1, 1, 0, 0, 0, 0, -1])
+        self.assertEqual(self.columns.select([x >= 0 for x in self.columns.compare('v3.1.0')]),
+                         ['3.1.0', '3.1.10+build.5', '3.2.0', 'not-a-version', '3.1', '1' * 19 + '.0.0', None],
+                         msg="invalid rows compare as equal")
+        with self.assertRaises(ValueError):
+            self.columns.compare('3.1')
+
+
+@unittest.skipUnless(numpy, 'numpy is not installed')
+class PyBumpBulkNumpyTest(PyBumpBulkTest):
+    use_numpy = True
+
+    def test_numpy_columns(self):
+        self.assertEqual(self.columns.major.dtype, numpy.int64)
+        self.assertEqual(self.columns.valid.dtype, bool)
+        mask = self.columns.valid & (self.columns.compare('3.1.0') > 0)
+        self.assertEqual(self.columns.select(mask), ['3.1.10+build.5', '3.2.0'])
+
+
+if __name__ == '__main__':
+    unittest.main()
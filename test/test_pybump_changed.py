@@ -0,0 +1,79 @@
+import shutil
+import unittest
+
+from test import PybumpGitTestCase
+from src.pybump_changed import PybumpChangedArtifacts, build_artifact_index
+from src.pybump import read_version_from_file
+
+chart = """apiVersion: v2
+name: {}
+version: {}
+appVersion: 1.0.0
+"""
+
+dynamic_pyproject = """[project]
+name = "lib"
+dynamic = ["version"]
+"""
+
+
+@unittest.skipUnless(shutil.which('git'), 'git executable is required')
+class PyBumpChangedTest(PybumpGitTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.write('charts/a/Chart.yaml', chart.format('a', '0.1.0'))
+        self.write('charts/a/templates/deployment.yaml', 'kind: Deployment\n')
+        self.write('charts/b/Chart.yaml', chart.format('b', '0.2.0'))
+        self.write('charts/b/templates/deployment.yaml', 'kind: Deployment\n')
+        self.write('lib/VERSION', '1.2.3\n')
+        self.write('lib/pyproject.toml', dynamic_pyproject)
+        self.write('lib/src/module.py', 'x = 1\n')
+        self.write('.github/VERSION', '9.9.9\n')
+        self.git('add', '.')
+        self.git('commit', '-q', '-m', 'initial')
+        self.git('tag', 'v1.0.0')
+
+    def commit_change(self, path):
+        self.write(path, 'changed\n')
+        self.git('add', '.')
+        self.git('commit', '-q', '-m', 'change {}'.format(path))
+
+    def test_build_artifact_index(self):
+        self.assertEqual(build_artifact_index(self.root), {
+            self.path('charts/a'): [self.path('charts/a/Chart.yaml')],
+            self.path('charts/b'): [self.path('charts/b/Chart.yaml')],
+            self.path('lib'): [self.path('lib/VERSION'), self.path('lib/pyproject.toml')],
+        })
+
+    def test_get_changed_artifacts(self):
+        self.assertEqual(PybumpChangedArtifacts(self.root).get_changed_artifacts('last-tag'), [])
+
+        self.commit_change('charts/b/templates/deployment.yaml')
+        self.commit_change('lib/src/module.py')
+        self.commit_change('README.md')
+        changed_artifacts = PybumpChangedArtifacts(self.root)
+        self.assertEqual(changed_artifacts.get_changed_artifacts('v1.0.0'),
+                         [self.path('charts/b/Chart.yaml'), self.path('lib/VERSION')],
+                         msg="pyproject.toml with a dynamic version owns no version")
+        self.assertEqual(changed_artifacts.get_changed_artifacts('HEAD~1'), [])
+        self.assertEqual(PybumpChangedArtifacts(self.path('charts')).get_changed_artifacts('last-tag'),
+                         [self.path('charts/b/Chart.yaml')])
+
+        with self.assertRaises(RuntimeError):
+            changed_artifacts.get_changed_artifacts('missing-ref')
+        with self.assertRaises(RuntimeError):
+            changed_artifacts.get_changed_artifacts('last-tag', tag_prefix='chart-')
+
+    def test_bump(self):
+        self.commit_change('charts/a/templates/deployment.yaml')
+        self.commit_change('lib/src/module.py')
+        versions = PybumpChangedArtifacts(self.root).bump('last-tag', 'minor', app_version=True)
+        self.assertEqual({path: str(version) for path, version in versions.items()},
+                         {self.path('charts/a/Chart.yaml'): '1.1.0', self.path('lib/VERSION'): '1.3.0'})
+        self.assertEqual(read_version_from_file(self.path('charts/a/Chart.yaml'), False).get('version'), '0.1.0')
+        self.assertEqual(read_version_from_file(self.path('charts/b/Chart.yaml'), True).get('version'), '1.0.0')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import threading
+import unittest
+from io import StringIO
+
+from test import PybumpTempDirTestCase
+from src.pybump_fanout import PybumpFanout, find_repository_files, read_repository_roots, read_requirements
+from src.pybump_patch import PybumpReleaseCache
+
+releases = {
+    'pyyaml': ['5.3.0', '5.3.1', '5.4.0'],
+    'gitpython': ['3.1.7', '3.1.12', '3.2.0'],
+}
+
+
+class PyBumpFanoutTest(PybumpTempDirTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.fetched = []
+        self.fetch_lock = threading.Lock()
+        for repository in ('one', 'two'):
+            os.makedirs(self.path(repository, 'chart'))
+            os.makedirs(self.path(repository, '.git'))
+        self.write('one/VERSION', '1.2.3\n')
+        self.write('one/pyproject.toml', '[project]\nname = "one"\ndynamic = ["version"]\n')
+        self.write('one/requirements.txt', '-r requirements-dev.txt\npyyaml==5.3.0  # pinned\nGitPython>=3.1.7\n')
+        self.write('one/.pybump.toml', '[groups.app]\nfiles = ["VERSION", "chart/Chart.yaml"]\n')
+        self.write('one/chart/Chart.yaml', 'apiVersion: v2\nname: one\nversion: 1.2.4\n')
+        self.write('two/chart/Chart.yaml', 'apiVersion: v2\nname: two\nversion: not-a-version\n')
+        self.write('two/.git/VERSION', '0.0.1\n')
+        self.write('two/requirements-dev.txt', 'PyYAML==5.3.1\n')
+
+    def fetch(self, package_name):
+        with self.fetch_lock:
+            self.fetched.append(package_name)
+        return {'releases': {release: [] for release in releases[package_name.lower()]}}
+
+    def test_read_repository_roots(self):
+        self.assertEqual(read_repository_roots(StringIO('/repos/a\n\n# comment\n  /repos/b \n/repos/a\n')),
+                         ['/repos/a', '/repos/b'])
+
+    def test_find_repository_files(self):
+        version_files, requirement_files = find_repository_files(self.path('one'))
+        self.assertEqual(version_files, [self.path('one', 'VERSION'), self.path('one', 'chart', 'Chart.yaml'),
+                                         self.path('one', 'pyproject.toml')])
+        self.assertEqual(requirement_files, [self.path('one', 'requirements.txt')])
+        self.assertEqual(read_requirements(self.path('one', 'requirements.txt')), ['pyyaml==5.3.0', 'GitPython>=3.1.7'])
+
+    def test_get(self):
+        roots = [self.path('one'), self.path('two'), self.path('missing')]
+        records = PybumpFanout(max_workers=2).run(roots, 'get')
+        self.assertEqual([(record['repository'], record['path'], record['status']) for record in records], [
+            (self.path('one'), 'VERSION', 'ok'),
+            (self.path('one'), os.path.join('chart', 'Chart.yaml'), 'ok'),
+            (self.path('two'), os.path.join('chart', 'Chart.yaml'), 'invalid'),
+            (self.path('missing'), '.', 'error'),
+        ])
+        self.assertEqual(records[1]['message'], '1.2.4')
+
+    def test_verify(self):
+        records = PybumpFanout().run([self.path('one')], 'verify')
+        self.assertEqual([record['status'] for record in records], ['drift', 'drift'],
+                         msg="workspace group members of a repository are compared")
+
+    def test_scan(self):
+        fanout = PybumpFanout(max_workers=4, release_cache=PybumpReleaseCache(self.fetch))
+        records = fanout.run([self.path('one'), self.path('two')] * 3, 'scan')
+        self.assertEqual([(record['status'], record['message']) for record in records[:3]], [
+            ('patchable', 'pyyaml 5.3.0 -> 5.3.1'),
+            ('patchable', 'GitPython 3.1.7 -> 3.1.12'),
+            ('ok', 'PyYAML 5.3.1'),
+        ])
+        self.assertEqual(len(records), 9)
+        self.assertEqual(sorted(name.lower() for name in self.fetched), ['gitpython', 'pyyaml'],
+                         msg="every package is fetched once across all repositories")
+
+
+if __name__ == '__main__':
+    unittest.main()
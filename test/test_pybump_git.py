@@ -0,0 +1,146 @@
+import os
+import shutil
+import unittest
+from importlib.util import find_spec
+from subprocess import Popen
+from unittest import mock
+
+from test import PybumpTempDirTestCase, PybumpGitTestCase
+from src.pybump_git import PybumpTagIndex, PybumpShaResolver, PybumpBlobReader, find_git_dir, list_git_tags, \
+    get_commit_bump_level, get_bump_level, get_ref_versions
+
+packed_refs = """# pack-refs with: peeled fully-peeled sorted
+1111111111111111111111111111111111111111 refs/heads/master
+2222222222222222222222222222222222222222 refs/tags/v1.2.3
+3333333333333333333333333333333333333333 refs/tags/v1.10.0-rc.1
+^4444444444444444444444444444444444444444
+5555555555555555555555555555555555555555 refs/tags/chart-v5.0.0
+6666666666666666666666666666666666666666 refs/tags/latest
+"""
+
+
+class PyBumpGitTest(PybumpTempDirTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.git_dir = os.path.join(self.root, '.git')
+        os.makedirs(os.path.join(self.git_dir, 'refs', 'tags', 'nested'))
+        os.makedirs(os.path.join(self.root, 'src', 'package'))
+        self.write('.git/packed-refs', packed_refs)
+        self.write('.git/refs/tags/v1.9.0', '7777777777777777777777777777777777777777\n')
+        self.write('.git/refs/tags/nested/v9.0.0', '8888888888888888888888888888888888888888\n')
+
+    def test_find_git_dir(self):
+        self.assertEqual(find_git_dir(os.path.join(self.root, 'src', 'package')), (self.root, self.git_dir))
+        self.assertEqual(find_git_dir(os.path.join(self.root, 'src', 'package', 'VERSION')), (self.root, self.git_dir))
+
+        # linked worktree, '.git' is a file that points to the actual git directory
+        worktree = os.path.join(self.root, 'src')
+        self.write('src/.git', 'gitdir: ../.git\n')
+        self.assertEqual(find_git_dir(os.path.join(worktree, 'package')), (worktree, self.git_dir))
+
+    def test_tag_index(self):
+        self.assertEqual(list_git_tags(self.root),
+                         ['chart-v5.0.0', 'latest', 'nested/v9.0.0', 'v1.10.0-rc.1', 'v1.2.3', 'v1.9.0'])
+
+        tag, version = PybumpTagIndex(self.root).get_max_version()
+        self.assertEqual(tag, 'v1.10.0-rc.1')
+        self.assertEqual(str(version), 'v1.10.0-rc.1')
+
+        tag, version = PybumpTagIndex(self.root).get_max_version(prefix='chart-')
+        self.assertEqual(tag, 'chart-v5.0.0')
+        self.assertEqual(str(version), 'v5.0.0')
+
+        self.assertEqual(PybumpTagIndex(self.root).get_max_version(prefix='missing-'), (None, None))
+
+    def test_get_commit_bump_level(self):
+        self.assertEqual(get_commit_bump_level('fix: handle empty files'), 'patch')
+        self.assertEqual(get_commit_bump_level('feat(helm): support umbrella charts'), 'minor')
+        self.assertEqual(get_commit_bump_level('feat!: drop python 3.7'), 'major')
+        self.assertEqual(get_commit_bump_level('refactor(core)!: rename api'), 'major')
+        self.assertEqual(get_commit_bump_level('chore: cleanup\n\nBREAKING CHANGE: config moved'), 'major')
+        self.assertEqual(get_commit_bump_level('BREAKING-CHANGE: config moved'), 'major')
+        self.assertIsNone(get_commit_bump_level('docs: typo'))
+        self.assertIsNone(get_commit_bump_level('update readme'))
+
+
+@unittest.skipUnless(shutil.which('git'), 'git executable is required')
+class PyBumpGitLogTest(PybumpGitTestCase):
+
+    def commit(self, message):
+        self.git('commit', '-q', '--allow-empty', '-m', message)
+
+    def test_get_bump_level(self):
+        self.commit('feat!: first release')
+        self.git('tag', 'v1.0.0')
+        self.assertEqual(get_bump_level(self.root, 'v1.0.0'), 'patch', msg="no commits since tag, default level")
+        self.assertEqual(get_bump_level(self.root, 'v1.0.0', default=None), None)
+
+        self.commit('docs: readme')
+        self.commit('fix: bug\n\nmultiline body\n\nwith empty lines')
+        self.assertEqual(get_bump_level(self.root, 'v1.0.0'), 'patch')
+        self.commit('feat(cli): new flag')
+        self.commit('chore: deps')
+        self.assertEqual(get_bump_level(self.root, 'v1.0.0'), 'minor')
+        self.assertEqual(get_bump_level(self.root), 'major', msg="without a tag the full history is scanned")
+        with self.assertRaisesRegex(RuntimeError, 'git log v9.9.9..HEAD failed: .*v9.9.9'):
+            get_bump_level(self.root, 'v9.9.9')
+
+    @unittest.skipUnless(find_spec('git'), 'GitPython is required')
+    def test_sha_resolver(self):
+        self.commit('feat: first commit')
+        head_sha = self.git('rev-parse', 'HEAD').stdout.decode().strip()
+        paths = [os.path.join(self.root, 'charts', str(index), 'Chart.yaml') for index in range(50)]
+        for path in paths:
+            os.makedirs(os.path.dirname(path))
+
+        resolver = PybumpShaResolver()
+        self.assertEqual(set(resolver.get_head_sha(path) for path in paths), {head_sha})
+        self.assertEqual(resolver.get_head_sha(os.path.join(self.root, 'VERSION')), head_sha)
+        self.assertEqual(resolver.head_lookups, 1, msg="HEAD is resolved once per repository")
+
+    def test_ref_versions(self):
+        os.makedirs(os.path.join(self.root, 'chart'))
+        chart_path = os.path.join(self.root, 'chart', 'Chart.yaml')
+        version_path = os.path.join(self.root, 'VERSION')
+        for version in ('1.0.0', '1.1.0'):
+            with open(chart_path, 'w') as f:
+                f.write('apiVersion: v2\nname: app\nversion: {0}\nappVersion: "{0}-app"\n'.format(version))
+            with open(version_path, 'w') as f:
+                f.write('{}\n'.format(version))
+            self.git('add', '.')
+            self.commit('feat: release {}'.format(version))
+            self.git('tag', 'v{}'.format(version))
+        with open(version_path, 'w') as f:
+            f.write('9.9.9\n')
+
+        with mock.patch('src.pybump_git.Popen', wraps=Popen) as popen:
+            versions = get_ref_versions([chart_path, version_path], ['v1.0.0', 'HEAD~1', 'v1.1.0'])
+        self.assertEqual(popen.call_count, 1, msg="a single git process reads all files and revisions")
+        self.assertEqual(versions, {
+            (chart_path, 'v1.0.0'): '1.0.0', (chart_path, 'HEAD~1'): '1.0.0', (chart_path, 'v1.1.0'): '1.1.0',
+            (version_path, 'v1.0.0'): '1.0.0', (version_path, 'HEAD~1'): '1.0.0', (version_path, 'v1.1.0'): '1.1.0',
+        }, msg="the worktree is never read")
+        self.assertEqual(get_ref_versions([chart_path], ['HEAD'], app_version=True),
+                         {(chart_path, 'HEAD'): '1.1.0-app'})
+
+        with self.assertRaisesRegex(ValueError, 'Unknown revision missing-ref'):
+            get_ref_versions([chart_path], ['missing-ref'])
+        with self.assertRaisesRegex(ValueError, 'not found at revision v1.0.0'):
+            get_ref_versions([os.path.join(self.root, 'new.yaml')], ['v1.0.0'])
+        with self.assertRaisesRegex(ValueError, 'not found at revision'):
+            get_ref_versions([os.path.join(self.root, 'chart')], ['HEAD'])
+
+        with PybumpBlobReader(self.root) as reader:
+            self.assertEqual(reader.read(':VERSION'), '1.1.0\n')
+            self.assertIsNone(reader.read('HEAD:missing'))
+            self.assertTrue(reader.has_commit('v1.0.0'))
+            self.assertFalse(reader.has_commit('missing-ref'))
+            with self.assertRaises(ValueError):
+                reader.read('HEAD:VERSION\nHEAD:VERSION')
+        with self.assertRaises(RuntimeError):
+            PybumpBlobReader(os.path.join(self.root, 'missing')).read('HEAD:VERSION')
+
+
+if __name__ == '__main__':
+    unittest.main()
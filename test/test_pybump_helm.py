@@ -0,0 +1,147 @@
+import os
+import unittest
+from io import StringIO
+
+from test import PybumpTempDirTestCase
+from src.pybump_helm import PybumpChartTree, find_helm_charts, is_subchart
+from src.pybump import read_version_from_file
+from src.pybump_report import PybumpReport
+
+umbrella_chart = """apiVersion: v2
+name: umbrella
+version: 1.0.0
+dependencies:
+- name: frontend
+  version: 0.1.0 # pinned frontend version
+  repository: file://charts/frontend
+- name: backend
+  version: ~0.2.0
+  repository: file://charts/backend
+- name: redis
+  version: 17.0.0
+  repository: https://charts.bitnami.com/bitnami
+"""
+
+frontend_chart = """apiVersion: v2
+name: frontend
+version: 0.1.0
+"""
+
+backend_chart = """apiVersion: v2
+name: backend
+version: 0.2.0
+"""
+
+common_chart = """apiVersion: v2
+name: common
+type: library
+version: 1.0.0
+"""
+
+
+class PyBumpHelmTest(PybumpTempDirTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.write('Chart.yaml', umbrella_chart)
+        self.write('charts/frontend/Chart.yaml', frontend_chart)
+        self.write('charts/backend/Chart.yaml', backend_chart)
+        self.write('.git/Chart.yaml', umbrella_chart)
+
+    def read_version(self, path):
+        return read_version_from_file(os.path.join(self.root, path), False)
+
+    def test_find_helm_charts(self):
+        self.assertEqual(list(find_helm_charts(self.root)), [
+            os.path.join(self.root, 'Chart.yaml'),
+            os.path.join(self.root, 'charts', 'backend', 'Chart.yaml'),
+            os.path.join(self.root, 'charts', 'frontend', 'Chart.yaml'),
+        ])
+
+    def test_is_subchart(self):
+        self.assertFalse(is_subchart(os.path.join(self.root, 'Chart.yaml'), self.root))
+        self.assertTrue(is_subchart(os.path.join(self.root, 'charts', 'backend', 'Chart.yaml'), self.root))
+
+    def test_bump_subcharts(self):
+        chart_tree = PybumpChartTree(self.root)
+        self.assertEqual(sorted(chart_tree.index), ['backend', 'frontend', 'umbrella'])
+
+        versions, updates = chart_tree.bump_subcharts('minor')
+        self.assertEqual({os.path.relpath(path, self.root): str(version) for path, version in versions.items()},
+                         {'charts/frontend/Chart.yaml': '0.2.0', 'charts/backend/Chart.yaml': '0.3.0'})
+        # only the pinned frontend dependency is updated, version ranges and unknown charts are untouched
+        self.assertEqual(updates, [(os.path.join(self.root, 'Chart.yaml'), 'frontend', '0.1.0', '0.2.0')])
+
+        self.assertEqual(self.read_version('charts/frontend/Chart.yaml')['version'], '0.2.0')
+        umbrella = self.read_version('Chart.yaml')
+        self.assertEqual(umbrella['version'], '1.0.0')
+        self.assertEqual([dependency['version'] for dependency in umbrella['file_content']['dependencies']],
+                         ['0.2.0', '~0.2.0', '17.0.0'])
+        with open(os.path.join(self.root, 'Chart.yaml')) as f:
+            self.assertIn('# pinned frontend version', f.read(), msg="comments should be preserved")
+
+    def test_read_only(self):
+        chart_tree = PybumpChartTree(self.root, read_only=True)
+        self.assertEqual(str(chart_tree.get_versions()[self.path('charts/backend/Chart.yaml')]), '0.2.0')
+
+    def test_write_files_rollback(self):
+        class FailingReport(PybumpReport):
+            def write(self, file_path, *args, **kwargs):
+                if file_path.endswith(os.path.join('frontend', 'Chart.yaml')):
+                    raise OSError('disk full')
+                return super().write(file_path, *args, **kwargs)
+
+        stream = StringIO()
+        with self.assertRaises(OSError):
+            PybumpChartTree(self.root).bump_subcharts('minor', FailingReport(output='ndjson', stream=stream))
+        self.assertIn('"bytes_changed": 1', stream.getvalue(), msg="the old text is taken from the loaded chart")
+        self.assertEqual(self.read('charts/backend/Chart.yaml'), backend_chart, msg="written charts are restored")
+
+    def test_propagate_dependencies_no_changes(self):
+        chart_tree = PybumpChartTree(self.root)
+        frontend_path = os.path.join(self.root, 'charts', 'frontend', 'Chart.yaml')
+        self.assertEqual(chart_tree.propagate_dependencies({frontend_path: chart_tree.get_versions()[frontend_path]}),
+                         [], msg="dependency already pinned to the same version should not be patched")
+
+    def test_plan(self):
+        os.makedirs(os.path.join(self.root, 'libs', 'common'))
+        self.write('libs/common/Chart.yaml', common_chart)
+        self.write('charts/frontend/Chart.yaml', frontend_chart + 'dependencies:\n- name: common\n  version: 1.0.0\n')
+        self.write('charts/backend/Chart.yaml', backend_chart + 'dependencies:\n- name: common\n  version: ^1.0.0\n')
+
+        chart_tree = PybumpChartTree(self.root)
+        release_order = [os.path.relpath(path, self.root) for path in chart_tree.get_release_order()]
+        self.assertLess(release_order.index('libs/common/Chart.yaml'),
+                        release_order.index('charts/frontend/Chart.yaml'))
+        self.assertLess(release_order.index('charts/frontend/Chart.yaml'), release_order.index('Chart.yaml'))
+
+        # backend depends on a range of common, so neither backend nor its dependents need a release
+        plan = chart_tree.plan(['common'], level='minor')
+        self.assertEqual([(os.path.relpath(path, self.root), name, old, new) for path, name, old, new in plan], [
+            ('libs/common/Chart.yaml', 'common', '1.0.0', '1.1.0'),
+            ('charts/frontend/Chart.yaml', 'frontend', '0.1.0', '0.1.1'),
+            ('Chart.yaml', 'umbrella', '1.0.0', '1.0.1'),
+        ])
+        self.assertEqual(chart_tree.plan([os.path.join(self.root, 'charts', 'backend')]),
+                         [(os.path.join(self.root, 'charts', 'backend', 'Chart.yaml'), 'backend', '0.2.0', '0.2.1')])
+        with self.assertRaises(ValueError):
+            chart_tree.plan(['missing'])
+
+        chart_tree.apply_plan(plan)
+        self.assertEqual(self.read_version('libs/common/Chart.yaml')['version'], '1.1.0')
+        frontend = self.read_version('charts/frontend/Chart.yaml')
+        self.assertEqual((frontend['version'], frontend['file_content']['dependencies'][0]['version']),
+                         ('0.1.1', '1.1.0'))
+        umbrella = self.read_version('Chart.yaml')
+        self.assertEqual((umbrella['version'], umbrella['file_content']['dependencies'][0]['version']),
+                         ('1.0.1', '0.1.1'))
+        self.assertEqual(self.read_version('charts/backend/Chart.yaml')['version'], '0.2.0')
+
+    def test_release_order_cycle(self):
+        self.write('charts/frontend/Chart.yaml', frontend_chart + 'dependencies:\n- name: umbrella\n  version: 1.0.0\n')
+        with self.assertRaises(ValueError):
+            PybumpChartTree(self.root).get_release_order()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import unittest
+from io import StringIO
+
+from test import PybumpTempDirTestCase
+from src.pybump_image import PybumpImageUpdater, find_scalar, split_image_reference
+from src.pybump_report import PybumpReport
+from src.pybump import read_version_from_file
+
+values_yaml = """image:
+  repository: registry.example.com/team/app
+  # the tag is set by CI
+  tag: "1.2.3"  # pinned
+  pullPolicy: IfNotPresent
+sidecar:
+  image:
+    repository: registry.example.com/team/sidecar
+    tag: 1.2.3
+"""
+
+kustomization_yaml = """images:
+- name: registry.example.com/team/app
+  newTag: 1.2.3
+- name: registry.example.com/team/other
+  newTag: 1.2.3
+- newTag: 1.2.3
+  name: registry.example.com/team/app
+"""
+
+manifests_yaml = """apiVersion: apps/v1
+kind: Deployment
+spec:
+  template:
+    spec:
+      containers:
+      - name: app
+        image: registry.example.com/team/app:1.2.3
+      - name: pinned
+        image: registry.example.com/team/app@sha256:abcdef
+---
+apiVersion: batch/v1
+kind: Job
+spec:
+  template:
+    spec:
+      containers:
+        - image: 'registry.example.com/team/app:1.2.2'
+          name: migrate
+"""
+
+chart_yaml = """apiVersion: v2
+name: app
+version: 0.1.0
+appVersion: 1.2.3
+"""
+
+
+class PyBumpImageTest(PybumpTempDirTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.updater = PybumpImageUpdater('registry.example.com/team/app', '1.3.0')
+
+    def test_helpers(self):
+        self.assertEqual(find_scalar('tag: "1.2.3"  # pinned', 5), (6, 11, '1.2.3'))
+        self.assertEqual(find_scalar('tag: 1.2.3 # comment', 5), (5, 10, '1.2.3'))
+        self.assertIsNone(find_scalar('tag: {{ .Values.tag }}', 5))
+        self.assertIsNone(find_scalar('image: {repository: app}', 7))
+        self.assertEqual(split_image_reference('registry:5000/app:1.0'), ('registry:5000/app', '1.0'))
+        self.assertEqual(split_image_reference('registry:5000/app'), ('registry:5000/app', None))
+        self.assertEqual(split_image_reference('app@sha256:abc'), ('app', None))
+        with self.assertRaises(ValueError):
+            PybumpImageUpdater('app', '1.3.0+build')
+
+    def test_update_text(self):
+        new_text, changes = self.updater.update_text(values_yaml)
+        self.assertEqual(changes, [(4, '1.2.3')])
+        self.assertIn('  tag: "1.3.0"  # pinned\n', new_text, msg="quotes and comments are kept")
+        self.assertIn('    tag: 1.2.3\n', new_text, msg="other images are left untouched")
+
+        new_text, changes = self.updater.update_text(kustomization_yaml)
+        self.assertEqual(changes, [(3, '1.2.3'), (6, '1.2.3')])
+
+        new_text, changes = self.updater.update_text(manifests_yaml)
+        self.assertEqual(changes, [(8, '1.2.3'), (18, '1.2.2')])
+        self.assertIn("- image: 'registry.example.com/team/app:1.3.0'\n", new_text)
+        self.assertIn('image: registry.example.com/team/app@sha256:abcdef\n', new_text)
+
+        self.assertEqual(self.updater.update_text(new_text), (new_text, []), msg="updated text has nothing to change")
+
+    def test_update_files(self):
+        values_path = self.write('chart/values.yaml', values_yaml)
+        chart_path = self.write('chart/Chart.yaml', chart_yaml)
+        manifests_path = self.write('deploy/manifests.yml', manifests_yaml)
+        self.write('deploy/other.yaml', 'image: registry.example.com/team/other:1.2.3\n')
+        self.write('.hidden/values.yaml', values_yaml)
+
+        stream = StringIO()
+        changes = self.updater.update_files([self.root], PybumpReport('ndjson', stream=stream), app_version=True)
+        self.assertEqual(changes, [
+            (values_path, 4, '1.2.3', '1.3.0'),
+            (chart_path, None, '1.2.3', '1.3.0'),
+            (manifests_path, 8, '1.2.3', '1.3.0'),
+            (manifests_path, 18, '1.2.2', '1.3.0'),
+        ])
+        self.assertEqual(len(stream.getvalue().splitlines()), 3, msg="a record per changed file")
+        self.assertEqual(read_version_from_file(chart_path, True)['version'], '1.3.0')
+
+        with self.assertRaises(ValueError):
+            self.updater.update_files([chart_path.replace('.yaml', '.txt')])
+
+
+if __name__ == '__main__':
+    unittest.main()
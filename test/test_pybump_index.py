@@ -0,0 +1,150 @@
+import json
+import os
+import stat
+import unittest
+from subprocess import Popen, PIPE
+from unittest import mock
+
+from test import PybumpTempDirTestCase
+from src.pybump import load_yaml
+from src.pybump_index import PybumpHelmIndex, build_index_entry
+
+helm_index = """apiVersion: v1
+entries:
+  backend:
+  - apiVersion: v2
+    appVersion: 2.1.0
+    created: "2024-02-01T10:00:00Z"
+    dependencies:
+    - name: redis
+      version: 99.0.0
+    digest: bbb
+    name: backend
+    urls:
+    - https://charts.example.com/backend-1.10.0.tgz
+    version: 1.10.0
+  - apiVersion: v2
+    name: backend
+    version: 1.9.0
+  - apiVersion: v2
+    name: backend
+    version: 2.0.0-rc.1
+  - apiVersion: v2
+    name: backend
+    version: not-a-version
+  frontend:
+  - apiVersion: v2
+    name: frontend
+    version: 0.1.0
+  - &anchored
+    apiVersion: v2
+    name: frontend
+    version: 0.2.0
+generated: "2024-02-01T10:00:00Z"
+"""
+
+
+class PyBumpIndexTest(PybumpTempDirTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.index_path = self.write('index.yaml', helm_index)
+
+    def test_query(self):
+        helm_index_object = PybumpHelmIndex(self.index_path)
+        self.assertEqual(helm_index_object.get_charts(), ['backend', 'frontend'])
+        self.assertEqual(helm_index_object.get_versions('backend'), ['1.9.0', '1.10.0', '2.0.0-rc.1'],
+                         msg="versions are ordered by semantic version precedence, invalid versions are skipped")
+        self.assertEqual(helm_index_object.get_latest('backend'), '2.0.0-rc.1')
+        self.assertEqual(helm_index_object.get_latest('backend', line='1'), '1.10.0')
+        self.assertIsNone(helm_index_object.get_latest('backend', line='3'))
+
+        entry = helm_index_object.get_entry('backend', '1.10.0')
+        self.assertEqual(entry['urls'], ['https://charts.example.com/backend-1.10.0.tgz'])
+        self.assertEqual(entry['dependencies'], [{'name': 'redis', 'version': '99.0.0'}],
+                         msg="nested 'version' keys are not versions of the chart")
+
+        with self.assertRaises(ValueError):
+            helm_index_object.get_versions('missing')
+        with self.assertRaises(ValueError):
+            helm_index_object.get_entry('frontend', '9.9.9')
+
+    def test_stops_after_chart(self):
+        # the content after the requested chart is never parsed
+        self.write('index.yaml', helm_index.replace('generated:', '  broken: [unclosed\ngenerated:'))
+        self.assertEqual(PybumpHelmIndex(self.index_path).get_latest('backend'), '2.0.0-rc.1')
+        self.assertEqual(PybumpHelmIndex(self.index_path).get_latest('frontend'), '0.2.0')
+        with self.assertRaisesRegex(ValueError, 'Invalid YAML'):
+            PybumpHelmIndex(self.index_path).get_charts()
+
+    def test_without_libyaml(self):
+        with mock.patch('src.pybump_index.get_libyaml_loader', return_value=None):
+            self.assertEqual(PybumpHelmIndex(self.index_path).get_versions('frontend'), ['0.1.0', '0.2.0'])
+
+    def test_sidecar(self):
+        helm_index_object = PybumpHelmIndex(self.index_path, sidecar=True)
+        self.assertEqual(helm_index_object.get_latest('frontend'), '0.2.0')
+        with open(helm_index_object.sidecar_path) as f:
+            self.assertEqual(json.load(f)['charts'], {'backend': ['1.9.0', '1.10.0', '2.0.0-rc.1'],
+                                                      'frontend': ['0.1.0', '0.2.0']})
+        self.assertEqual(PybumpHelmIndex(self.index_path, sidecar=True).get_charts(), ['backend', 'frontend'])
+
+        # a changed index makes the sidecar stale
+        self.write('index.yaml', helm_index.replace('version: 0.2.0', 'version: 0.3.0'))
+        os.utime(self.index_path, ns=(1, 1))
+        self.assertEqual(PybumpHelmIndex(self.index_path, sidecar=True).get_latest('frontend'), '0.3.0')
+
+    def test_add_entry(self):
+        self.write('charts/frontend/Chart.yaml', 'apiVersion: v2\nname: frontend\nversion: 0.3.0\n'
+                                                 'description: "Frontend: \\"web\\""\n')
+        helm_index_object = PybumpHelmIndex(self.index_path)
+        helm_index_object.add_entry(build_index_entry(self.path('charts/frontend/Chart.yaml'),
+                                                      ['https://charts.example.com/frontend-0.3.0.tgz'], 'ccc'))
+        self.assertEqual(helm_index_object.get_versions('frontend'), ['0.1.0', '0.2.0', '0.3.0'])
+        entry = helm_index_object.get_entry('frontend', '0.3.0')
+        self.assertEqual((entry['description'], entry['digest'], entry['urls']),
+                         ('Frontend: "web"', 'ccc', ['https://charts.example.com/frontend-0.3.0.tgz']))
+        text = self.read('index.yaml')
+        self.assertIn('  frontend:\n  - apiVersion: "v2"\n', text, msg="the newest entry is listed first")
+        self.assertIn('    version: 0.2.0\ngenerated: "', text)
+        self.assertNotIn('2024-02-01T10:00:00Z"\n', text[-40:], msg="generated is set to now")
+        self.assertIn('  - &anchored\n', text, msg="the rest of the index is copied as is")
+
+        with self.assertRaisesRegex(ValueError, 'already in'):
+            helm_index_object.add_entry({'name': 'frontend', 'version': '0.3.0'})
+
+        for name, expected in (('api', '  backend:'), ('zeta', 'generated:')):
+            helm_index_object.add_entry({'name': name, 'version': '1.0.0', 'urls': []})
+            self.assertIn('  {}:\n  - name: "{}"\n    urls: []\n    version: "1.0.0"\n{}'.format(name, name, expected),
+                          self.read('index.yaml'), msg="new charts are added in order")
+        self.assertEqual(sorted(load_yaml(self.read('index.yaml'))['entries']), ['api', 'backend', 'frontend', 'zeta'])
+
+        self.write('index.yaml', 'apiVersion: v1\nentries:\n  a:\n  - name: a\n    version: 1.0.0')
+        helm_index_object.add_entry({'name': 'b', 'version': '1.0.0'})
+        self.assertEqual(self.read('index.yaml'), 'apiVersion: v1\nentries:\n  a:\n  - name: a\n    version: 1.0.0\n'
+                                                  '  b:\n  - name: "b"\n    version: "1.0.0"\n',
+                         msg="entries at the end of a file without a final new line")
+
+        self.write('index.yaml', 'apiVersion: v1\nentries: {}\n')
+        with self.assertRaisesRegex(ValueError, 'flow style'):
+            helm_index_object.add_entry({'name': 'a', 'version': '1.0.0'})
+
+    def test_concurrent_add_entry(self):
+        os.chmod(self.index_path, 0o640)
+        names = ['chart{}'.format(index) for index in range(6)]
+        for name in names:
+            self.write('charts/{}/Chart.yaml'.format(name), 'apiVersion: v2\nname: {}\nversion: 1.0.0\n'.format(name))
+        processes = [Popen(["python", "src/pybump.py", "index", "add", "--index", self.index_path,
+                            "--chart-file", self.path('charts/{}/Chart.yaml'.format(name)),
+                            "--url", "https://charts.example.com/{}-1.0.0.tgz".format(name)],
+                           stdout=PIPE, stderr=PIPE) for name in names]
+        outputs = sorted(process.communicate()[0].decode('utf-8').strip() for process in processes)
+        self.assertEqual(outputs, ['{} 1.0.0'.format(name) for name in names])
+        self.assertEqual(sorted(load_yaml(self.read('index.yaml'))['entries']),
+                         ['backend'] + names + ['frontend'], msg="no entry should be lost by concurrent writers")
+        self.assertEqual(stat.S_IMODE(os.stat(self.index_path).st_mode), 0o640, msg="the index keeps its mode")
+        self.assertTrue(os.path.isfile(self.index_path + '.lock'))
+
+
+if __name__ == '__main__':
+    unittest.main()
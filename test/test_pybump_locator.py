@@ -0,0 +1,140 @@
+import os
+import unittest
+
+from test import PybumpTempDirTestCase
+from src.pybump import read_version_from_file, set_version_in_content, format_content, dump_content_to_file
+from src.pybump_locator import PybumpLocator, PybumpLocators, PybumpVersionScanner, parse_locators, load_locators, \
+    get_cached_locators, LOCATORS_CACHE_SIZE
+from src.pybump_workspace import PybumpWorkspace
+
+locators_config = """[groups.app]
+files = ["Dockerfile", "setup.cfg", "src/app/_version.py"]
+
+[locators.dockerfile]
+files = ["Dockerfile"]
+pattern = '^LABEL (?P<key>version|org.opencontainers.image.version)="(?P<version>[^"]+)"'
+
+[locators.setup_cfg]
+files = ["setup.cfg"]
+key = "metadata.version"
+
+[locators.version_tuple]
+files = ["src/*/_version.py"]
+pattern = '^VERSION = \\((?P<version>[0-9, ]+)\\)'
+separator = ", "
+
+[locators.version_string]
+files = ["_version.py"]
+pattern = "^__version__ = '(?P<version>[^']+)'"
+"""
+
+dockerfile = """FROM python:3.12-slim
+LABEL version="1.2.3"
+LABEL org.opencontainers.image.version="1.2.3"
+LABEL maintainer="team"
+"""
+
+setup_cfg = """[metadata]
+name = app
+version = 1.2.3  # kept in sync by pybump
+
+[options]
+version = 9.9.9
+"""
+
+version_py = """VERSION = (1, 2, 3)
+__version__ = '1.2.3'
+"""
+
+
+class PyBumpLocatorTest(PybumpTempDirTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.config_path = self.write('.pybump.toml', locators_config)
+        self.write('Dockerfile', dockerfile)
+        self.write('setup.cfg', setup_cfg)
+        self.write('src/app/_version.py', version_py)
+        self.locators = PybumpLocators(self.config_path)
+
+    def test_locator(self):
+        locator = PybumpLocator('tuple', ['_version.py'], pattern=r'\((?P<version>[0-9, ]+)\)', separator=', ')
+        self.assertEqual(locator.to_version('1,2, 3'), '1.2.3')
+        self.assertEqual(locator.from_version('1.3.0'), '1, 3, 0')
+        with self.assertRaises(ValueError):
+            locator.from_version('1.3.0-rc.1')
+        self.assertTrue(locator.matches('src/app/_version.py'))
+        self.assertEqual(PybumpLocator('cfg', ['setup.cfg'], key='metadata.version').section, 'metadata')
+        self.assertIsNone(PybumpLocator('top', ['x.toml'], key='version').section)
+
+        self.assertEqual(PybumpLocator('scoped', ['file'], pattern='(?i:version)=(?P<version>.+)').name, 'scoped')
+        with self.assertRaisesRegex(ValueError, "Locator 'flags' pattern cannot be combined"):
+            PybumpLocator('flags', ['file'], pattern='(?i)version=(?P<version>.+)')
+        for kwargs in ({'pattern': 'version=(.+)'}, {'pattern': '(?P<version>a)\\1'}, {'pattern': '(?P<version>'},
+                       {'key': 'metadata..version'}, {'pattern': '(?P<version>.+)', 'key': 'version'}, {}):
+            with self.assertRaises(ValueError, msg=kwargs):
+                PybumpLocator('invalid', ['file'], **kwargs)
+        with self.assertRaises(ValueError):
+            PybumpLocator('invalid', [], key='version')
+
+    def test_parse_locators(self):
+        self.assertEqual([locator.name for locator in parse_locators(locators_config)],
+                         ['dockerfile', 'setup_cfg', 'version_tuple', 'version_string'])
+        self.assertEqual(parse_locators('[groups.app]\nfiles = ["VERSION"]\n'), [])
+        with self.assertRaises(ValueError):
+            parse_locators('[locators.dockerfile]\nfiles = ["Dockerfile"]\nkey = "version"\nregex = "x"\n')
+        with self.assertRaises(ValueError):
+            parse_locators('[locators')
+
+    def test_scanner(self):
+        scanner = self.locators.get_scanner(self.path('src/app/_version.py'))
+        self.assertEqual([locator.name for locator in scanner.locators], ['version_tuple', 'version_string'],
+                         msg="locators that target the same file share a scanner")
+        self.assertIs(scanner, self.locators.get_scanner(self.path('src/app/_version.py')))
+        self.assertIsNone(self.locators.get_scanner(self.path('VERSION')))
+        self.assertEqual([value for _, _, _, value in scanner.find(version_py)], ['1, 2, 3', '1.2.3'])
+        self.assertEqual(scanner.set_version(version_py, '1.3.0'), "VERSION = (1, 3, 0)\n__version__ = '1.3.0'\n")
+
+        scanner = self.locators.get_scanner(self.path('setup.cfg'))
+        self.assertEqual(scanner.get_version('setup.cfg', setup_cfg), '1.2.3', msg="keys of other sections are skipped")
+        with self.assertRaisesRegex(RuntimeError, 'More than one'):
+            scanner.get_version('setup.cfg', setup_cfg.replace('9.9.9', '1.2.4').replace('[options]', ''))
+        with self.assertRaisesRegex(RuntimeError, 'Unable to find'):
+            scanner.get_version('setup.cfg', '[metadata]\nname = app\n')
+
+        scanner = PybumpVersionScanner([PybumpLocator('toml', ['pyproject.toml'], key='tool.poetry.version')])
+        self.assertEqual(scanner.set_version('[tool.poetry]\nversion = "1.2.3"\n', '2.0.0'),
+                         '[tool.poetry]\nversion = "2.0.0"\n')
+
+    def test_read_and_write(self):
+        for path, expected in (('Dockerfile', dockerfile.replace('1.2.3', '2.0.0')),
+                               ('setup.cfg', setup_cfg.replace('1.2.3', '2.0.0')),
+                               ('src/app/_version.py', "VERSION = (2, 0, 0)\n__version__ = '2.0.0'\n")):
+            file_path = self.path(path)
+            file_data = read_version_from_file(file_path, False, locators=self.locators)
+            self.assertEqual((file_data['version'], file_data['file_type']), ('1.2.3', 'locator'))
+            file_content = set_version_in_content(file_path, file_data['file_content'], '2.0.0', False)
+            self.assertEqual(format_content(file_path, file_content), expected)
+            dump_content_to_file(file_path, file_content)
+            self.assertEqual(read_version_from_file(file_path, False, locators=self.locators)['version'], '2.0.0')
+
+        with self.assertRaises(ValueError):
+            read_version_from_file(self.path('Dockerfile'), False)
+
+    def test_workspace(self):
+        workspace = PybumpWorkspace(self.config_path)
+        self.assertEqual(str(workspace.bump('minor')['app']), '1.3.0')
+        self.assertIn('LABEL version="1.3.0"\n', self.read('Dockerfile'))
+        self.assertIn('VERSION = (1, 3, 0)\n', self.read('src/app/_version.py'))
+
+    def test_load_locators(self):
+        self.assertIs(load_locators(self.config_path), load_locators(self.config_path),
+                      msg="locators are compiled once per process")
+        os.utime(self.config_path, ns=(1, 1))
+        self.assertIsNot(load_locators(self.config_path), self.locators)
+        self.assertEqual(get_cached_locators.cache_info().maxsize, LOCATORS_CACHE_SIZE,
+                         msg="a long running process keeps a bounded number of configs")
+
+
+if __name__ == '__main__':
+    unittest.main()
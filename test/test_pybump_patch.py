@@ -0,0 +1,170 @@
+import unittest
+from io import StringIO
+
+from test import PybumpTempDirTestCase
+from src.pybump_patch import PybumpReleaseIndex, PybumpRequirement, PybumpReleaseCache, \
+    get_versions_from_requirements, iter_toml_lock_packages, iter_pinned_requirements, get_locked_packages, \
+    check_locked_patches
+
+releases = ['3.0.9', '3.1.0', '3.1.5', '3.1.12', '3.1.13rc1', '3.1.13-rc.1', '3.2.0', '3.10.1', '4.0.0', 'latest', None]
+
+poetry_lock = """[[package]]
+name = "GitPython"
+version = "3.1.0"
+description = "GitPython is a Python library used to interact with Git repositories"
+optional = false
+files = [
+    {file = "GitPython-3.1.0.tar.gz", hash = "sha256:aaa"},
+]
+
+[package.dependencies]
+gitdb = ">=4.0.1,<5"
+
+[[package]]
+name = "internal"
+version = "1.0.0"
+description = ""
+
+[package.source]
+type = "git"
+url = "https://git.example.com/internal.git"
+
+[[package]]
+name = "pyyaml"
+version = "5.3.1"
+
+[metadata]
+lock-version = "2.0"
+"""
+
+uv_lock = """version = 1
+requires-python = ">=3.8"
+
+[[package]]
+name = "app"
+version = "0.1.0"
+source = { editable = "." }
+dependencies = [
+    { name = "pyyaml" },
+]
+
+[[package]]
+name = "PyYAML"
+version = "5.3.1"
+source = { registry = "https://pypi.org/simple" }
+sdist = { url = "https://files.example.com/PyYAML-5.3.1.tar.gz", hash = "sha256:bbb" }
+"""
+
+compiled_requirements = """#
+# This file is autogenerated by pip-compile
+#
+--index-url https://pypi.org/simple
+gitpython==3.1.0 \\
+    --hash=sha256:aaa
+    # via -r requirements.in
+-e file:.
+uvicorn[standard]==0.29.0 ; python_version >= "3.8"
+requests>=2.0
+"""
+
+
+class PyBumpPatchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.index = PybumpReleaseIndex(releases)
+
+    def test_release_index(self):
+        self.assertEqual(len(self.index), 8, msg="releases that are not a semantic version are skipped")
+        self.assertEqual(self.index.get_latest(), '4.0.0')
+        self.assertEqual(self.index.get_latest((3,)), '3.10.1')
+        self.assertEqual(self.index.get_latest((3, 1)), '3.1.13-rc.1')
+        self.assertEqual(self.index.get_latest((3, 1), predicate=lambda release: '-' not in release), '3.1.12')
+        self.assertEqual(self.index.get_latest((3, 1), upper_bound=((3, 1, 5), False)), '3.1.0')
+        self.assertEqual(self.index.get_latest((3, 1), upper_bound=((3, 1, 5, (1,)), True)), '3.1.5')
+        self.assertIsNone(self.index.get_latest((5,)))
+
+    def test_requirement(self):
+        requirement = PybumpRequirement('GitPython[ssh] >=3.1.0,!=3.1.12,<3.2 ; python_version > "3.8" # comment')
+        self.assertEqual(requirement.name, 'GitPython')
+        self.assertEqual(requirement.extras, {'ssh'})
+        self.assertEqual(requirement.version, '3.1.0')
+        self.assertEqual(requirement.upper_bound, ((3, 2, 0), False))
+        self.assertTrue(requirement.is_update_allowed('3.1.5'))
+        self.assertFalse(requirement.is_update_allowed('3.1.12'))
+        self.assertFalse(requirement.is_update_allowed('3.1.13-rc.1'), msg="pre-releases are not allowed")
+        self.assertFalse(requirement.is_update_allowed('1.0.0-alpha.beta'), msg="not a PEP 440 version")
+        self.assertEqual(PybumpRequirement('pybump==1.3.3').upper_bound, None)
+        self.assertTrue(PybumpRequirement('pybump==1.3.3').is_update_allowed('1.3.8'), msg="pin is ignored")
+        self.assertEqual(PybumpRequirement('pybump<=1.3').upper_bound, ((1, 3, 0, (1,)), True))
+        with self.assertRaises(ValueError):
+            PybumpRequirement('pybump ==')
+
+    def test_identify_possible_patch(self):
+        package_a, package_b, package_c, package_d, package_e = get_versions_from_requirements(
+            ['package_a==3.1.0', 'package_b>=3.1.0,!=3.1.12', 'package_c~=3.1.0,<3.1.5', 'package_d', 'package_e>'])
+        self.assertEqual((package_a.package_name, str(package_a.version)), ('package_a', '3.1.0'))
+        self.assertFalse(package_d.version.is_valid_semantic_version())
+        self.assertEqual((package_e.package_name, package_e.requirement), ('package_e', None))
+
+        package_a.identify_possible_patch(self.index)
+        self.assertTrue(package_a.patchable)
+        self.assertEqual(str(package_a.latest_patch), '3.1.12')
+
+        package_b.identify_possible_patch(releases)
+        self.assertEqual(str(package_b.latest_patch), '3.1.5')
+
+        package_c.identify_possible_patch(self.index)
+        self.assertFalse(package_c.patchable)
+        self.assertEqual(str(package_c.latest_patch), '3.1.0')
+
+        with self.assertRaises(ValueError):
+            package_a.identify_possible_patch([])
+
+
+class PyBumpLockfileTest(PybumpTempDirTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.fetched = []
+        self.paths = [self.write('one/poetry.lock', poetry_lock), self.write('two/uv.lock', uv_lock),
+                      self.write('two/requirements.txt', compiled_requirements)]
+
+    def fetch(self, package_name):
+        self.fetched.append(package_name)
+        if package_name == 'uvicorn':
+            raise RuntimeError('error occurred fetching uvicorn')
+        return {'releases': {release: [] for release in releases if release}}
+
+    def test_readers(self):
+        self.assertEqual(list(iter_toml_lock_packages(StringIO(poetry_lock))),
+                         [('GitPython', '3.1.0'), ('pyyaml', '5.3.1')],
+                         msg="packages with a non index source are skipped")
+        self.assertEqual(list(iter_toml_lock_packages(StringIO(uv_lock))), [('PyYAML', '5.3.1')])
+        self.assertEqual(list(iter_pinned_requirements(StringIO(compiled_requirements))),
+                         [('gitpython', '3.1.0'), ('uvicorn', '0.29.0')])
+
+    def test_get_locked_packages(self):
+        one, two, three = self.paths
+        self.assertEqual(get_locked_packages(self.paths), {
+            ('gitpython', '3.1.0'): ('GitPython', [one, three]),
+            ('pyyaml', '5.3.1'): ('pyyaml', [one, two]),
+            ('uvicorn', '0.29.0'): ('uvicorn', [three]),
+        })
+
+    def test_check_locked_patches(self):
+        packages = check_locked_patches(self.paths * 2, PybumpReleaseCache(self.fetch), max_workers=2)
+        self.assertEqual([(package['package_name'], package['latest_patch'], package.get('error'))
+                          for package in packages], [
+            ('GitPython', '3.1.12', None),
+            ('pyyaml', '5.3.1', None),
+            ('uvicorn', '0.29.0', 'error occurred fetching uvicorn'),
+        ])
+        self.assertTrue(packages[0]['patchable'])
+        self.assertEqual(sorted(self.fetched), ['GitPython', 'pyyaml', 'uvicorn'],
+                         msg="every unique package is fetched once")
+        with self.assertRaises(ValueError):
+            check_locked_patches(self.paths, max_workers=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import json
+import os
+import tempfile
+import unittest
+from io import StringIO
+
+from src.pybump_report import PybumpReport, count_changed_bytes
+
+
+class PyBumpReportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.version_file = os.path.join(self.tmp_dir.name, 'VERSION')
+        with open(self.version_file, 'w') as f:
+            f.write('1.0.9')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def read_version_file(self):
+        with open(self.version_file) as f:
+            return f.read()
+
+    def test_count_changed_bytes(self):
+        self.assertEqual(count_changed_bytes('1.0.9', '1.0.10'), 2)
+        self.assertEqual(count_changed_bytes('version="1.2.3"', 'version="1.3.0"'), 3)
+        self.assertEqual(count_changed_bytes('1.0.0', '1.0.0'), 0)
+        self.assertEqual(count_changed_bytes('', '1.0.0'), 5)
+
+    def test_invalid_output(self):
+        with self.assertRaises(ValueError):
+            PybumpReport(output='xml')
+
+    def test_ndjson_dry_run(self):
+        stream = StringIO()
+        report = PybumpReport(output='ndjson', dry_run=True, stream=stream)
+        report.write(self.version_file, 'plain_version', '1.0.10', '1.0.9', '1.0.10')
+        report.close()
+
+        self.assertEqual(self.read_version_file(), '1.0.9', msg="dry run should not write files")
+        record = json.loads(stream.getvalue().splitlines()[0])
+        self.assertEqual(record['path'], self.version_file)
+        self.assertEqual(record['file_type'], 'plain_version')
+        self.assertEqual(record['old_version'], '1.0.9')
+        self.assertEqual(record['new_version'], '1.0.10')
+        self.assertEqual(record['bytes_changed'], 2)
+        self.assertTrue(record['dry_run'])
+
+    def test_json(self):
+        stream = StringIO()
+        report = PybumpReport(output='json', stream=stream)
+        report.write(self.version_file, 'plain_version', '1.1.0', '1.0.9', '1.1.0')
+        report.write(self.version_file, 'plain_version', '1.2.0', '1.1.0', '1.2.0')
+        report.close()
+
+        self.assertEqual(self.read_version_file(), '1.2.0')
+        records = json.loads(stream.getvalue())
+        self.assertEqual([record['new_version'] for record in records], ['1.1.0', '1.2.0'])
+
+        stream = StringIO()
+        PybumpReport(output='json', stream=stream).close()
+        self.assertEqual(json.loads(stream.getvalue()), [])
+
+    def test_text_dry_run_diff(self):
+        stream = StringIO()
+        PybumpReport(dry_run=True, stream=stream).write(self.version_file, 'plain_version', '2.0.0', '1.0.9', '2.0.0')
+        self.assertIn('-1.0.9\n+2.0.0\n', stream.getvalue())
+        self.assertEqual(self.read_version_file(), '1.0.9', msg="dry run should not write files")
+
+        stream = StringIO()
+        PybumpReport(dry_run=True, stream=stream, quiet=True).write(self.version_file, 'plain_version', '2.0.0',
+                                                                    '1.0.9', '2.0.0')
+        self.assertEqual(stream.getvalue(), '', msg="quiet text output prints no diff")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import os
+import shutil
+import unittest
+
+from test import PybumpGitTestCase
+from src.pybump_git import list_staged_files, read_staged_blobs
+from src.pybump_staged import check_staged
+
+manifest = """
+[groups.app]
+files = ["VERSION", "src/app/__init__.py"]
+"""
+
+
+@unittest.skipUnless(shutil.which('git'), 'git executable is required')
+class PyBumpStagedTest(PybumpGitTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.write('.pybump.toml', manifest)
+        self.write('VERSION', '1.2.3\n')
+        self.write('src/app/__init__.py', '__version__ = "1.2.3"\n')
+        self.write('pyproject.toml', '[project]\nname = "app"\ndynamic = ["version"]\n')
+        self.git('add', '.')
+        self.git('commit', '-q', '-m', 'initial')
+
+    def test_read_staged_blobs(self):
+        self.write('VERSION', '1.2.4\n')
+        self.git('add', 'VERSION')
+        self.write('VERSION', '9.9.9\n')
+        self.assertEqual(list_staged_files(self.root), ['VERSION'])
+        self.assertEqual(read_staged_blobs(self.root, ['VERSION', 'missing', 'pyproject.toml']),
+                         {'VERSION': '1.2.4\n', 'missing': None,
+                          'pyproject.toml': '[project]\nname = "app"\ndynamic = ["version"]\n'})
+        self.assertEqual(read_staged_blobs(self.root, []), {})
+
+    def test_check_staged(self):
+        self.assertEqual(check_staged(self.root), [], msg="nothing staged")
+
+        # staged content is checked, not the worktree
+        self.write('VERSION', '1.2.4\n')
+        self.git('add', 'VERSION')
+        self.write('VERSION', '1.2.3\n')
+        result = check_staged(self.root)
+        self.assertEqual([(status, path) for status, path, _ in result], [('drift', 'VERSION')])
+        self.assertIn('src/app/__init__.py=1.2.3', result[0][2])
+
+        self.write('src/app/__init__.py', '__version__ = "1.2.4"\n')
+        self.git('add', 'src/app/__init__.py')
+        self.assertEqual(check_staged(self.root), [('ok', 'VERSION', '1.2.4'), ('ok', 'src/app/__init__.py', '1.2.4')])
+
+        # files outside of workspace groups are validated, a pyproject.toml with a dynamic version is skipped
+        os.makedirs(os.path.join(self.root, 'lib'))
+        self.write('lib/VERSION', '1.0\n')
+        self.write('pyproject.toml', '[project]\nname = "app"\ndynamic = ["version"]\nreadme = "README.md"\n')
+        self.git('add', 'lib/VERSION', 'pyproject.toml')
+        self.assertIn(('invalid', 'lib/VERSION'), [(status, path) for status, path, _ in check_staged(self.root)])
+        self.assertNotIn('pyproject.toml', [path for _, path, _ in check_staged(self.root)])
+
+    def test_check_staged_locators(self):
+        self.write('.pybump.toml', '[groups.image]\nfiles = ["VERSION", "docker/Dockerfile"]\n\n'
+                                   '[locators.docker]\nfiles = ["docker/Dockerfile"]\n'
+                                   'pattern = \'^LABEL version="(?P<version>[^"]+)"\'\n')
+        self.write('docker/Dockerfile', 'FROM python:3.11\nLABEL version="1.2.3"\n')
+        self.git('add', '.pybump.toml', 'docker/Dockerfile')
+        self.assertEqual(check_staged(self.root), [('ok', 'docker/Dockerfile', '1.2.3')],
+                         msg="members are read with the locators of the staged manifest")
+
+        self.write('docker/Dockerfile', 'FROM python:3.11\nLABEL version="1.2.4"\n')
+        self.git('add', 'docker/Dockerfile')
+        result = check_staged(self.root)
+        self.assertEqual([(status, path) for status, path, _ in result], [('drift', 'docker/Dockerfile')])
+        self.assertIn('VERSION=1.2.3', result[0][2])
+
+
+if __name__ == '__main__':
+    unittest.main()
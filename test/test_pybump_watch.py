@@ -0,0 +1,105 @@
+import sys
+import unittest
+
+from test import PybumpTempDirTestCase
+from src.pybump_watch import PybumpWatch, PybumpPollingWatcher, PybumpInotifyWatcher, find_version_files, \
+    wait_for_changes
+from src.pybump_workspace import PybumpWorkspace
+
+manifest = """
+[groups.app]
+files = ["VERSION", "service/pyproject.toml"]
+"""
+
+
+class PyBumpWatchTest(PybumpTempDirTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.write('.pybump.toml', manifest)
+        self.write('VERSION', '1.2.3\n')
+        self.write('service/pyproject.toml', '[project]\nname = "service"\nversion = "1.2.3"\n')
+        self.write('.git/VERSION', '0.0.1\n')
+        self.write('README.md', 'not a version file\n')
+
+    def test_find_version_files(self):
+        self.assertEqual(find_version_files([self.root]), {self.path('VERSION'), self.path('service/pyproject.toml')})
+        self.assertEqual(find_version_files([self.path('README.md')[:-3] + '.yaml']),
+                         {self.path('README.yaml')}, msg="explicit files are kept even if missing")
+        with self.assertRaises(ValueError):
+            find_version_files([self.path('README.md')])
+
+    def test_polling_watcher(self):
+        watcher = PybumpPollingWatcher([self.root])
+        self.assertEqual(watcher.poll(0), set())
+
+        self.write('VERSION', '1.2.4-rc.1\n')
+        self.write('README.md', 'changed\n')
+        self.assertEqual(wait_for_changes(watcher, interval=0, debounce=0), {self.path('VERSION')})
+
+    @unittest.skipUnless(sys.platform.startswith('linux'), 'inotify is Linux only')
+    def test_inotify_watcher(self):
+        watcher = PybumpInotifyWatcher([self.root])
+        try:
+            self.assertEqual(watcher.poll(0), set())
+            self.write('service/pyproject.toml', '[project]\nversion = "1.2.4"\n')
+            self.write('service/pyproject.toml', '[project]\nversion = "1.2.5"\n')
+            self.write('README.md', 'changed\n')
+            self.assertEqual(wait_for_changes(watcher, interval=1, debounce=0.05),
+                             {self.path('service/pyproject.toml')})
+
+            self.write('charts/api/Chart.yaml', 'name: api\nversion: 0.1.0\n')
+            self.assertEqual(wait_for_changes(watcher, interval=1, debounce=0.05), {self.path('charts/api/Chart.yaml')},
+                             msg="directories created while watching are watched too")
+            self.write('charts/api/Chart.yaml', 'name: api\nversion: 0.1.1\n')
+            self.assertEqual(wait_for_changes(watcher, interval=1, debounce=0.05), {self.path('charts/api/Chart.yaml')})
+        finally:
+            watcher.close()
+
+    def test_check_files(self):
+        pybump_watch = PybumpWatch(PybumpWorkspace(self.path('.pybump.toml')), tag_version='v1.2.2')
+        self.assertEqual(pybump_watch.check_files([self.path('VERSION')]), [('ok', self.path('VERSION'), '1.2.3')])
+
+        self.write('VERSION', '1.3.0\n')
+        result = pybump_watch.check_files([self.path('VERSION')])
+        self.assertEqual([status for status, _, _ in result], ['drift'], msg="changed file is read again")
+
+        self.write('VERSION', '1.2.1\n')
+        result = pybump_watch.check_files([self.path('VERSION')])
+        self.assertEqual([status for status, _, _ in result], ['drift', 'drift'])
+        self.assertIn('lower than the latest tag v1.2.2', result[1][2])
+
+        self.write('VERSION', 'not-a-version\n')
+        self.assertEqual(pybump_watch.check_files([self.path('VERSION')])[0][0], 'invalid')
+        self.assertEqual(pybump_watch.check_files([self.path('missing.yaml')])[0][0], 'error')
+
+    def test_check_files_members(self):
+        self.write('.pybump.toml',
+                   '[groups.app]\nfiles = ["VERSION", {path = "chart/Chart.yaml", key = "appVersion"}]\n')
+        self.write('chart/Chart.yaml', 'apiVersion: v2\nname: chart\nversion: 0.1.0\nappVersion: 1.2.3\n')
+        pybump_watch = PybumpWatch(PybumpWorkspace(self.path('.pybump.toml')))
+        self.assertEqual(pybump_watch.check_files([self.path('chart/Chart.yaml')]),
+                         [('ok', self.path('chart/Chart.yaml'), '1.2.3')], msg="members are read with appVersion")
+
+        self.write('VERSION', '')
+        self.assertEqual(pybump_watch.check_files([self.path('VERSION')])[0][0], 'invalid')
+        self.write('chart/Chart.yaml', 'name: chart\nversion: [\n')
+        self.assertEqual(pybump_watch.check_files([self.path('chart/Chart.yaml')])[0][0], 'error')
+        self.write('VERSION', '1.2.3\n')
+        self.write('chart/Chart.yaml', 'apiVersion: v2\nname: chart\nversion: 0.1.0\nappVersion: 1.2.3\n')
+        self.assertEqual([status for status, _, _ in pybump_watch.check_files([self.path('VERSION')])], ['ok'],
+                         msg="files that failed to read are not cached")
+
+    def test_check_files_group_changes(self):
+        pybump_watch = PybumpWatch(PybumpWorkspace(self.path('.pybump.toml')))
+        self.assertEqual([status for status, _, _ in pybump_watch.check_files([self.path('VERSION')])], ['ok'])
+
+        paths = [self.path('VERSION'), self.path('service/pyproject.toml')]
+        self.write('VERSION', '1.3.0\n')
+        self.write('service/pyproject.toml', '[project]\nname = "service"\nversion = "1.3.0"\n')
+        self.assertEqual(pybump_watch.check_files(paths), [('ok', path, '1.3.0') for path in paths],
+                         msg="members changed in the same batch are compared with each other's new version")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import os
+import unittest
+
+from test import PybumpTempDirTestCase
+from src.pybump_workspace import PybumpWorkspace, parse_workspace_manifest
+from src.pybump import PybumpVersion, read_version_from_file
+
+workspace_manifest = """
+[groups.app]
+files = ["VERSION", "pyproject.toml", {path = "chart/Chart.yaml", key = "appVersion"}]
+
+[groups.chart]
+files = [{path = "chart/Chart.yaml", key = "version"}]
+"""
+
+workspace_chart = """apiVersion: v2
+name: test
+version: 0.1.0 # chart version
+appVersion: 1.2.3
+"""
+
+workspace_pyproject = """[project]
+name = "test"
+version = "1.2.3"
+"""
+
+
+class PyBumpWorkspaceTest(PybumpTempDirTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.write('.pybump.toml', workspace_manifest)
+        self.write('VERSION', '1.2.3\n')
+        self.write('pyproject.toml', workspace_pyproject)
+        self.write('chart/Chart.yaml', workspace_chart)
+        self.manifest_path = os.path.join(self.root, '.pybump.toml')
+
+    def test_parse_workspace_manifest(self):
+        groups = parse_workspace_manifest(workspace_manifest, '/repo')
+        self.assertEqual(groups, {
+            'app': [('/repo/VERSION', False), ('/repo/pyproject.toml', False), ('/repo/chart/Chart.yaml', True)],
+            'chart': [('/repo/chart/Chart.yaml', False)],
+        })
+
+        with self.assertRaises(ValueError, msg="manifest without groups"):
+            parse_workspace_manifest('[something]\nkey = 1\n', '/repo')
+        with self.assertRaises(ValueError, msg="group without files"):
+            parse_workspace_manifest('[groups.app]\nfiles = []\n', '/repo')
+        with self.assertRaises(ValueError, msg="invalid key"):
+            parse_workspace_manifest('[groups.app]\nfiles = [{path = "Chart.yaml", key = "name"}]\n', '/repo')
+        with self.assertRaises(ValueError, msg="same file and key in two groups"):
+            parse_workspace_manifest('[groups.a]\nfiles = ["VERSION"]\n[groups.b]\nfiles = ["VERSION"]\n', '/repo')
+
+    def test_check(self):
+        versions = PybumpWorkspace(self.manifest_path).check()
+        self.assertEqual({name: str(version) for name, version in versions.items()},
+                         {'app': '1.2.3', 'chart': '0.1.0'})
+
+        self.write('VERSION', '1.2.4')
+        with self.assertRaises(ValueError, msg="app group members drifted"):
+            PybumpWorkspace(self.manifest_path).check()
+
+    def test_bump(self):
+        versions = PybumpWorkspace(self.manifest_path).bump('minor')
+        self.assertEqual({name: str(version) for name, version in versions.items()},
+                         {'app': '1.3.0', 'chart': '0.2.0'})
+
+        self.assertEqual(read_version_from_file(os.path.join(self.root, 'VERSION'), False)['version'], '1.3.0')
+        self.assertEqual(read_version_from_file(os.path.join(self.root, 'pyproject.toml'), False)['version'],
+                         '1.3.0')
+        chart = read_version_from_file(os.path.join(self.root, 'chart/Chart.yaml'), True)
+        self.assertEqual(chart['version'], '1.3.0')
+        self.assertEqual(chart['file_content']['version'], '0.2.0')
+
+        with open(os.path.join(self.root, 'chart/Chart.yaml')) as f:
+            self.assertIn('# chart version', f.read(), msg="comments should be preserved")
+
+    def test_set_version(self):
+        PybumpWorkspace(self.manifest_path).set_version(PybumpVersion('2.0.0'))
+        versions = PybumpWorkspace(self.manifest_path).check()
+        self.assertEqual({name: str(version) for name, version in versions.items()},
+                         {'app': '2.0.0', 'chart': '2.0.0'})
+
+    def test_write_files_checks_versions(self):
+        workspace = PybumpWorkspace(self.manifest_path)
+        workspace.check()
+        self.write('pyproject.toml', workspace_pyproject.replace('1.2.3', '1.2.4'))
+        with self.assertRaisesRegex(ValueError, 'pyproject.toml is 1.2.4, expected 1.2.3'):
+            workspace.set_version(PybumpVersion('2.0.0'))
+        self.assertEqual(self.read('pyproject.toml'), workspace_pyproject.replace('1.2.3', '1.2.4'),
+                         msg="a file changed by another writer since it was read is not overwritten")
+
+    def test_set_auto(self):
+        requested_paths = []
+
+        def get_commit_sha(path):
+            requested_paths.append(path)
+            return 'abc123'
+
+        PybumpWorkspace(self.manifest_path).set_auto(get_commit_sha)
+        PybumpWorkspace(self.manifest_path).set_auto(get_commit_sha, metadata=True)
+        versions = PybumpWorkspace(self.manifest_path).check()
+        self.assertEqual({name: str(version) for name, version in versions.items()},
+                         {'app': '1.2.3-abc123+abc123', 'chart': '0.1.0-abc123+abc123'})
+        self.assertEqual(requested_paths[:2], [os.path.join(self.root, 'VERSION'),
+                                               os.path.join(self.root, 'chart', 'Chart.yaml')])
+
+
+if __name__ == '__main__':
+    unittest.main()
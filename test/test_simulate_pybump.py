@@ -1,5 +1,7 @@
+import os
+import tempfile
 import unittest
-from subprocess import run, PIPE
+from subprocess import run, Popen, PIPE
 
 
 def simulate_get_version(file, app_version=False, sem_ver=False, release=False, metadata=False):
@@ -291,6 +293,52 @@ class PyBumpSimulatorTest(unittest.TestCase):
         stdout = completed_process_object.stdout.decode('utf-8').strip()
         self.assertEqual(stdout, '3.0.0+metadata.here')
 
+    def test_concurrent_writers(self):
+        """
+        Test concurrent bumps of a single file, and the --expect-version compare-and-swap
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'VERSION')
+            with open(path, 'w') as f:
+                f.write('1.0.0\n')
+
+            processes = [Popen(["python", "src/pybump.py", "bump", "--level", "patch", "--file", path],
+                               stdout=PIPE, stderr=PIPE) for _ in range(6)]
+            outputs = sorted(process.communicate()[0].decode('utf-8').strip() for process in processes)
+            self.assertEqual(outputs, ['1.0.{}'.format(patch) for patch in range(1, 7)],
+                             msg="no bump should be lost when pybump processes write the same file")
+
+            completed_process_object = run(["python", "src/pybump.py", "set", "--file", path, "--set-version",
+                                            "2.0.0", "--expect-version", "1.0.5"], stdout=PIPE, stderr=PIPE)
+            self.assertEqual(completed_process_object.returncode, 1)
+            self.assertEqual(completed_process_object.stderr.decode('utf-8').strip(),
+                             'Version of {} is 1.0.6, expected 1.0.5'.format(path))
+
+            completed_process_object = run(["python", "src/pybump.py", "set", "--file", path, "--set-version",
+                                            "2.0.0", "--expect-version", "1.0.6"], stdout=PIPE, stderr=PIPE)
+            self.assertEqual(completed_process_object.stdout.decode('utf-8').strip(), '2.0.0')
+
+    def test_from_tags_flag(self):
+        """
+        Test --from-tags against a bare file name, and its rejection with the other targets
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with open(os.path.join(tmp_dir, 'VERSION'), 'w') as f:
+                f.write('1.0.0\n')
+            completed_process_object = run(["python", os.path.abspath("src/pybump.py"), "bump", "--level", "patch",
+                                            "--file", "VERSION", "--from-tags"], stdout=PIPE, stderr=PIPE, cwd=tmp_dir)
+            self.assertEqual(completed_process_object.returncode, 1)
+            self.assertEqual(completed_process_object.stderr.decode('utf-8').strip(),
+                             '{} is not a valid git repo'.format(os.path.realpath(tmp_dir)),
+                             msg="the repository of a bare file name is its absolute directory")
+
+            for target in ('--workspace', '--charts'):
+                completed_process_object = run(["python", "src/pybump.py", "bump", "--level", "patch", target, tmp_dir,
+                                                "--from-tags"], stdout=PIPE, stderr=PIPE)
+                self.assertEqual(completed_process_object.returncode, 1)
+                self.assertEqual(completed_process_object.stderr.decode('utf-8').strip(),
+                                 '--from-tags flag is not supported with {}'.format(target))
+
     def test_verify_flag(self):
         """
         Test case when user is verifying string